@@ -0,0 +1,201 @@
+'''
+Generator of synthetic JCML corpora for benchmarking. Every parallel sentence gets a source,
+a reference and a number of translations, each translation with a gold rank, a predicted rank
+and a number of numeric attributes. The predicted ranks are noisy versions of the gold ranks, so
+that the metrics get realistic values. The corpus is written as a stream, so its size is not
+limited by the memory, and is the same for the same parameters and seed
+
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+'''
+
+import argparse
+import random
+import sys
+from io_utils.compression import open_output
+from io_utils.dataformat.jcmlformat import JcmlFormat
+
+#how many serialized parallel sentences are buffered before being written
+WRITE_BATCH = 1000
+
+
+def generate_ranks(rng, size, tie_rate = 0.0, unranked_rate = 0.0):
+    """
+    Generate a shuffled ranking of the given size
+    @param rng: the random number generator
+    @type rng: random.Random
+    @param size: the number of ranked items
+    @type size: int
+    @param tie_rate: the probability for each item to get the same rank as the one ranked before it
+    @type tie_rate: float
+    @param unranked_rate: the probability for each item to remain unranked (-1)
+    @type unranked_rate: float
+    @return: the ranks, from 1 upwards, with -1 for the unranked items
+    @rtype: [int, ...]
+    """
+    ranks = []
+    rank = 0
+    for position in xrange(size):
+        if not ranks or rng.random() >= tie_rate:
+            rank = position + 1
+        ranks.append(rank)
+    rng.shuffle(ranks)
+    if unranked_rate:
+        ranks = [-1 if rng.random() < unranked_rate else rank for rank in ranks]
+    return ranks
+
+
+def predict_ranks(rng, gold_ranks, noise = 1.0, tie_rate = 0.0):
+    """
+    Generate predicted ranks that agree with the gold ranks to some degree
+    @param gold_ranks: the gold ranks, where -1 counts as the worst rank
+    @type gold_ranks: [int, ...]
+    @param noise: the standard deviation of the noise added to the gold ranks before ranking again
+    @type noise: float
+    @param tie_rate: the probability for each item to get the same rank as the one ranked before it
+    @type tie_rate: float
+    @return: the predicted ranks, from 1 upwards
+    @rtype: [int, ...]
+    """
+    size = len(gold_ranks)
+    scores = [(rank if rank != -1 else size) + rng.gauss(0, noise) for rank in gold_ranks]
+    order = sorted(range(size), key=lambda index: scores[index])
+    ranks = [0] * size
+    rank = 0
+    for position, index in enumerate(order):
+        if not position or rng.random() >= tie_rate:
+            rank = position + 1
+        ranks[index] = rank
+    return ranks
+
+
+def _get_attribute_names(prefix, count):
+    return ["{}{}".format(prefix, index) for index in range(count)]
+
+
+def _serialize_attributes(attributes):
+    #the generated names and values need no escaping
+    return "".join([' {}="{}"'.format(name, value) for name, value in attributes])
+
+
+def _get_text(rng, vocabulary, length):
+    size = len(vocabulary)
+    return " ".join([vocabulary[int(rng.random() * size)] for i in xrange(length)])
+
+
+def generate_jcml(filename, segments = 1000, min_translations = 2, max_translations = 10,
+                  tie_rate = 0.1, unranked_rate = 0.0, attributes = 5, predicted_tie_rate = 0.05,
+                  noise = 1.0, words = 10, seed = 1):
+    """
+    Write a synthetic corpus of ranked translations
+    @param filename: the JCML file to be written. It gets compressed if the extension requires so
+    @type filename: str
+    @param segments: the number of parallel sentences
+    @type segments: int
+    @param min_translations: the minimum number of translations of each parallel sentence
+    @type min_translations: int
+    @param max_translations: the maximum number of translations of each parallel sentence
+    @type max_translations: int
+    @param tie_rate: the probability for each translation to be tied with another one in the gold ranks
+    @type tie_rate: float
+    @param unranked_rate: the probability for each translation to have no gold rank (-1)
+    @type unranked_rate: float
+    @param attributes: the number of numeric attributes of each translation and of each source
+    @type attributes: int
+    @param predicted_tie_rate: the probability for each translation to be tied with another one in the predicted ranks
+    @type predicted_tie_rate: float
+    @param noise: how much the predicted ranks deviate from the gold ones, see L{predict_ranks}
+    @type noise: float
+    @param words: the number of words of each sentence
+    @type words: int
+    @param seed: the seed of the random number generator
+    @type seed: int
+    @return: the number of parallel sentences and the number of translations written
+    @rtype: (int, int)
+    """
+    TAG = JcmlFormat.TAG
+    rng = random.Random(seed)
+    vocabulary = ["w{}".format(index) for index in range(1000)]
+    source_attribute_names = _get_attribute_names("src_feature_", attributes)
+    target_attribute_names = _get_attribute_names("feature_", attributes)
+    translations_count = 0
+
+    output = open_output(filename)
+    try:
+        output.write('<?xml version="1.0" encoding="utf-8"?>\n<{}>\n'.format(TAG["doc"]))
+        batch = []
+        for segment_id in xrange(segments):
+            size = rng.randint(min_translations, max_translations)
+            gold_ranks = generate_ranks(rng, size, tie_rate, unranked_rate)
+            predicted_ranks = predict_ranks(rng, gold_ranks, noise, predicted_tie_rate)
+            translations_count += size
+
+            sentence_attributes = [("id", segment_id), ("testset", "test{}".format(segment_id % 3)),
+                                   (TAG["langsrc"], "de"), (TAG["langtgt"], "en")]
+            batch.append("<{}{}>\n".format(TAG["sent"], _serialize_attributes(sentence_attributes)))
+            source_attributes = [(name, "%.4f" % rng.random()) for name in source_attribute_names]
+            batch.append("\t<{0}{1}>{2}</{0}>\n".format(TAG["src"], _serialize_attributes(source_attributes), _get_text(rng, vocabulary, words)))
+            for index, (gold_rank, predicted_rank) in enumerate(zip(gold_ranks, predicted_ranks)):
+                target_attributes = [("system", "system{}".format(index)), ("rank", gold_rank), ("predicted_rank", predicted_rank)]
+                target_attributes.extend([(name, "%.4f" % rng.random()) for name in target_attribute_names])
+                batch.append("\t<{0}{1}>{2}</{0}>\n".format(TAG["tgt"], _serialize_attributes(target_attributes), _get_text(rng, vocabulary, words)))
+            batch.append("\t<{0}>{1}</{0}>\n".format(TAG["ref"], _get_text(rng, vocabulary, words)))
+            batch.append("</{}>\n".format(TAG["sent"]))
+
+            if segment_id % WRITE_BATCH == WRITE_BATCH - 1:
+                output.write("".join(batch))
+                batch = []
+        batch.append("</{}>\n".format(TAG["doc"]))
+        output.write("".join(batch))
+    finally:
+        output.close()
+    return segments, translations_count
+
+
+def add_corpus_arguments(parser):
+    """
+    Add the commandline options of the generated corpus to the given parser
+    @type parser: argparse.ArgumentParser
+    """
+    parser.add_argument("--segments", type=int, default=1000, help="the number of parallel sentences")
+    parser.add_argument("--min-translations", type=int, default=2, help="the minimum number of translations per parallel sentence")
+    parser.add_argument("--max-translations", type=int, default=10, help="the maximum number of translations per parallel sentence")
+    parser.add_argument("--tie-rate", type=float, default=0.1, help="the probability of a translation to be tied in the gold ranks")
+    parser.add_argument("--predicted-tie-rate", type=float, default=0.05, help="the probability of a translation to be tied in the predicted ranks")
+    parser.add_argument("--unranked-rate", type=float, default=0.0, help="the probability of a translation to have no gold rank (-1)")
+    parser.add_argument("--attributes", type=int, default=5, help="the number of numeric attributes per translation")
+    parser.add_argument("--noise", type=float, default=1.0, help="how much the predicted ranks deviate from the gold ranks")
+    parser.add_argument("--words", type=int, default=10, help="the number of words per sentence")
+    parser.add_argument("--seed", type=int, default=1, help="the seed of the random number generator")
+
+
+def get_corpus_options(parser, args):
+    """
+    @param parser: the parser prepared with L{add_corpus_arguments}, for reporting invalid options
+    @param args: the parsed commandline options
+    @return: the keyword arguments of L{generate_jcml}, as given in the commandline
+    @rtype: {str: object, ...}
+    """
+    if not 2 <= args.min_translations <= args.max_translations:
+        parser.error("the number of translations should be at least 2 and the minimum not above the maximum")
+    return {"segments": args.segments,
+            "min_translations": args.min_translations,
+            "max_translations": args.max_translations,
+            "tie_rate": args.tie_rate,
+            "unranked_rate": args.unranked_rate,
+            "attributes": args.attributes,
+            "predicted_tie_rate": args.predicted_tie_rate,
+            "noise": args.noise,
+            "words": args.words,
+            "seed": args.seed}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate a synthetic JCML corpus of ranked translations for benchmarking")
+    parser.add_argument("filename", help="the file to be written, compressed if it ends with .gz, .bz2 or .xz")
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+
+    segments, translations = generate_jcml(args.filename, **get_corpus_options(parser, args))
+    sys.stderr.write("Wrote {} parallel sentences with {} translations\n".format(segments, translations))
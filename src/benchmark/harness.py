@@ -0,0 +1,325 @@
+'''
+Benchmarks of the readers, the writers, the normalization of the rankings, the metrics, the merging
+of data sets and the pairwise conversion, on a synthetic corpus (see L{generator}). Each benchmark runs
+in a fresh worker process, so that the memory it reaches is measured apart from the rest. The
+results can be stored as a baseline, and later results get compared to it in order to flag regressions
+
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+'''
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from multiprocessing import Pool
+from benchmark.generator import generate_jcml, add_corpus_arguments, get_corpus_options
+from evaluation.rankeval import read_rankings
+from evaluation.ranking import segment
+from evaluation.ranking.set import METRICS
+from io_utils.convert import convert, JCML, JSONL, TSV, WRITERS
+from io_utils.input.jcmlreader import JcmlReader
+from io_utils.input.iterjcmlreader import IterJcmlReader
+from io_utils.input.jsonlreader import JsonlReader
+from io_utils.input.tsvreader import TsvReader
+from profiling.stages import get_peak_memory
+
+#the relative increase of time or memory over the baseline that counts as a regression
+DEFAULT_THRESHOLD = 0.2
+
+#increases of the time below this are ignored, in seconds, as they are within the noise of the timer and the scheduler
+TIME_TOLERANCE = 0.02
+
+#increases of the peak memory below this are ignored, in kilobytes, as they are within the noise of the allocator
+MEMORY_TOLERANCE = 2048
+
+#the ways of normalizing ties
+TIES = ["minimize", "floor", "ceiling", "middle"]
+
+
+class Corpus(object):
+    """
+    The files of the benchmarked corpus, in every supported format
+    @ivar filenames: the file of each format
+    @type filenames: {str: str, ...}
+    @ivar directory: the directory for the files written by the benchmarks
+    @type directory: str
+    """
+
+    def __init__(self, directory, filename = None, **options):
+        """
+        @param directory: a directory for the corpus and the files written by the benchmarks
+        @type directory: str
+        @param filename: an existing JCML corpus, instead of generating one
+        @type filename: str
+        @param options: the keyword arguments of L{generate_jcml}
+        """
+        self.directory = directory
+        if filename is None:
+            filename = os.path.join(directory, "corpus.jcml")
+            generate_jcml(filename, **options)
+        self.filenames = {JCML: filename}
+        for dataformat in [JSONL, TSV]:
+            self.filenames[dataformat] = os.path.join(directory, "corpus.{}".format(dataformat))
+            convert(filename, self.filenames[dataformat])
+
+    def get_output_filename(self, dataformat):
+        return os.path.join(self.directory, "output.{}".format(dataformat))
+
+
+def _read_parallelsentences(corpus):
+    return list(IterJcmlReader(corpus.filenames[JCML]).get_parallelsentences())
+
+
+def _read_rankings(corpus):
+    return read_rankings(corpus.filenames[JCML], "predicted_rank", "rank")
+
+
+def _get_reader_benchmark(reader_class, dataformat):
+    def run(corpus):
+        return len(list(reader_class(corpus.filenames[dataformat]).get_parallelsentences()))
+    return corpus_setup, run
+
+
+def corpus_setup(corpus):
+    return corpus
+
+
+def _get_normalize_benchmark(ties):
+    def run(ranklists):
+        predicted_ranklist, gold_ranklist = ranklists
+        for ranking in predicted_ranklist:
+            ranking.normalize(ties=ties)
+        for ranking in gold_ranklist:
+            ranking.normalize(ties=ties)
+        return len(predicted_ranklist)
+    return _read_rankings, run
+
+
+def _run_kendall_tau(ranklists):
+    for predicted_ranking, gold_ranking in zip(*ranklists):
+        segment.kendall_tau(predicted_ranking, gold_ranking)
+    return len(ranklists[0])
+
+
+def _run_ndgc_err(ranklists):
+    for predicted_ranking, gold_ranking in zip(*ranklists):
+        segment.ndgc_err(predicted_ranking, gold_ranking)
+    return len(ranklists[0])
+
+
+def _run_reciprocal_rank(ranklists):
+    for predicted_ranking, gold_ranking in zip(*ranklists):
+        segment.reciprocal_rank(predicted_ranking, gold_ranking)
+    return len(ranklists[0])
+
+
+def _get_metric_benchmark(function):
+    def run(ranklists):
+        function(*ranklists)
+        return len(ranklists[0])
+    return _read_rankings, run
+
+
+def _setup_merge(corpus):
+    dataset = IterJcmlReader(corpus.filenames[JCML]).get_dataset()
+    incoming_dataset = IterJcmlReader(corpus.filenames[JCML]).get_dataset()
+    return dataset, incoming_dataset
+
+
+def _run_merge(datasets):
+    dataset, incoming_dataset = datasets
+    dataset.merge_dataset(incoming_dataset, {"rank": "incoming_rank"})
+    return len(dataset.get_parallelsentences())
+
+
+def _run_pairwise(parallelsentences):
+    for parallelsentence in parallelsentences:
+        parallelsentence.get_pairwise_parallelsentences()
+    return len(parallelsentences)
+
+
+def _get_writer_benchmark(dataformat):
+    def setup(corpus):
+        return corpus.get_output_filename(dataformat), _read_parallelsentences(corpus)
+    def run((filename, parallelsentences)):
+        writer = WRITERS[dataformat](filename)
+        for parallelsentence in parallelsentences:
+            writer.add_parallelsentence(parallelsentence)
+        writer.close()
+        return len(parallelsentences)
+    return setup, run
+
+
+#the setup and the benchmarked function of each benchmark. The setup gets the corpus and prepares
+#what the benchmarked function gets, which returns the number of items processed
+BENCHMARKS = OrderedDict([("read:jcml", _get_reader_benchmark(JcmlReader, JCML)),
+                          ("read:iterjcml", _get_reader_benchmark(IterJcmlReader, JCML)),
+                          ("read:jsonl", _get_reader_benchmark(JsonlReader, JSONL)),
+                          ("read:tsv", _get_reader_benchmark(TsvReader, TSV))]
+                         + [("normalize:{}".format(ties), _get_normalize_benchmark(ties)) for ties in TIES]
+                         + [("segment:kendall_tau", (_read_rankings, _run_kendall_tau)),
+                            ("segment:ndgc_err", (_read_rankings, _run_ndgc_err)),
+                            ("segment:reciprocal_rank", (_read_rankings, _run_reciprocal_rank))]
+                         + [("set:{}".format(name), _get_metric_benchmark(function)) for name, function in METRICS.iteritems()]
+                         + [("merge_dataset", (_setup_merge, _run_merge)),
+                            ("get_pairwise_parallelsentences", (_read_parallelsentences, _run_pairwise))]
+                         + [("write:{}".format(dataformat), _get_writer_benchmark(dataformat)) for dataformat in [JCML, JSONL, TSV]])
+
+
+def _run_benchmark(task):
+    """
+    Run one benchmark, meant to be called in a fresh worker process
+    @return: the measurements of the benchmark
+    @rtype: {str: object, ...}
+    """
+    name, corpus, repeats = task
+    setup, run = BENCHMARKS[name]
+    argument = setup(corpus)
+    start_memory = get_peak_memory()
+    timings = []
+    for repeat in range(repeats):
+        start = time.time()
+        items = run(argument)
+        timings.append(time.time() - start)
+    peak_memory = get_peak_memory()
+    timings.sort()
+    seconds = timings[0]
+    return {"seconds": seconds,
+            "median_seconds": timings[len(timings) // 2],
+            "repeats": repeats,
+            "items": items,
+            "items_per_second": items / seconds if seconds else None,
+            "peak_memory_kb": peak_memory,
+            "memory_growth_kb": peak_memory - start_memory}
+
+
+def select_benchmarks(names = None):
+    """
+    @param names: names of benchmarks, or prefixes of them ending with a colon, e.g. read: for all readers
+    @type names: [str, ...]
+    @return: the names of the selected benchmarks, in the order they are defined
+    @rtype: [str, ...]
+    """
+    if not names:
+        return BENCHMARKS.keys()
+    for name in names:
+        if not any([benchmark == name or (name.endswith(":") and benchmark.startswith(name)) for benchmark in BENCHMARKS]):
+            raise ValueError("Unknown benchmark {}. Available benchmarks: {}".format(name, ", ".join(BENCHMARKS)))
+    return [benchmark for benchmark in BENCHMARKS
+            if any([benchmark == name or (name.endswith(":") and benchmark.startswith(name)) for name in names])]
+
+
+def run_benchmarks(corpus, names = None, repeats = 5):
+    """
+    Run the given benchmarks, each one in its own worker process
+    @param corpus: the corpus the benchmarks work on
+    @type corpus: L{Corpus}
+    @param names: the names of the benchmarks, as accepted by L{select_benchmarks}, by default all of them
+    @type names: [str, ...]
+    @param repeats: how many times each benchmark is repeated. The fastest repetition counts
+    @type repeats: int
+    @return: the measurements of each benchmark, as they get ready
+    @rtype: iter((str, {str: object, ...}))
+    """
+    for name in select_benchmarks(names):
+        pool = Pool(1)
+        try:
+            result = pool.apply(_run_benchmark, ((name, corpus, repeats),))
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+        yield name, result
+
+
+def compare(results, baseline, threshold = DEFAULT_THRESHOLD):
+    """
+    Find the benchmarks that became slower or needed more memory than in the baseline
+    @param results: the current results, as written by the harness
+    @type results: dict
+    @param baseline: the results stored as the baseline
+    @type baseline: dict
+    @param threshold: the relative increase that counts as a regression
+    @type threshold: float
+    @return: the name of the benchmark, the measure, the value in the baseline and the current value of each regression
+    @rtype: [(str, str, float, float), ...]
+    """
+    regressions = []
+    for name, current in results["benchmarks"].iteritems():
+        previous = baseline["benchmarks"].get(name)
+        if previous is None:
+            continue
+        increase = current["seconds"] - previous["seconds"]
+        if increase > TIME_TOLERANCE and current["seconds"] > previous["seconds"] * (1 + threshold):
+            regressions.append((name, "seconds", previous["seconds"], current["seconds"]))
+        increase = current["peak_memory_kb"] - previous["peak_memory_kb"]
+        if increase > MEMORY_TOLERANCE and current["peak_memory_kb"] > previous["peak_memory_kb"] * (1 + threshold):
+            regressions.append((name, "peak_memory_kb", previous["peak_memory_kb"], current["peak_memory_kb"]))
+    return regressions
+
+
+def _display(name, result, previous = None):
+    line = "{:<32}{:>10.4f}s{:>14.0f}/s{:>10}KB".format(name, result["seconds"], result["items_per_second"] or 0, result["peak_memory_kb"])
+    if previous is not None:
+        line += "{:>+9.1f}%".format(100.0 * (result["seconds"] - previous["seconds"]) / previous["seconds"] if previous["seconds"] else 0)
+    sys.stderr.write(line + "\n")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the readers, the writers and the metrics on a synthetic corpus")
+    parser.add_argument("--corpus", help="an existing JCML corpus to benchmark on, instead of generating one")
+    add_corpus_arguments(parser)
+    parser.add_argument("--benchmarks", nargs="+", metavar="NAME", help="run only the given benchmarks, or the ones starting with a prefix ending with :, e.g. read:")
+    parser.add_argument("--repeats", type=int, default=5, help="how many times each benchmark is repeated, counting the fastest one")
+    parser.add_argument("--output", help="write the results as JSON to the given file")
+    parser.add_argument("--baseline", help="compare the results with the ones stored in the given file and fail on regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="the relative increase of time or memory that counts as a regression")
+    parser.add_argument("--list", action="store_true", help="list the available benchmarks")
+    args = parser.parse_args()
+
+    if args.list:
+        for name in BENCHMARKS:
+            print name
+        sys.exit()
+    corpus_options = get_corpus_options(parser, args)
+    try:
+        names = select_benchmarks(args.benchmarks)
+    except ValueError as e:
+        parser.error(str(e))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as baselinefile:
+            baseline = json.load(baselinefile)
+        if args.corpus is None and baseline.get("corpus") != corpus_options:
+            sys.stderr.write("Warning: the baseline was measured on a corpus with different parameters\n")
+
+    directory = tempfile.mkdtemp(prefix="rankeval_benchmark_")
+    try:
+        corpus = Corpus(directory, args.corpus, **corpus_options)
+        results = {"corpus": corpus_options if args.corpus is None else {"filename": os.path.abspath(args.corpus)},
+                   "python": platform.python_version(),
+                   "platform": platform.platform(),
+                   "benchmarks": OrderedDict()}
+        for name, result in run_benchmarks(corpus, names, args.repeats):
+            results["benchmarks"][name] = result
+            _display(name, result, baseline["benchmarks"].get(name) if baseline else None)
+    finally:
+        shutil.rmtree(directory)
+
+    if args.output:
+        with open(args.output, "w") as outputfile:
+            json.dump(results, outputfile, indent=2)
+            outputfile.write("\n")
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for name, measure, previous, current in regressions:
+            sys.stderr.write("Regression in {}: {} went from {} to {}\n".format(name, measure, previous, current))
+        if regressions:
+            sys.exit(1)
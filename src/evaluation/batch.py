@@ -0,0 +1,164 @@
+'''
+Evaluation of many files at once, in a pool of worker processes. The results of all files are
+gathered in one table, with one row for each file, including the time it took and the error, if
+the evaluation of the file failed, so that one failing file doesn't stop the rest
+
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+'''
+
+import argparse
+import glob
+import json
+import sys
+import time
+from multiprocessing import Pool, cpu_count
+from rankeval import evaluate, cached_evaluate, get_metric_options, add_metric_arguments
+from resultcache import ResultCache, DEFAULT_MAX_SIZE
+
+#the number of files a worker process evaluates before being replaced, so that memory gets released
+FILES_PER_WORKER = 10
+
+#the columns that precede the metrics in the table
+COLUMNS = ["filename", "status", "seconds", "error"]
+
+
+def expand_filenames(patterns):
+    """
+    @param patterns: filenames or glob patterns
+    @type patterns: [str, ...]
+    @return: the matching filenames, in the given order and without repetitions. Patterns that match
+    no file are kept as they are, so that they are reported as failures
+    @rtype: [str, ...]
+    """
+    filenames = []
+    seen = set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) or [pattern]
+        for filename in matches:
+            if filename not in seen:
+                seen.add(filename)
+                filenames.append(filename)
+    return filenames
+
+
+def _evaluate_file(task):
+    """
+    Evaluate one file, catching any error
+    @return: the row of the file in the table
+    @rtype: {str: object, ...}
+    """
+    filename, predicted_rank_name, gold_rank_name, cache_settings, options = task
+    start = time.time()
+    row = {"filename": filename}
+    try:
+        if cache_settings:
+            cache_dir, cache_size, refresh = cache_settings
+            result = cached_evaluate(filename, predicted_rank_name, gold_rank_name, ResultCache(cache_dir, cache_size), refresh, **options)
+        else:
+            result = evaluate(filename, predicted_rank_name, gold_rank_name, **options)
+        row.update(result)
+        row["status"] = "ok"
+    except Exception as e:
+        row["status"] = "failed"
+        row["error"] = "{}: {}".format(e.__class__.__name__, e)
+    row["seconds"] = round(time.time() - start, 3)
+    return row
+
+
+def evaluate_files(filenames, predicted_rank_name, gold_rank_name, processes = 1, cache_settings = None, **options):
+    """
+    Evaluate several files, each one in a worker process
+    @param filenames: the files to be evaluated
+    @type filenames: [str, ...]
+    @param predicted_rank_name: the name of the attribute of the predicted rank
+    @type predicted_rank_name: str
+    @param gold_rank_name: the name of the attribute of the gold (human) rank
+    @type gold_rank_name: str
+    @param processes: the number of worker processes. At most that many files are in memory at a time
+    @type processes: int
+    @param cache_settings: the directory, the size and whether to refresh the cache of the results, or None for not using it
+    @type cache_settings: (str, int, boolean)
+    @param options: the keyword arguments of L{allmetrics}
+    @return: the rows of the table, one for each file in the given order, as they get ready
+    @rtype: iter({str: object, ...})
+    """
+    tasks = [(filename, predicted_rank_name, gold_rank_name, cache_settings, options) for filename in filenames]
+    if processes <= 1:
+        for task in tasks:
+            yield _evaluate_file(task)
+        return
+    pool = Pool(processes, maxtasksperchild=FILES_PER_WORKER)
+    try:
+        for row in pool.imap(_evaluate_file, tasks, 1):
+            yield row
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _format_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        #full precision, also for numpy floats
+        return repr(float(value))
+    return unicode(value).replace("\t", " ").replace("\n", " ")
+
+
+def write_table(rows, outputfile, output_format = "tsv"):
+    """
+    Write the rows of the evaluated files
+    @param rows: the rows as given by L{evaluate_files}
+    @type rows: [{str: object, ...}, ...]
+    @param outputfile: where to write the table
+    @type outputfile: file
+    @param output_format: tsv for a table with a header and a column for every metric that appears
+    in any of the rows, or jsonl for one JSON object per row
+    @type output_format: str
+    """
+    if output_format == "jsonl":
+        for row in rows:
+            outputfile.write(json.dumps(row, sort_keys=True, default=lambda value: value.item()) + "\n")
+        return
+    metrics = sorted(set([name for row in rows for name in row if name not in COLUMNS]))
+    columns = COLUMNS + metrics
+    outputfile.write("\t".join(columns) + "\n")
+    for row in rows:
+        outputfile.write(u"\t".join([_format_value(row.get(column)) for column in columns]).encode("utf-8") + "\n")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Evaluate predicted rankings against gold rankings in many files at once")
+    parser.add_argument("predicted_rank_name", help="the name of the attribute of the predicted rank")
+    parser.add_argument("gold_rank_name", help="the name of the attribute of the gold (human) rank")
+    parser.add_argument("filenames", nargs="+", help="the files to be evaluated, or glob patterns for them")
+    add_metric_arguments(parser)
+    parser.add_argument("--processes", type=int, default=cpu_count(), help="the number of files evaluated in parallel")
+    parser.add_argument("--format", choices=["tsv", "jsonl"], default="tsv", help="the format of the table of the results")
+    parser.add_argument("--output", help="the file of the table of the results, by default the standard output")
+    parser.add_argument("--cache", action="store_true", help="use the cached results if the file and the options are unchanged, and store the new ones")
+    parser.add_argument("--refresh", action="store_true", help="with --cache, calculate again and replace the cached results")
+    parser.add_argument("--cache-dir", help="with --cache, the directory of the cached results")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_SIZE, help="with --cache, the maximum size of the cached results, in bytes")
+    args = parser.parse_args()
+
+    filenames = expand_filenames(args.filenames)
+    cache_settings = (args.cache_dir, args.cache_size, args.refresh) if args.cache else None
+    rows = []
+    for row in evaluate_files(filenames, args.predicted_rank_name, args.gold_rank_name, args.processes, cache_settings, **get_metric_options(args)):
+        sys.stderr.write("{}\t{}\t{}s\n".format(row["filename"], row["status"], row["seconds"]))
+        rows.append(row)
+
+    outputfile = open(args.output, "w") if args.output else sys.stdout
+    try:
+        write_table(rows, outputfile, args.format)
+    finally:
+        if args.output:
+            outputfile.close()
+    failed = len([row for row in rows if row["status"] != "ok"])
+    if failed:
+        sys.stderr.write("{} of {} files failed\n".format(failed, len(rows)))
+        sys.exit(1)
@@ -0,0 +1,181 @@
+'''
+A thin client of the evaluation server (see L{server}), to be used either from the commandline
+or from python code, e.g. by a training loop that evaluates its predictions after every epoch
+
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+'''
+
+import argparse
+import httplib
+import json
+import os
+import socket
+import sys
+from collections import OrderedDict
+
+DEFAULT_PORT = 8642
+
+
+class UnixHTTPConnection(httplib.HTTPConnection):
+    """
+    An HTTP connection over a unix socket
+    """
+
+    def __init__(self, socket_path, timeout = None):
+        httplib.HTTPConnection.__init__(self, "localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class EvaluationClientError(Exception):
+    """
+    An error reported by the server
+    """
+    pass
+
+
+class EvaluationClient(object):
+    """
+    Sends requests to an evaluation server. The connection is kept open between the requests
+    """
+
+    def __init__(self, port = DEFAULT_PORT, socket_path = None, timeout = None):
+        """
+        @param port: the port of the server on localhost
+        @type port: int
+        @param socket_path: the path of the unix socket of the server, instead of the port
+        @type socket_path: str
+        @param timeout: the timeout of the requests in seconds
+        @type timeout: float
+        """
+        self.port = port
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.connection = None
+
+    def _connect(self):
+        if self.socket_path:
+            return UnixHTTPConnection(self.socket_path, self.timeout)
+        return httplib.HTTPConnection("127.0.0.1", self.port, timeout=self.timeout)
+
+    def _request(self, method, path, content = None):
+        body = json.dumps(content) if content is not None else None
+        headers = {"Content-Type": "application/json"}
+        #retry once, in case the server has closed the kept connection
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = self._connect()
+            try:
+                self.connection.request(method, path, body, headers)
+                response = self.connection.getresponse()
+                data = response.read()
+                break
+            except (httplib.HTTPException, socket.error):
+                self.close()
+                if attempt:
+                    raise
+        result = json.loads(data)
+        if response.status != 200:
+            raise EvaluationClientError(result.get("error", response.reason))
+        return result
+
+    def load(self, name, filename, gold_rank_name = "rank"):
+        """
+        Make the server read and keep the gold rankings of a file
+        @return: the number of sentences and translations loaded
+        @rtype: dict
+        """
+        return self._request("POST", "/load", {"name": name, "filename": os.path.abspath(filename), "gold_rank_name": gold_rank_name})
+
+    def unload(self, name):
+        return self._request("POST", "/unload", {"name": name})
+
+    def get_datasets(self):
+        return self._request("GET", "/datasets")
+
+    def evaluate(self, name, predicted = None, filename = None, predicted_rank_name = None, **options):
+        """
+        Evaluate predicted rankings against the gold rankings loaded with the given name. The
+        rankings are either given directly or read by the server from a file
+        @param predicted: the predicted ranks of the translations of each parallel sentence
+        @type predicted: [[float, ...], ...]
+        @param filename: a file with the predicted ranks as attributes of the translations
+        @type filename: str
+        @param predicted_rank_name: the name of the attribute of the predicted rank in the file
+        @type predicted_rank_name: str
+        @param options: the keyword arguments of L{allmetrics}, e.g. metrics or ties
+        @return: a dictionary with the name of each metric and its value
+        @rtype: {str: float, ...}
+        """
+        request = {"name": name, "options": options}
+        if predicted is not None:
+            request["predicted"] = [list(ranking) for ranking in predicted]
+        else:
+            request["filename"] = os.path.abspath(filename)
+            request["predicted_rank_name"] = predicted_rank_name
+        return self._request("POST", "/evaluate", request)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def _display(dic):
+    dic = OrderedDict(sorted(dic.items(), key=lambda t: t[0]))
+    for key, value in dic.iteritems():
+        print "{}\t{}".format(key, value)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Send requests to the evaluation server")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="the port of the server on localhost")
+    parser.add_argument("--socket", help="the path of the unix socket of the server, instead of the port")
+    subparsers = parser.add_subparsers(dest="command")
+
+    load_parser = subparsers.add_parser("load", help="load the gold rankings of a file")
+    load_parser.add_argument("name", help="the name to refer to the gold rankings")
+    load_parser.add_argument("filename", help="the file containing the gold ranks")
+    load_parser.add_argument("gold_rank_name", help="the name of the attribute of the gold rank")
+
+    unload_parser = subparsers.add_parser("unload", help="release loaded gold rankings")
+    unload_parser.add_argument("name", help="the name of the gold rankings")
+
+    subparsers.add_parser("datasets", help="list the loaded gold rankings")
+
+    evaluate_parser = subparsers.add_parser("evaluate", help="evaluate the predicted ranks of a file against loaded gold rankings")
+    evaluate_parser.add_argument("name", help="the name of the gold rankings")
+    evaluate_parser.add_argument("filename", help="the file containing the predicted ranks, in the order of the gold file")
+    evaluate_parser.add_argument("predicted_rank_name", help="the name of the attribute of the predicted rank")
+    evaluate_parser.add_argument("--metrics", nargs="+", help="calculate only the given metrics")
+    evaluate_parser.add_argument("--ties", choices=["minimize", "floor", "ceiling", "middle"], help="the way ties get normalized")
+    args = parser.parse_args()
+
+    client = EvaluationClient(args.port, args.socket)
+    try:
+        if args.command == "load":
+            _display(client.load(args.name, args.filename, args.gold_rank_name))
+        elif args.command == "unload":
+            client.unload(args.name)
+        elif args.command == "datasets":
+            for name, description in sorted(client.get_datasets().iteritems()):
+                print "{}\t{}\t{}\t{}".format(name, description["filename"], description["gold_rank_name"], description["sentences"])
+        else:
+            options = {}
+            if args.metrics:
+                options["metrics"] = args.metrics
+            if args.ties:
+                options["ties"] = args.ties
+            _display(client.evaluate(args.name, filename=args.filename, predicted_rank_name=args.predicted_rank_name, **options))
+    except (EvaluationClientError, httplib.HTTPException, socket.error) as e:
+        sys.stderr.write("{}\n".format(e))
+        sys.exit(1)
+    finally:
+        client.close()
@@ -4,43 +4,199 @@ Created on 22 May 2013
 @author: Eleftherios Avramidis
 '''
 
+import argparse
 import sys
 from collections import OrderedDict
-from io_utils.input.jcmlreader import JcmlReader
-from ranking.set import allmetrics
+from io_utils.convert import get_reader
+from ranking.set import allmetrics, METRICS
+from evaluation.ranking import tracing
 from sentence.ranking import Ranking
+from resultcache import ResultCache, DEFAULT_MAX_SIZE
+from profiling.stages import get_profiler
+from profiling.profiler import CallProfiler, MemoryProfiler
 
 
 def _display(dic):
     dic = OrderedDict(sorted(dic.items(), key=lambda t: t[0]))
     for key, value in dic.iteritems():
         print "{}\t{}".format(key,value)
-    
+
+
+def read_rankings(filename, *rank_names, **kwargs):
+    """
+    Read the rankings of the translations of every parallel sentence in a file
+    @param filename: the file of the parallel sentences, in any of the formats supported by L{get_reader}
+    @type filename: str
+    @param rank_names: the names of the attributes of the ranks to be read
+    @type rank_names: [str, ...]
+    @param kwargs: passed to the reader, e.g. the filters
+    @return: for each one of the rank names, the list of the rankings of all parallel sentences
+    @rtype: ([L{Ranking}, ...], ...)
+    """
+    ranklists = tuple([[] for rank_name in rank_names])
+    for parallelsentence in get_reader(filename, **kwargs).get_parallelsentences():
+        for rank_name, ranklist in zip(rank_names, ranklists):
+            ranklist.append(Ranking(parallelsentence.get_target_attribute_values(rank_name)))
+    return ranklists
+
+
+def evaluate(filename, predicted_rank_name, gold_rank_name, **kwargs):
+    """
+    Calculate the metrics that compare the predicted with the gold ranks in the given file
+    @param filename: the file containing both ranks as attributes of the translations, e.g. JCML
+    @type filename: str
+    @param predicted_rank_name: the name of the attribute of the predicted rank
+    @type predicted_rank_name: str
+    @param gold_rank_name: the name of the attribute of the gold (human) rank
+    @type gold_rank_name: str
+    @keyword metrics: the names of the metrics to be calculated, by default all of them
+    @type metrics: [str, ...]
+    @return: a dictionary with the name of each metric and its value
+    @rtype: {str: float, ...}
+    """
+    predicted_ranklist, gold_ranklist = read_rankings(filename, predicted_rank_name, gold_rank_name)
+    return allmetrics(predicted_ranklist, gold_ranklist, **kwargs)
+
+
+def cached_evaluate(filename, predicted_rank_name, gold_rank_name, cache = None, refresh = False, **kwargs):
+    """
+    Same as L{evaluate}, but the results are stored in the given cache and provided from there,
+    as long as the content of the file and the configuration remain the same
+    @param cache: the cache of the results
+    @type cache: L{ResultCache}
+    @param refresh: don't use any stored results, but calculate and store them again
+    @type refresh: boolean
+    """
+    if cache is None:
+        cache = ResultCache()
+    key = cache.get_key(filename, predicted_rank_name=predicted_rank_name, gold_rank_name=gold_rank_name, **kwargs)
+    if not refresh:
+        result = cache.get(key)
+        if result is not None:
+            return result
+    result = evaluate(filename, predicted_rank_name, gold_rank_name, **kwargs)
+    try:
+        cache.put(key, result)
+    except (IOError, OSError) as e:
+        #e.g. an unwritable cache directory shouldn't stop the evaluation
+        sys.stderr.write("Could not store the results in the cache: {}\n".format(e))
+    return result
+
+
+def profiled_evaluate(filename, predicted_rank_name, gold_rank_name, stats_filename = None, memory_filename = None, **kwargs):
+    """
+    Same as L{evaluate}, but profiling the calls, the memory or both. A summary of the hottest
+    functions and of the memory is written on the standard error
+    @param stats_filename: the file for the statistics of the calls, in the pstats format
+    @type stats_filename: str
+    @param memory_filename: the file for the report of the memory after reading and after calculating the metrics
+    @type memory_filename: str
+    """
+    call_profiler = CallProfiler() if stats_filename else None
+    memory_profiler = MemoryProfiler() if memory_filename else None
+
+    def run(function, *args, **kwargs):
+        if call_profiler is not None:
+            return call_profiler.run(function, *args, **kwargs)
+        return function(*args, **kwargs)
+
+    if memory_profiler is not None:
+        memory_profiler.start()
+    try:
+        predicted_ranklist, gold_ranklist = run(read_rankings, filename, predicted_rank_name, gold_rank_name)
+        if memory_profiler is not None:
+            memory_profiler.snapshot("reading")
+        result = run(allmetrics, predicted_ranklist, gold_ranklist, **kwargs)
+        if memory_profiler is not None:
+            memory_profiler.snapshot("the metrics")
+    finally:
+        if memory_profiler is not None:
+            memory_profiler.stop()
+
+    if call_profiler is not None:
+        call_profiler.write_stats(stats_filename)
+        call_profiler.write_summary(sys.stderr)
+    if memory_profiler is not None:
+        with open(memory_filename, "w") as memoryfile:
+            memory_profiler.write_report(memoryfile)
+        memory_profiler.write_summary(sys.stderr)
+    return result
+
+
+def add_metric_arguments(parser):
+    """
+    Add the commandline options that affect the metrics to the given parser
+    @type parser: argparse.ArgumentParser
+    """
+    parser.add_argument("--metrics", nargs="+", choices=METRICS.keys(), help="calculate only the given metrics")
+    parser.add_argument("--ties", choices=["minimize", "floor", "ceiling", "middle"], help="the way ties get normalized")
+    parser.add_argument("--include-ties", action="store_true", help="don't exclude the pairs tied in the gold ranks from Kendall tau")
+    parser.add_argument("--no-penalize-predicted-ties", action="store_true", help="don't count the pairs tied in the predicted ranks as discordant")
+    parser.add_argument("--invert-ranks", action="store_true", help="the gold ranks are ordered the other way round")
+
+
+def get_metric_options(args):
+    """
+    @param args: the commandline options, parsed by a parser prepared with L{add_metric_arguments}
+    @return: the keyword arguments of the metric functions, as given in the commandline.
+    Only the ones that were given are included, so that the rest keep their default values
+    @rtype: {str: object, ...}
+    """
+    options = {}
+    if args.metrics:
+        options["metrics"] = args.metrics
+    if args.ties:
+        options["ties"] = args.ties
+    if args.include_ties:
+        options["exclude_ties"] = False
+    if args.no_penalize_predicted_ties:
+        options["penalize_predicted_ties"] = False
+    if args.invert_ranks:
+        options["invert_ranks"] = True
+    return options
 
 
 if __name__ == '__main__':
-    
-    if len(sys.argv)<4:
-        sys.stderr.write("Commandline options: \npython rankeval.py <filename> <predicted_rank_name> <gold_rank_name>\n")
-    
-    
-    filename = sys.argv[1]
-    predicted_rank_name = sys.argv[2]
-    gold_rank_name = sys.argv[3]
-    
-    gold_ranklist = []
-    predicted_ranklist = []
-    
-    #get all ranks in a list
-    for parallelsentence in JcmlReader(filename).get_parallelsentences(): 
-        
-        gold_ranks = Ranking(parallelsentence.get_target_attribute_values(gold_rank_name))
-        gold_ranklist.append(gold_ranks)
-        
-        predicted_ranks = Ranking(parallelsentence.get_target_attribute_values(predicted_rank_name))
-        predicted_ranklist.append(predicted_ranks)
-        
-    _display(allmetrics (predicted_ranklist, gold_ranklist))
-    
-        
-    
\ No newline at end of file
+
+    parser = argparse.ArgumentParser(description="Evaluate predicted rankings against gold rankings")
+    parser.add_argument("filename", help="the JCML file containing both ranks as attributes of the translations")
+    parser.add_argument("predicted_rank_name", help="the name of the attribute of the predicted rank")
+    parser.add_argument("gold_rank_name", help="the name of the attribute of the gold (human) rank")
+    add_metric_arguments(parser)
+    parser.add_argument("--cache", action="store_true", help="use the cached results if the file and the options are unchanged, and store the new ones")
+    parser.add_argument("--refresh", action="store_true", help="with --cache, calculate again and replace the cached results")
+    parser.add_argument("--cache-dir", help="with --cache, the directory of the cached results")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_SIZE, help="with --cache, the maximum size of the cached results, in bytes")
+    parser.add_argument("--stages", metavar="FILENAME", help="write the time, the throughput and the memory of each stage as JSON to the given file, or - for the standard error. Cached results are not measured")
+    parser.add_argument("--trace", metavar="FILENAME", help="write the decision on every pair of Kendall tau and the calculation of every gain as JSON lines to the given file, or - for the standard error. The results are then not cached")
+    parser.add_argument("--trace-segments", type=int, nargs="+", metavar="ID", help="trace only the segments at the given positions, starting from 0")
+    parser.add_argument("--profile", metavar="FILENAME", help="profile the calls and write the statistics in the pstats format to the given file. The results are then not cached")
+    parser.add_argument("--profile-memory", metavar="FILENAME", help="write a report of what occupies the memory to the given file. The results are then not cached")
+    args = parser.parse_args()
+
+    if args.trace:
+        tracefile = sys.stderr if args.trace == "-" else open(args.trace, "w")
+        tracing.enable(args.trace_segments, tracefile)
+    if args.stages:
+        profiler = get_profiler()
+        profiler.enable(METRICS)
+    options = get_metric_options(args)
+    if args.profile or args.profile_memory:
+        result = profiled_evaluate(args.filename, args.predicted_rank_name, args.gold_rank_name, args.profile, args.profile_memory, **options)
+    elif not args.cache or args.trace:
+        result = evaluate(args.filename, args.predicted_rank_name, args.gold_rank_name, **options)
+    else:
+        cache = ResultCache(args.cache_dir, args.cache_size)
+        result = cached_evaluate(args.filename, args.predicted_rank_name, args.gold_rank_name, cache, args.refresh, **options)
+    _display(result)
+    if args.trace:
+        tracing.disable()
+        if args.trace != "-":
+            tracefile.close()
+    if args.stages:
+        profiler.disable()
+        if args.stages == "-":
+            profiler.write_report(sys.stderr)
+        else:
+            with open(args.stages, "w") as stagesfile:
+                profiler.write_report(stagesfile)
@@ -8,9 +8,9 @@ Created on Nov 25, 2012
 '''
 
 from math import log
-import logging
 from collections import namedtuple
 from sentence.ranking import Ranking
+from evaluation.ranking import tracing
 
 """""""""
 Kendall tau
@@ -39,6 +39,10 @@ def kendall_tau_prob(tau, pairs):
     return special.erfc(np.abs(z) / 1.4142136)
 
 
+#the results of the segment-level Kendall tau, defined once, as creating the class is far slower than the calculation
+KendallTauResult = namedtuple('Result', ['tau', 'prob', 'concordant_count', 'discordant_count', 'all_pairs_count', 'original_ties', 'predicted_ties', 'pairs'])
+
+
 def kendall_tau(predicted_rank_vector, original_rank_vector, **kwargs):
     """
     This is the refined calculation of segment-level Kendall tau of predicted vs human ranking according to WMT12 (Birch et. al 2012)
@@ -48,6 +52,8 @@ def kendall_tau(predicted_rank_vector, original_rank_vector, **kwargs):
     @type original_rank_vector: [str, ..]
     @kwarg ties: way of handling ties, passed to L{sentence.ranking.Ranking} object
     @type ties: string
+    @kwarg segment_id: the position of the segment, for tracing the decision on each pair (see L{tracing})
+    @type segment_id: int
     @return: the Kendall tau score,
      the probability for the null hypothesis of X and Y being independent
      the count of concordant pairs,
@@ -65,15 +71,10 @@ def kendall_tau(predicted_rank_vector, original_rank_vector, **kwargs):
     predicted_rank_vector = predicted_rank_vector.normalize(ties=ties_handling)
     original_rank_vector = original_rank_vector.normalize(ties=ties_handling)
     
-    logging.debug("\n* Segment tau *")
-    logging.debug("predicted vector: {}".format(predicted_rank_vector))
-    logging.debug("original vector : {}".format(original_rank_vector))
-    
     #default wmt implementation excludes ties from the human (original) ranks
     exclude_ties = kwargs.setdefault("exclude_ties", True)
     #ignore also predicted ties
     penalize_predicted_ties = kwargs.setdefault("penalize_predicted_ties", True)
-    logging.debug("exclude_ties: {}".format(exclude_ties))
     
     #
     if kwargs.setdefault("invert_ranks", False):
@@ -85,6 +86,14 @@ def kendall_tau(predicted_rank_vector, original_rank_vector, **kwargs):
     predicted_pairs = [(float(i), float(j)) for i, j in itertools.combinations(predicted_rank_vector, 2)]
     original_pairs = [(inv*float(i), inv*float(j)) for i, j in itertools.combinations(original_rank_vector, 2)]
     
+    #the decision on every pair gets recorded only if the segment is traced
+    tracer = tracing.get_tracer(kwargs.get("segment_id"))
+    if tracer is not None:
+        traced_pairs = []
+        record = traced_pairs.append
+    else:
+        record = None
+    
     concordant_count = 0
     discordant_count = 0
     
@@ -99,8 +108,6 @@ def kendall_tau(predicted_rank_vector, original_rank_vector, **kwargs):
         
         predicted_i, predicted_j = predicted_pair
         
-        logging.debug("%s\t%s", original_pair,  predicted_pair)
-        
         #general statistics
         pairs +=1
         if original_i == original_j:
@@ -110,44 +117,46 @@ def kendall_tau(predicted_rank_vector, original_rank_vector, **kwargs):
         
         # don't include refs, human no-ranks (-1), human ties
         if original_i == -1 or original_j == -1: 
-            pass
+            decision = "no rank"
         #don't count ties on the original rank
         elif original_i == original_j and exclude_ties:
-            pass
+            decision = "original tie"
         #concordant
         elif (original_i > original_j and predicted_i > predicted_j) \
           or (original_i < original_j and predicted_i < predicted_j) \
           or (original_i == original_j and predicted_i == predicted_j):
             #the former line will be true only if ties are not excluded 
             concordant_count += 1
-            logging.debug("\t\tCON")
+            decision = "CON"
         #ignore false predicted ties if requested
         elif (predicted_i == predicted_j and not penalize_predicted_ties):
-            pass 
+            decision = "predicted tie"
         else: 
             discordant_count += 1
-            logging.debug("\t\tDIS")
+            decision = "DIS"
+        
+        if record is not None:
+            record({"original": original_pair, "predicted": predicted_pair, "decision": decision})
     all_pairs_count = concordant_count + discordant_count
 
-    logging.debug("original_ties = %d, predicted_ties = %d", original_ties, predicted_ties)   
-    logging.debug("conc = %d, disc= %d", concordant_count, discordant_count) 
-    
     try:
         tau = 1.00 * (concordant_count - discordant_count) / all_pairs_count
-        logging.debug("tau = {0} - {1} / {0} + {1}".format(concordant_count, discordant_count))
-        logging.debug("tau = {0} / {1}".format(concordant_count - discordant_count, all_pairs_count))
-        
     except ZeroDivisionError:
         tau = None
         prob = None
     else:
         prob = kendall_tau_prob(tau, all_pairs_count)
     
-    logging.debug("tau = {}, prob = {}\n".format(tau, prob))
+    if tracer is not None:
+        tracer.add_record(kwargs["segment_id"], "tau",
+                          predicted=predicted_rank_vector, original=original_rank_vector,
+                          exclude_ties=exclude_ties, penalize_predicted_ties=penalize_predicted_ties,
+                          pairs=traced_pairs, tau=tau, prob=float(prob) if prob is not None else None,
+                          concordant_count=concordant_count, discordant_count=discordant_count,
+                          original_ties=original_ties, predicted_ties=predicted_ties)
     
     #wrap results in a named tuple
-    Result = namedtuple('Result', ['tau', 'prob', 'concordant_count', 'discordant_count', 'all_pairs_count', 'original_ties', 'predicted_ties', 'pairs'])
-    result = Result(tau, prob, concordant_count, discordant_count, all_pairs_count, original_ties, predicted_ties, pairs)
+    result = KendallTauResult(tau, prob, concordant_count, discordant_count, all_pairs_count, original_ties, predicted_ties, pairs)
     
     return result 
 
@@ -156,13 +165,15 @@ def kendall_tau(predicted_rank_vector, original_rank_vector, **kwargs):
 DCG
 """""""""                    
 
-def _calculate_gains(predicted_rank_vector, original_rank_vector, verbose=True):
+def _calculate_gains(predicted_rank_vector, original_rank_vector, verbose=True, segment_id=None):
     """
     Calculate the gain for each one of the predicted ranks
     @param predicted_rank_vector: list of integers representing the predicted ranks
     @type predicted_rank_vector: [int, ...]
     @param original_rank_vector: list of integers containing the original ranks
     @type original_rank_vector: [int, ...]
+    @param segment_id: the position of the segment, for tracing the calculation of each gain (see L{tracing})
+    @type segment_id: int
     @return: a list of gains, relevant to the DCG calculation
     @rtype: [float, ...]
     """
@@ -178,18 +189,25 @@ def _calculate_gains(predicted_rank_vector, original_rank_vector, verbose=True):
     expn = 2**n
     gains = [0]*n 
 
+    #the calculation of every gain gets recorded only if the segment is traced
+    tracer = tracing.get_tracer(segment_id)
+    if tracer is not None:
+        steps = []
+        record = steps.append
+    else:
+        record = None
+
     #added this line to get high gain for lower rank values
 #    r = r[::-1]
     for j in range(n):            
-        gains[r[j]-1] = (2**l[j]-1.0)/expn
-
-        logging.debug("j={}\nr[j]={}\nl[j]={}\n".format(j,r[j],l[j])) 
-        logging.debug("gains[{}] = ".format(r[j]-1))
-        logging.debug("\t(2**l[j]-1.0) / 2**n =")
-        logging.debug("\t(2**{}-1.0) / 2**{}=".format(l[j], n))
-        logging.debug("\t{} / {} =".format((2**l[j]-1.0),expn))
-        logging.debug("{}".format((2**l[j]-1.0)/expn))
-        logging.debug("gains = {}".format(gains))
+        gain = (2**l[j]-1.0)/expn
+        gains[r[j]-1] = gain
+        if record is not None:
+            record({"j": j, "rank": r[j], "relevance": l[j], "gain": gain})
+    
+    if tracer is not None:
+        tracer.add_record(segment_id, "gains", predicted=list(r), original=list(original_rank_vector),
+                          expn=expn, steps=steps, gains=gains)
     
     assert min(gains)>=0, 'Not all ranks present'
     return gains
@@ -213,7 +231,7 @@ def idcg(gains, k):
     return ideal_dcg
 
 
-def ndgc_err(predicted_rank_vector, original_rank_vector, k=None):
+def ndgc_err(predicted_rank_vector, original_rank_vector, k=None, segment_id=None):
     """
     Calculate the normalize Discounted Cumulative Gain and the Expected Reciprocal Rank on a sentence level
     This follows the definition of U{DCG<http://en.wikipedia.org/wiki/Discounted_cumulative_gain#Cumulative_Gain>} 
@@ -225,6 +243,8 @@ def ndgc_err(predicted_rank_vector, original_rank_vector, k=None):
     @type original_rank_vector: [int, ...]
     @param k: the cut-off for the calculation of the gains. If not specified, the length of the ranking is used
     @type k: int 
+    @param segment_id: the position of the segment, for tracing the calculation of the gains (see L{tracing})
+    @type segment_id: int
     @return: a tuple containing the values for the two metrics
     @rtype: tuple(float,float)
     """
@@ -240,7 +260,7 @@ def ndgc_err(predicted_rank_vector, original_rank_vector, k=None):
     
     #make sure that the lists have the right dimensions 
     assert len(r)==n, 'Expected {} ranks, but got {}.'.format(n,len(r))    
-    gains = _calculate_gains(r, l)
+    gains = _calculate_gains(r, l, segment_id=segment_id)
         
     #ERR calculations
     p = 1.0    
@@ -8,6 +8,7 @@ Created on 18 Dec 2012
 '''
 
 import segment
+from collections import OrderedDict
 from numpy import average
 import numpy as np
 
@@ -42,10 +43,10 @@ def kendall_tau_set(predicted_rank_vectors, original_rank_vectors, **kwargs):
     pairs_overall = 0
     sentences_with_ties = 0
     
-    for predicted_rank_vector, original_rank_vector in zip(predicted_rank_vectors, original_rank_vectors):
+    for segment_id, (predicted_rank_vector, original_rank_vector) in enumerate(zip(predicted_rank_vectors, original_rank_vectors)):
         
         
-        segtau, segprob, concordant_count, discordant_count, all_pairs_count, original_ties, predicted_ties, pairs = segment.kendall_tau(predicted_rank_vector, original_rank_vector, **kwargs)
+        segtau, segprob, concordant_count, discordant_count, all_pairs_count, original_ties, predicted_ties, pairs = segment.kendall_tau(predicted_rank_vector, original_rank_vector, segment_id=segment_id, **kwargs)
         
         if segtau and segprob:
             segtaus.append(segtau)
@@ -109,7 +110,7 @@ def mrr(predicted_rank_vectors, original_rank_vectors, **kwargs):
     return {'mrr' : average(reciprocal_ranks)}
 
 
-def best_predicted_vs_human(predicted_rank_vectors, original_rank_vectors):
+def best_predicted_vs_human(predicted_rank_vectors, original_rank_vectors, **kwargs):
     """
     For each sentence, the item selected as best by our system, may have been ranked lower by the humans. This 
     statistic counts how many times the item predicted as best has fallen into each of the human ranks.
@@ -199,9 +200,9 @@ def avg_ndgc_err(predicted_rank_vectors, original_rank_vectors, **kwargs):
     """
     ndgc_list = []
     err_list = []
-    for predicted_rank_vector, original_rank_vector in zip(predicted_rank_vectors, original_rank_vectors):
+    for segment_id, (predicted_rank_vector, original_rank_vector) in enumerate(zip(predicted_rank_vectors, original_rank_vectors)):
         k = kwargs.setdefault('k', len(predicted_rank_vector))
-        ndgc, err = segment.ndgc_err(predicted_rank_vector, original_rank_vector, k)
+        ndgc, err = segment.ndgc_err(predicted_rank_vector, original_rank_vector, k, segment_id)
         ndgc_list.append(ndgc)
         err_list.append(err)
     avg_ndgc = average(ndgc_list)
@@ -209,9 +210,25 @@ def avg_ndgc_err(predicted_rank_vectors, original_rank_vectors, **kwargs):
     return {'ndgc':avg_ndgc, 'err':avg_err}
 
 
+#the names of the metric functions, as given in the commandline
+METRICS = OrderedDict([("tau", kendall_tau_set),
+                       ("mrr", mrr),
+                       ("bph", best_predicted_vs_human),
+                       ("avg_predicted_ranked", avg_predicted_ranked),
+                       ("ndgc_err", avg_ndgc_err)])
+
+
 def allmetrics(predicted_rank_vectors, original_rank_vectors,  **kwargs):
+    """
+    Calculate several metrics at once. The rest of the keyword arguments are passed to every metric function
+    @keyword metrics: the names of the metrics to be calculated, among the ones in L{METRICS}. By default all of them
+    @type metrics: [str, ...]
+    @return: a dictionary with the name of each metric and its value
+    @rtype: {string, float}
+    """
     stats = {}
-    functions = [kendall_tau_set, mrr, best_predicted_vs_human, avg_predicted_ranked, avg_ndgc_err]
+    metrics = kwargs.pop("metrics", None) or METRICS.keys()
+    functions = [METRICS[name] for name in metrics]
     for function in functions:
         stats.update(function(predicted_rank_vectors, original_rank_vectors, **kwargs))
     
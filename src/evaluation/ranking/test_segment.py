@@ -0,0 +1,60 @@
+'''
+Tests of the segment-level metrics, run from the source directory with python -m unittest evaluation.ranking.test_segment
+
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+'''
+
+import unittest
+from sentence.ranking import Ranking
+from evaluation.ranking import segment, tracing
+
+#pairs of predicted and original rankings, covering ties on both sides and missing original ranks
+RANKINGS = [([1, 2, 3, 4], [1, 2, 3, 4]),
+            ([4, 3, 2, 1], [1, 2, 3, 4]),
+            ([1, 1, 2, 3], [2, 1, 1, 3]),
+            ([2, 1, 3, 3], [1, -1, 2, 2]),
+            ([1, 3, 2, 2, 5], [2, 2, 1, 4, 3])]
+
+#the variants of the calculation, as keyword arguments of the Kendall tau
+OPTIONS = [{},
+           {"exclude_ties": False},
+           {"penalize_predicted_ties": False},
+           {"invert_ranks": True}]
+
+
+class TestTracing(unittest.TestCase):
+
+    def tearDown(self):
+        tracing.disable()
+
+    def _get_results(self, function, **kwargs):
+        return [function(Ranking(predicted), Ranking(original), **dict(kwargs, segment_id=segment_id))
+                for segment_id, (predicted, original) in enumerate(RANKINGS)]
+
+    def test_kendall_tau(self):
+        for options in OPTIONS:
+            untraced = self._get_results(segment.kendall_tau, **options)
+            tracer = tracing.enable()
+            traced = self._get_results(segment.kendall_tau, **options)
+            tracing.disable()
+            self.assertEqual(traced, untraced)
+            for result, record in zip(traced, tracer.get_records(metric="tau")):
+                decisions = [pair["decision"] for pair in record["pairs"]]
+                self.assertEqual(decisions.count("CON"), result.concordant_count)
+                self.assertEqual(decisions.count("DIS"), result.discordant_count)
+                self.assertEqual(len(decisions), result.pairs)
+
+    def test_ndgc_err(self):
+        untraced = self._get_results(segment.ndgc_err)
+        tracer = tracing.enable([1])
+        traced = self._get_results(segment.ndgc_err)
+        self.assertEqual(traced, untraced)
+        records = tracer.get_records(metric="gains")
+        self.assertEqual([record["segment_id"] for record in records], [1])
+        self.assertEqual(sorted(step["gain"] for step in records[0]["steps"]), sorted(records[0]["gains"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
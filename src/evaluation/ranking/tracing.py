@@ -0,0 +1,107 @@
+'''
+Tracing of the segment-level calculations, i.e. the decision (concordant, discordant or ignored)
+for every pair of the Kendall tau and the gain of every rank of the DCG, for selected segments.
+The segments are identified by their position in the list of rankings, starting from 0.
+The metrics check once per segment whether the segment is traced and only then take the traced
+path, so that nothing gets recorded or formatted while tracing is disabled
+
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+'''
+
+import json
+
+#the tracer in use, or None while tracing is disabled
+_tracer = None
+
+
+class Tracer(object):
+    """
+    Collects the records of the traced segments, each one as a dictionary. The records are
+    kept in memory and, if a file is given, also written to it, one JSON object per line
+    @ivar segment_ids: the positions of the traced segments, or None for tracing all of them
+    @type segment_ids: set(int)
+    @ivar records: the records collected so far, in the order they were produced
+    @type records: [dict, ...]
+    """
+
+    def __init__(self, segment_ids = None, outputfile = None):
+        """
+        @param segment_ids: the positions of the segments to be traced, or None for all of them
+        @type segment_ids: [int, ...]
+        @param outputfile: a file where each record gets written as soon as it is complete
+        @type outputfile: file
+        """
+        self.segment_ids = set(segment_ids) if segment_ids is not None else None
+        self.outputfile = outputfile
+        self.records = []
+
+    def is_traced(self, segment_id):
+        return self.segment_ids is None or segment_id in self.segment_ids
+
+    def add_record(self, segment_id, metric, **content):
+        """
+        Store the record of a segment
+        @param segment_id: the position of the segment
+        @type segment_id: int
+        @param metric: the name of the calculation, e.g. tau or gains
+        @type metric: str
+        @param content: the traced values, which should be JSON serializable
+        @return: the record
+        @rtype: dict
+        """
+        record = {"segment_id": segment_id, "metric": metric}
+        record.update(content)
+        self.records.append(record)
+        if self.outputfile is not None:
+            self.outputfile.write(json.dumps(record, sort_keys=True) + "\n")
+        return record
+
+    def get_records(self, segment_id = None, metric = None):
+        """
+        @return: the records, optionally only the ones of the given segment and calculation
+        @rtype: [dict, ...]
+        """
+        return [record for record in self.records
+                if (segment_id is None or record["segment_id"] == segment_id)
+                and (metric is None or record["metric"] == metric)]
+
+
+def enable(segment_ids = None, outputfile = None):
+    """
+    Start tracing the given segments
+    @param segment_ids: the positions of the segments to be traced, or None for all of them
+    @type segment_ids: [int, ...]
+    @param outputfile: a file where the records get written, one JSON object per line
+    @type outputfile: file
+    @return: the tracer that collects the records
+    @rtype: L{Tracer}
+    """
+    global _tracer
+    _tracer = Tracer(segment_ids, outputfile)
+    return _tracer
+
+
+def disable():
+    """
+    Stop tracing
+    @return: the tracer that collected the records, or None if tracing was not enabled
+    @rtype: L{Tracer}
+    """
+    global _tracer
+    tracer = _tracer
+    _tracer = None
+    return tracer
+
+
+def get_tracer(segment_id):
+    """
+    @param segment_id: the position of the segment
+    @type segment_id: int
+    @return: the tracer in use, if the given segment is traced, otherwise None
+    @rtype: L{Tracer}
+    """
+    if _tracer is not None and segment_id is not None and _tracer.is_traced(segment_id):
+        return _tracer
+    return None
@@ -0,0 +1,174 @@
+'''
+An on-disk cache of evaluation results, so that evaluating an unchanged file again
+with the same configuration returns the stored results without reading the file
+
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+'''
+
+import cPickle as pickle
+import hashlib
+import importlib
+import os
+import tempfile
+
+#the modules whose code determines the results. The digest of their source is part of the key,
+#so that results calculated by a different version of the code are not used
+CODE_MODULES = ["sentence.ranking", "evaluation.ranking.segment", "evaluation.ranking.set"]
+#the default location of the cache, unless given by the environment variable RANKEVAL_CACHE
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "rankeval")
+#the default maximum size of the stored results
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+#the size of the blocks of the file read for hashing
+HASH_BLOCK_SIZE = 1 << 20
+
+_SUFFIX = ".result"
+#the digest of the source of the L{CODE_MODULES}, calculated once
+_code_digest = None
+
+
+def hash_file(filename):
+    """
+    @return: a digest of the content of the file
+    @rtype: str
+    """
+    digest = hashlib.sha1()
+    inputfile = open(filename, 'rb')
+    try:
+        while True:
+            data = inputfile.read(HASH_BLOCK_SIZE)
+            if not data:
+                break
+            digest.update(data)
+    finally:
+        inputfile.close()
+    return digest.hexdigest()
+
+
+def get_code_digest():
+    """
+    @return: a digest of the source of the modules that calculate the results, i.e. the L{CODE_MODULES}
+    @rtype: str
+    """
+    global _code_digest
+    if _code_digest is None:
+        digest = hashlib.sha1()
+        for name in CODE_MODULES:
+            #the source, even if the module was loaded from the compiled file
+            filename = os.path.splitext(importlib.import_module(name).__file__)[0] + ".py"
+            digest.update(name)
+            digest.update(hash_file(filename))
+        _code_digest = digest.hexdigest()
+    return _code_digest
+
+
+class ResultCache(object):
+    """
+    Evaluation results stored in a directory, one file for each combination of input content,
+    configuration and code of the metrics. When the total size exceeds the limit, the results used least recently are removed
+    """
+
+    def __init__(self, cache_dir = None, max_size = DEFAULT_MAX_SIZE):
+        """
+        @param cache_dir: the directory where the results are stored. By default the one given by
+        the environment variable RANKEVAL_CACHE, or L{DEFAULT_CACHE_DIR}
+        @type cache_dir: str
+        @param max_size: the maximum total size of the stored results, in bytes
+        @type max_size: int
+        """
+        self.cache_dir = cache_dir or os.environ.get("RANKEVAL_CACHE", DEFAULT_CACHE_DIR)
+        self.max_size = max_size
+
+    def get_key(self, filename, **configuration):
+        """
+        @param filename: the evaluated file
+        @type filename: str
+        @param configuration: everything else that affects the results, e.g. attribute names, metrics and options
+        @return: the key of the results of evaluating the given file with the given configuration
+        @rtype: str
+        """
+        configuration = repr((get_code_digest(), hash_file(filename), sorted(configuration.iteritems())))
+        return hashlib.sha1(configuration).hexdigest()
+
+    def _get_path(self, key):
+        return os.path.join(self.cache_dir, key + _SUFFIX)
+
+    def get(self, key):
+        """
+        @return: the stored results for the key, or None if there are none
+        """
+        path = self._get_path(key)
+        try:
+            resultfile = open(path, 'rb')
+        except IOError:
+            return None
+        try:
+            result = pickle.load(resultfile)
+        except Exception:
+            #e.g. truncated by a full disk
+            return None
+        finally:
+            resultfile.close()
+        #mark as recently used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return result
+
+    def put(self, key, result):
+        """
+        Store the results for the key, removing the least recently used results if needed
+        """
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        #written aside and renamed, so that concurrent jobs never read partial results
+        descriptor, tempfilename = tempfile.mkstemp(suffix=".tmp", dir=self.cache_dir)
+        resultfile = os.fdopen(descriptor, 'wb')
+        try:
+            pickle.dump(result, resultfile, pickle.HIGHEST_PROTOCOL)
+        finally:
+            resultfile.close()
+        os.rename(tempfilename, self._get_path(key))
+        self.evict()
+
+    def _get_entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(_SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue
+            entries.append((status.st_mtime, status.st_size, path))
+        return entries
+
+    def evict(self):
+        """
+        Remove the least recently used results, until their total size is within the limit
+        """
+        entries = sorted(self._get_entries())
+        size = sum([entry_size for mtime, entry_size, path in entries])
+        for mtime, entry_size, path in entries:
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            size -= entry_size
+
+    def clear(self):
+        """
+        Remove all the stored results
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+        for mtime, size, path in self._get_entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,254 @@
+'''
+A long-running evaluation server, which keeps the gold rankings of loaded files in memory,
+so that predicted rankings can be evaluated against them without starting the interpreter,
+importing the metrics or parsing the gold file again. It listens either on a unix socket or
+on a localhost port and speaks JSON over HTTP:
+
+ - POST /load {"name": ..., "filename": ..., "gold_rank_name": ...} reads and pins the gold rankings
+ - POST /evaluate {"name": ..., "predicted": [[rank, ...], ...]} evaluates the given rankings, one list per parallel sentence
+ - POST /evaluate {"name": ..., "filename": ..., "predicted_rank_name": ...} evaluates the rankings of a file
+ - POST /unload {"name": ...} releases the gold rankings
+ - GET /datasets lists the loaded gold rankings
+
+The requests to /evaluate may also contain "options", the keyword arguments of L{allmetrics}.
+Requests are served concurrently, each one in its own thread
+
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+'''
+
+import argparse
+import json
+import os
+import sys
+import threading
+import traceback
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn, UnixStreamServer
+from ranking.set import allmetrics
+from sentence.ranking import Ranking
+from rankeval import read_rankings
+
+DEFAULT_PORT = 8642
+
+
+class EvaluationError(Exception):
+    """
+    An error caused by the request, which is reported to the client
+    """
+    pass
+
+
+class GoldRankings(object):
+    """
+    The gold rankings of a file, pinned in memory
+    @ivar filename: the file they were read from
+    @type filename: str
+    @ivar gold_rank_name: the name of the attribute of the gold rank
+    @type gold_rank_name: str
+    @ivar ranklist: the gold rankings of all parallel sentences
+    @type ranklist: [L{Ranking}, ...]
+    """
+
+    def __init__(self, filename, gold_rank_name):
+        self.filename = filename
+        self.gold_rank_name = gold_rank_name
+        self.ranklist, = read_rankings(filename, gold_rank_name)
+
+    def get_description(self):
+        return {"filename": self.filename,
+                "gold_rank_name": self.gold_rank_name,
+                "sentences": len(self.ranklist),
+                "translations": sum([len(ranking) for ranking in self.ranklist])}
+
+    def evaluate(self, predicted_ranklist, **options):
+        """
+        @param predicted_ranklist: the predicted rankings of all parallel sentences, in the same order as the gold ones
+        @type predicted_ranklist: [L{Ranking}, ...]
+        @param options: the keyword arguments of L{allmetrics}
+        @return: a dictionary with the name of each metric and its value
+        @rtype: {str: float, ...}
+        """
+        if len(predicted_ranklist) != len(self.ranklist):
+            raise EvaluationError("Expected rankings for {} parallel sentences, got {}".format(len(self.ranklist), len(predicted_ranklist)))
+        for index, (predicted_ranking, gold_ranking) in enumerate(zip(predicted_ranklist, self.ranklist)):
+            if len(predicted_ranking) != len(gold_ranking):
+                raise EvaluationError("Parallel sentence {} has {} translations, but {} predicted ranks".format(index, len(gold_ranking), len(predicted_ranking)))
+        return allmetrics(predicted_ranklist, self.ranklist, **options)
+
+
+class EvaluationService(object):
+    """
+    The loaded gold rankings and the operations on them, independent of the transport
+    """
+
+    def __init__(self):
+        self.datasets = {}
+        self._lock = threading.Lock()
+
+    def load(self, name, filename, gold_rank_name = "rank"):
+        #read outside of the lock, so that evaluations continue meanwhile
+        dataset = GoldRankings(filename, gold_rank_name)
+        with self._lock:
+            self.datasets[name] = dataset
+        return dataset.get_description()
+
+    def unload(self, name):
+        with self._lock:
+            if self.datasets.pop(name, None) is None:
+                raise EvaluationError("No gold rankings loaded with the name {}".format(name))
+        return {}
+
+    def get_datasets(self):
+        with self._lock:
+            return dict([(name, dataset.get_description()) for name, dataset in self.datasets.iteritems()])
+
+    def evaluate(self, name, predicted = None, filename = None, predicted_rank_name = None, options = {}):
+        with self._lock:
+            dataset = self.datasets.get(name)
+        if dataset is None:
+            raise EvaluationError("No gold rankings loaded with the name {}".format(name))
+        if predicted is not None:
+            predicted_ranklist = [Ranking(ranking) for ranking in predicted]
+        elif filename and predicted_rank_name:
+            predicted_ranklist, = read_rankings(filename, predicted_rank_name)
+        else:
+            raise EvaluationError("Either the predicted rankings or a filename and a predicted rank name are needed")
+        options = dict([(str(key), value) for key, value in options.iteritems()])
+        return dataset.evaluate(predicted_ranklist, **options)
+
+
+def _to_json(value):
+    #numpy scalars
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError("{} is not JSON serializable".format(repr(value)))
+
+
+class EvaluationRequestHandler(BaseHTTPRequestHandler):
+    """
+    Translates the HTTP requests to calls of the L{EvaluationService} of the server
+    """
+    #keep the connections open between requests
+    protocol_version = "HTTP/1.1"
+
+    def _respond(self, status, content):
+        data = json.dumps(content, default=_to_json)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _call(self, function, arguments = {}):
+        if not isinstance(arguments, dict):
+            self._respond(400, {"error": "The request should be a JSON object"})
+            return
+        try:
+            #json provides unicode keys, which can't be keyword arguments
+            arguments = dict([(str(key), value) for key, value in arguments.iteritems()])
+            self._respond(200, function(**arguments))
+        except KeyError as e:
+            self._respond(400, {"error": "Missing {}".format(e)})
+        except (EvaluationError, TypeError, ValueError, IOError) as e:
+            self._respond(400, {"error": str(e)})
+        except Exception as e:
+            traceback.print_exc()
+            self._respond(500, {"error": str(e)})
+
+    def do_GET(self):
+        service = self.server.service
+        if self.path == "/datasets":
+            self._call(service.get_datasets)
+        else:
+            self._respond(404, {"error": "Unknown path {}".format(self.path)})
+
+    def do_POST(self):
+        service = self.server.service
+        functions = {"/load": service.load,
+                     "/unload": service.unload,
+                     "/evaluate": service.evaluate}
+        function = functions.get(self.path)
+        if function is None:
+            self._respond(404, {"error": "Unknown path {}".format(self.path)})
+            return
+        try:
+            length = int(self.headers.getheader("Content-Length", 0))
+            arguments = json.loads(self.rfile.read(length) or "{}")
+        except ValueError as e:
+            self._respond(400, {"error": "Invalid request: {}".format(e)})
+            return
+        self._call(function, arguments)
+
+    def address_string(self):
+        #unix sockets have no client address
+        if not self.client_address:
+            return self.server.server_address
+        return self.client_address[0]
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            sys.stderr.write("%s - - [%s] %s\n" % (self.address_string(), self.log_date_time_string(), format % args))
+
+
+class ThreadedHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class ThreadedUnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        UnixStreamServer.server_bind(self)
+        #as expected by BaseHTTPRequestHandler
+        self.server_name = "localhost"
+        self.server_port = 0
+
+
+def create_server(port = DEFAULT_PORT, socket_path = None, service = None, verbose = False):
+    """
+    Create an evaluation server, listening on a unix socket if its path is given, or on a localhost port
+    @param port: the port on localhost
+    @type port: int
+    @param socket_path: the path of the unix socket
+    @type socket_path: str
+    @param service: the service that keeps the gold rankings, by default a new one
+    @type service: L{EvaluationService}
+    @param verbose: log every request on the standard error
+    @type verbose: boolean
+    @return: the server, which starts serving by calling serve_forever()
+    """
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = ThreadedUnixHTTPServer(socket_path, EvaluationRequestHandler)
+    else:
+        server = ThreadedHTTPServer(("127.0.0.1", port), EvaluationRequestHandler)
+    server.service = service or EvaluationService()
+    server.verbose = verbose
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve evaluations against gold rankings kept in memory")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="the port to listen on localhost")
+    parser.add_argument("--socket", help="the path of a unix socket to listen on, instead of a port")
+    parser.add_argument("--load", nargs=3, action="append", default=[], metavar=("NAME", "FILENAME", "GOLD_RANK_NAME"),
+                        help="load gold rankings upon start")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    server = create_server(args.port, args.socket, verbose=args.verbose)
+    for name, filename, gold_rank_name in args.load:
+        description = server.service.load(name, filename, gold_rank_name)
+        sys.stderr.write("Loaded {}: {} parallel sentences\n".format(name, description["sentences"]))
+    sys.stderr.write("Listening on {}\n".format(args.socket or "127.0.0.1:{}".format(args.port)))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
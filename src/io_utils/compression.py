@@ -0,0 +1,191 @@
+'''
+Transparent reading and writing of compressed files, based on their extension.
+Compressed input is decompressed in a background thread, ahead of the parser
+
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+'''
+
+import bz2
+import gzip
+import threading
+from Queue import Queue, Empty
+
+try:
+    import lzma
+except ImportError:
+    try:
+        from backports import lzma
+    except ImportError:
+        lzma = None
+
+#size of the blocks read by the background thread
+READ_SIZE = 1 << 16
+#number of blocks that can be read ahead of the consumer
+PREFETCH_BLOCKS = 16
+
+#the extensions of the supported compressed files and the names of their modules
+EXTENSIONS = {".gz": "gzip",
+              ".bz2": "bz2",
+              ".xz": "lzma"}
+
+
+def get_compression(filename):
+    """
+    @return: the name of the compression that applies to the file, based on its extension, or None if uncompressed
+    @rtype: str
+    """
+    for extension, compression in EXTENSIONS.iteritems():
+        if filename.endswith(extension):
+            return compression
+    return None
+
+
+def is_compressed(filename):
+    return get_compression(filename) is not None
+
+
+def _open_compressed(filename, mode, compression):
+    if compression == "gzip":
+        return gzip.GzipFile(filename, mode)
+    elif compression == "bz2":
+        return bz2.BZ2File(filename, mode)
+    elif compression == "lzma":
+        if lzma is None:
+            raise ImportError("Reading or writing xz files requires the lzma module (backports.lzma for python 2)")
+        return lzma.LZMAFile(filename, mode)
+    raise ValueError("Unknown compression: {}".format(compression))
+
+
+def open_input(filename, threaded = True):
+    """
+    Open a file for reading in binary mode, decompressing it if its extension denotes compression
+    @param filename: the name of the file
+    @type filename: str
+    @param threaded: decompress in a background thread, so that decompression overlaps with the processing of the data
+    @type threaded: boolean
+    @return: a file-like object with read and close methods
+    """
+    compression = get_compression(filename)
+    if not compression:
+        return open(filename, 'rb')
+    compressed_file = _open_compressed(filename, 'rb', compression)
+    if threaded:
+        return ThreadedReader(compressed_file)
+    return compressed_file
+
+
+def open_output(filename, compression = None):
+    """
+    Open a file for writing in binary mode, compressing it if requested
+    @param filename: the name of the file
+    @type filename: str
+    @param compression: the compression to be used, as given by L{get_compression}. By default
+    it is inferred by the extension of the file
+    @type compression: str
+    @return: a file-like object with write and close methods
+    """
+    if compression is None:
+        compression = get_compression(filename)
+    if not compression:
+        return open(filename, 'wb')
+    return _open_compressed(filename, 'wb', compression)
+
+
+class ThreadedReader(object):
+    """
+    Reads a file-like object in a background thread, keeping a few blocks ahead of the consumer.
+    Useful for compressed files, as decompression releases the interpreter lock
+    """
+
+    def __init__(self, fileobj, read_size = READ_SIZE, prefetch = PREFETCH_BLOCKS):
+        """
+        @param fileobj: the file to be read
+        @param read_size: the size of the blocks read by the background thread
+        @type read_size: int
+        @param prefetch: the maximum number of blocks read ahead
+        @type prefetch: int
+        """
+        self.fileobj = fileobj
+        self.read_size = read_size
+        self._queue = Queue(prefetch)
+        self._buffer = ""
+        self._finished = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        try:
+            while not self._closed:
+                data = self.fileobj.read(self.read_size)
+                self._queue.put(data)
+                if not data:
+                    return
+        except Exception as e:
+            self._queue.put(e)
+
+    def _next_block(self):
+        if self._finished:
+            return ""
+        data = self._queue.get()
+        if isinstance(data, Exception):
+            self._finished = True
+            raise data
+        if not data:
+            self._finished = True
+        return data
+
+    def read(self, size = -1):
+        """
+        @param size: the number of bytes to be read, or all the rest if negative
+        @type size: int
+        @return: the data, which is shorter than requested only at the end of the file
+        @rtype: str
+        """
+        if size is None or size < 0:
+            blocks = [self._buffer]
+            block = self._next_block()
+            while block:
+                blocks.append(block)
+                block = self._next_block()
+            self._buffer = ""
+            return "".join(blocks)
+
+        if not self._buffer:
+            #the usual case, when reading with the same block size
+            self._buffer = self._next_block()
+        if len(self._buffer) < size:
+            blocks = [self._buffer]
+            available = len(self._buffer)
+            while available < size:
+                block = self._next_block()
+                if not block:
+                    break
+                blocks.append(block)
+                available += len(block)
+            self._buffer = "".join(blocks)
+        data = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return data
+
+    def close(self):
+        """
+        Stop the background thread and close the file
+        """
+        self._closed = True
+        while self._thread.is_alive():
+            try:
+                self._queue.get(timeout=0.1)
+            except Empty:
+                pass
+        self._thread.join()
+        self.fileobj.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
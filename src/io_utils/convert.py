@@ -0,0 +1,97 @@
+'''
+Conversion between the file formats of parallel sentences: JCML, JSON Lines and TSV.
+The format of each file is given by its extension (.jcml, .jsonl or .tsv), optionally
+followed by a compression extension. The parallel sentences are streamed one at a time
+
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+'''
+
+import os
+import sys
+from io_utils.input.iterjcmlreader import IterJcmlReader
+from io_utils.input.jsonlreader import JsonlReader
+from io_utils.input.tsvreader import TsvReader
+from io_utils.sax.saxps2jcml import IncrementalJcml
+from io_utils.output.jsonlwriter import IncrementalJsonl
+from io_utils.output.tsvwriter import IncrementalTsv
+from io_utils.compression import EXTENSIONS
+
+JCML = "jcml"
+JSONL = "jsonl"
+TSV = "tsv"
+
+#the formats per extension
+FORMATS = {".jcml": JCML,
+           ".xml": JCML,
+           ".jsonl": JSONL,
+           ".tsv": TSV}
+
+READERS = {JCML: IterJcmlReader,
+           JSONL: JsonlReader,
+           TSV: TsvReader}
+
+WRITERS = {JCML: IncrementalJcml,
+           JSONL: IncrementalJsonl,
+           TSV: IncrementalTsv}
+
+
+def get_format(filename):
+    """
+    @return: the format of the file, as given by its extension
+    @rtype: str
+    """
+    name, extension = os.path.splitext(filename)
+    if extension in EXTENSIONS:
+        name, extension = os.path.splitext(name)
+    try:
+        return FORMATS[extension]
+    except KeyError:
+        raise ValueError("Unknown format of file {}. Supported extensions: {}".format(filename, ", ".join(sorted(FORMATS))))
+
+
+def get_reader(filename, **kwargs):
+    """
+    @return: an incremental reader for the file, according to its format. The
+    keyword arguments are passed to the reader, e.g. the filters
+    @rtype: L{GenericReader}
+    """
+    return READERS[get_format(filename)](filename, **kwargs)
+
+
+def get_writer(filename):
+    """
+    @return: an incremental writer for the file, according to its format. The writer
+    has the functions add_parallelsentence and close
+    """
+    return WRITERS[get_format(filename)](filename)
+
+
+def convert(input_filename, output_filename, **kwargs):
+    """
+    Convert a file of parallel sentences into another format
+    @param input_filename: the file to be read
+    @type input_filename: str
+    @param output_filename: the file to be written
+    @type output_filename: str
+    @keyword sentence_filter: conditions for the parallel sentences to be kept, see L{AttributeFilter}
+    @keyword target_filter: conditions for the translations to be kept
+    @return: the number of parallel sentences written
+    @rtype: int
+    """
+    writer = get_writer(output_filename)
+    count = 0
+    for parallelsentence in get_reader(input_filename, **kwargs).get_parallelsentences():
+        writer.add_parallelsentence(parallelsentence)
+        count += 1
+    writer.close()
+    return count
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        sys.stderr.write("Commandline options: \npython convert.py <input_filename> <output_filename>\n")
+        sys.exit(1)
+    count = convert(sys.argv[1], sys.argv[2])
+    sys.stderr.write("Converted {} parallel sentences\n".format(count))
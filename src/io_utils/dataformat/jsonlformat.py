@@ -0,0 +1,23 @@
+'''
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+'''
+
+from genericformat import GenericFormat
+
+class JsonlFormat(GenericFormat):
+    '''
+    JSON Lines: one JSON object per line for each parallel sentence, e.g.
+    {"attributes": {...}, "src": [{"text": "...", "attributes": {...}}], "tgt": [...], "ref": [...]}
+    '''
+    TAG = {"attributes" : "attributes",
+                    "text" : "text",
+                    "src" : "src" ,
+                    "tgt" : "tgt" ,
+                    "ref" : "ref" ,
+                    "langsrc" : "langsrc", 
+                    "langtgt" : "langtgt",
+                    "default_langsrc" : "es",
+                    "default_langtgt" : "en",
+                    }
@@ -0,0 +1,28 @@
+'''
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+'''
+
+from genericformat import GenericFormat
+
+class TsvFormat(GenericFormat):
+    '''
+    Tab-separated values, with a header line and one line for each translation. The lines of the 
+    same parallel sentence are consecutive and share the value of the sentence column. The text of 
+    the source, the translation and the reference are in the columns named after them, and each 
+    attribute in a column named after its element and its name, e.g. "sentence:id" or "tgt:rank".
+    Tabs, newlines and backslashes in the values are escaped with a backslash and missing values 
+    are written as \N. A parallel sentence without translations gets a line with a missing translation
+    '''
+    TAG = {"sent" : "sentence",
+                    "src" : "src" ,
+                    "tgt" : "tgt" ,
+                    "ref" : "ref" ,
+                    "separator" : ":",
+                    "missing" : "\\N",
+                    "langsrc" : "langsrc", 
+                    "langtgt" : "langtgt",
+                    "default_langsrc" : "es",
+                    "default_langtgt" : "en",
+                    }
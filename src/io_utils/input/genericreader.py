@@ -63,8 +63,87 @@ class GenericReader:
         """
         raise NotImplementedError( "Should have implemented this" )
 
+
+class AttributeFilter(object):
+    """
+    A predicate on the attributes of an XML element, used by the readers in order to skip 
+    the parallel sentences or the translations that are not needed, before they get built.
+    The conditions are either a function that receives the dictionary of attributes or 
+    a dictionary of conditions per attribute name. Each condition in the dictionary can 
+    be a value, a collection of accepted values or a function that receives the value.
+    Elements lacking any of the attributes in the dictionary are filtered out.
+    """
+    
+    def __init__(self, conditions):
+        """
+        @param conditions: the conditions that the attributes need to fulfill
+        @type conditions: {str: object, ...} or function
+        """
+        if callable(conditions):
+            self.function = conditions
+            self.conditions = []
+            self._key = None
+        else:
+            self.function = None
+            self.conditions = [(name, self._compile_condition(condition)) for name, condition in conditions.iteritems()]
+            self._key = self._get_conditions_key(conditions)
     
+    def _get_conditions_key(self, conditions):
+        key = []
+        for name, condition in sorted(conditions.iteritems()):
+            if callable(condition):
+                return None
+            if isinstance(condition, (set, frozenset, list, tuple)):
+                condition = ("in", frozenset(condition))
+            else:
+                condition = ("==", condition)
+            key.append((name, condition))
+        key = tuple(key)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
     
-   
+    def get_key(self):
+        """
+        @return: a key that identifies the filter by its conditions, so that filters with the same 
+        conditions get the same key, or None if the conditions include functions, which cannot be compared
+        @rtype: tuple
+        """
+        return self._key
+    
+    def _compile_condition(self, condition):
+        if callable(condition):
+            return condition
+        if isinstance(condition, (set, frozenset, list, tuple)):
+            values = frozenset(condition)
+            return lambda value: value in values
+        return lambda value: value == condition
+    
+    def __call__(self, attributes):
+        """
+        @param attributes: the attributes of the element
+        @type attributes: {str: str, ...}
+        @return: whether the element should be kept
+        @rtype: boolean
+        """
+        if self.function:
+            return self.function(attributes)
+        for name, condition in self.conditions:
+            try:
+                if not condition(attributes[name]):
+                    return False
+            except KeyError:
+                return False
+        return True
+
 
-        
\ No newline at end of file
+def get_filter(conditions):
+    """
+    @return: the filter for the given conditions, or None if there are no conditions
+    @rtype: L{AttributeFilter}
+    """
+    if conditions is None or isinstance(conditions, AttributeFilter):
+        return conditions
+    return AttributeFilter(conditions)
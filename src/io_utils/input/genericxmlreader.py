@@ -10,14 +10,14 @@ Created on 15 Οκτ 2010
 
 
 import re
-import math
 import os
 from xml.dom import minidom
 from sentence.parallelsentence import ParallelSentence
 from sentence.sentence import SimpleSentence
 from xml.sax.saxutils import unescape
-from io_utils.input.genericreader import GenericReader
-from io_utils.sax.saxps2jcml import Parallelsentence2Jcml
+from io_utils.input.genericreader import GenericReader, get_filter
+from io_utils.stream.split import split_jcml
+from io_utils.compression import open_input, is_compressed
 
 class GenericXmlReader(GenericReader):
     """
@@ -25,7 +25,7 @@ class GenericXmlReader(GenericReader):
     """
 
     
-    def __init__(self, input_filename, load = True, stringmode = False):
+    def __init__(self, input_filename, load = True, stringmode = False, sentence_filter = None, target_filter = None):
         """
         Constructor. Creates an XML object that handles ranking file data
         @param input_filename: the name of XML file
@@ -33,11 +33,18 @@ class GenericXmlReader(GenericReader):
         @param load: by turning this option to false, the instance will be 
                      initialized without loading everything into memory
         @type load: boolean 
+        @param sentence_filter: conditions on the attributes of the parallel sentences to be read.
+        The rest are skipped before being built. See L{AttributeFilter}
+        @type sentence_filter: {str: object, ...} or function
+        @param target_filter: conditions on the attributes of the target sentences to be kept
+        @type target_filter: {str: object, ...} or function
         """
         
         self.input_filename = input_filename
         self.loaded = load
         self.TAG = self.get_tags()
+        self.sentence_filter = get_filter(sentence_filter)
+        self.target_filter = get_filter(target_filter)
         if load:
             if stringmode:
                 self.load_str(input_filename)
@@ -55,9 +62,17 @@ class GenericXmlReader(GenericReader):
     
     def load(self):
         """
-        Loads the data of the file into memory. It is useful if the Classes has been asked not to load the filename upon initialization
+        Loads the data of the file into memory. It is useful if the Classes has been asked not to load the filename upon initialization.
+        Files compressed with gzip, bz2 or xz are decompressed on the fly, based on their extension
         """
-        self.xmlObject = minidom.parse(self.input_filename)
+        if is_compressed(self.input_filename):
+            xmlfile = open_input(self.input_filename)
+            try:
+                self.xmlObject = minidom.parse(xmlfile)
+            finally:
+                xmlfile.close()
+        else:
+            self.xmlObject = minidom.parse(self.input_filename)
     
     
 #    def get_dataset(self):
@@ -86,34 +101,32 @@ class GenericXmlReader(GenericReader):
 #        
     
     
-    def split_and_write(self, parts, re_split):
+    def split_and_write(self, parts, re_split, mode = "contiguous", key_attributes = ["id"]):
         """
         Convenience function that splits an XML file into parts and writes them directly to the disk
         into .part files with similar filenames. The construction of the resulting filenames defined 
-        by parameters 
+        by parameters. The file is streamed once, without being loaded in memory
         @param parts
         Number of parts to split into 
         @type int 
         @param re_split Regular expression which should define two (bracketed) groups upon the filename. 
         The resulting files will have the part number inserted in the filename between these two parts
+        @param mode: how to distribute the parallel sentences to the parts, see L{split_jcml}
+        @type mode: str
+        @param key_attributes: the attributes whose values define the part, if splitting by hash
+        @type key_attributes: [str, ...]
+        @return: the number of parallel sentences written in each part
+        @rtype: [int, ...]
         """
-        parallelsentences = self.get_parallelsentences()
         inputfilename = os.path.basename(self.input_filename)
-        length = len(parallelsentences)
-        step = int(math.ceil(1.00 * len(parallelsentences) / parts)) #get ceiling to avoid mod
-        partindex = 0 
-        for index in range(0, length, step):
-            partindex += 1
-            start = index
-            end = index + step
-            print start, end
-            try:
-                print inputfilename
-                filename_prefix, filename_suffix = re.findall(re_split, inputfilename)[0]
-                filename = "%s.%2.d.part.%s" % (filename_prefix, partindex, filename_suffix)
-                Parallelsentence2Jcml(parallelsentences[start:end]).write_to_file(filename)
-            except IndexError:
-                print "Please try to not have a dot in the test set name, cause you don't help me with splitting"
+        try:
+            filename_prefix, filename_suffix = re.findall(re_split, inputfilename)[0]
+        except IndexError:
+            print "Please try to not have a dot in the test set name, cause you don't help me with splitting"
+            return []
+        filenames = ["%s.%2.d.part.%s" % (filename_prefix, partindex, filename_suffix) for partindex in range(1, parts + 1)]
+        return split_jcml(self.input_filename, filenames, mode, key_attributes, 
+                          sentence_filter=self.sentence_filter, target_filter=self.target_filter)
 
         
     
@@ -136,7 +149,7 @@ class GenericXmlReader(GenericReader):
         return len(judgedCorpus[0].getElementsByTagName(self.TAG["sent"]))
     
     
-    def get_parallelsentence(self, xml_entry):
+    def get_parallelsentence(self, xml_entry, attributes = None):
         
         srcXMLentries = xml_entry.getElementsByTagName(self.TAG["src"])
         tgtXMLentries = xml_entry.getElementsByTagName(self.TAG["tgt"])
@@ -149,7 +162,14 @@ class GenericXmlReader(GenericReader):
             
         
         #Create a list of SimpleSentence objects out of the object
-        tgt = [self._read_simplesentence(tgtXML) for tgtXML in tgtXMLentries] 
+        if self.target_filter:
+            tgt = []
+            for tgtXML in tgtXMLentries:
+                tgt_attributes = self._read_attributes(tgtXML)
+                if self.target_filter(tgt_attributes):
+                    tgt.append(SimpleSentence(self._read_string(tgtXML), tgt_attributes))
+        else:
+            tgt = [self._read_simplesentence(tgtXML) for tgtXML in tgtXMLentries] 
         
         ref = SimpleSentence()
         try:    
@@ -158,15 +178,8 @@ class GenericXmlReader(GenericReader):
             pass
         
         #Extract the XML features and attach them to the ParallelSentenceObject
-        attributes = self._read_attributes(xml_entry)
-        
-        #TODO: fix this language by getting from other parts of the sentence
-        if not self.TAG["langsrc"]  in attributes:
-            attributes[self.TAG["langsrc"] ] = self.TAG["default_langsrc"] 
-        
-        if not self.TAG["langtgt"]  in attributes:
-            attributes[self.TAG["langtgt"] ] = self.TAG["default_langtgt"] 
-    
+        if attributes is None:
+            attributes = self._read_sentence_attributes(xml_entry)
         
         #create a new Parallesentence with the given content
         curJudgedSentence = ParallelSentence(src, tgt, ref, attributes)
@@ -183,10 +196,28 @@ class GenericXmlReader(GenericReader):
             sentenceList = judgedCorpus[0].getElementsByTagName(self.TAG["sent"])[start:end]
         newssentences = [] 
         for xml_entry in sentenceList:
-            curJudgedSentence = self.get_parallelsentence(xml_entry)
+            attributes = self._read_sentence_attributes(xml_entry)
+            #skip the unwanted parallel sentences before anything else gets read
+            if self.sentence_filter and not self.sentence_filter(attributes):
+                continue
+            curJudgedSentence = self.get_parallelsentence(xml_entry, attributes)
             newssentences.append(curJudgedSentence)
         return newssentences
     
+    def _read_sentence_attributes(self, xml_entry):
+        """
+        @return: the attributes of the parallel sentence, including the default languages if missing
+        """
+        attributes = self._read_attributes(xml_entry)
+        
+        #TODO: fix this language by getting from other parts of the sentence
+        if not self.TAG["langsrc"]  in attributes:
+            attributes[self.TAG["langsrc"] ] = self.TAG["default_langsrc"] 
+        
+        if not self.TAG["langtgt"]  in attributes:
+            attributes[self.TAG["langtgt"] ] = self.TAG["default_langtgt"] 
+        return attributes
+    
     def _read_simplesentence(self, xml_entry):
         return SimpleSentence(self._read_string(xml_entry), self._read_attributes(xml_entry))
     
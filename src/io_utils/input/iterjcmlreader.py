@@ -0,0 +1,226 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+"""
+
+from collections import deque
+from xml.parsers import expat
+from xml.sax.saxutils import unescape
+from sentence.dataset import DataSet
+from sentence.parallelsentence import ParallelSentence
+from sentence.sentence import SimpleSentence
+from sentence.lazysentence import LazySimpleSentence, MappedFile
+from io_utils.input.genericreader import GenericReader, get_filter
+from io_utils.dataformat.jcmlformat import JcmlFormat
+from io_utils.compression import open_input, is_compressed
+
+#size of the blocks fed to the XML parser
+CHUNK_SIZE = 1 << 16
+
+
+class IterJcmlReader(GenericReader):
+    """
+    Reads a JCML file incrementally, providing one parallel sentence at a time, without
+    loading the entire XML structure into memory. The parallel sentences are identical
+    to the ones produced by L{JcmlReader}. Files compressed with gzip, bz2 or xz are
+    decompressed on the fly, based on their extension
+    """
+
+    def __init__(self, input_filename, load = True, xmlformat = JcmlFormat, sentence_filter = None, target_filter = None, lazy_text = False):
+        """
+        @param input_filename: the name of the JCML file
+        @type input_filename: string
+        @param load: kept for compatibility with the other readers. Nothing is loaded upon initialization
+        @type load: boolean
+        @param xmlformat: the format class that defines the XML tags
+        @type xmlformat: L{GenericFormat}
+        @param sentence_filter: conditions on the attributes of the parallel sentences to be read.
+        The contents of the rest are skipped while parsing. See L{AttributeFilter}
+        @type sentence_filter: {str: object, ...} or function
+        @param target_filter: conditions on the attributes of the target sentences to be kept
+        @type target_filter: {str: object, ...} or function
+        @param lazy_text: instead of the strings of the sentences, keep only their position
+        in the file, which is memory-mapped and read when a string is needed. See L{LazySimpleSentence}.
+        Compressed files can't be mapped, so their strings are always read
+        @type lazy_text: boolean
+        """
+        self.TAG = xmlformat.TAG
+        self.input_filename = input_filename
+        self.loaded = load
+        self.sentence_filter = get_filter(sentence_filter)
+        self.target_filter = get_filter(target_filter)
+        self.lazy_text = lazy_text
+
+    def load(self):
+        pass
+
+    def unload(self):
+        pass
+
+    def get_dataset(self):
+        return DataSet(list(self.get_parallelsentences()))
+
+    def get_parallelsentences(self):
+        """
+        Iterate over the parallel sentences of the file, as soon as each one of them has been parsed
+        @return: an iterator over the parallel sentences
+        @rtype: iter(L{ParallelSentence})
+        """
+        if self.lazy_text and not is_compressed(self.input_filename):
+            source = MappedFile(self.input_filename)
+        else:
+            source = None
+        handler = _JcmlHandler(self.TAG, self.sentence_filter, self.target_filter, source)
+        parser = handler.create_parser()
+        xmlfile = open_input(self.input_filename)
+        try:
+            while True:
+                data = xmlfile.read(CHUNK_SIZE)
+                parser.Parse(data, not data)
+                parallelsentences = handler.parallelsentences
+                while parallelsentences:
+                    yield parallelsentences.popleft()
+                if not data:
+                    break
+        finally:
+            xmlfile.close()
+
+    def __iter__(self):
+        return self.get_parallelsentences()
+
+
+class _JcmlHandler(object):
+    """
+    Expat callbacks that build parallel sentences out of the judged sentence elements
+    and queue them, until the reader hands them out. Elements that don't pass the
+    filters are ignored as soon as their start tag has been read. If a source file is given,
+    the text of the sentences is not collected, but only its position in the file
+    """
+
+    def __init__(self, TAG, sentence_filter = None, target_filter = None, source = None):
+        self.TAG = TAG
+        self.sentence_filter = sentence_filter
+        self.target_filter = target_filter
+        self.source = source
+        self.parser = None
+        self.text_start = None
+        self.skipping = False
+        self.sentence_tags = set([TAG["src"], TAG["tgt"], TAG["ref"]])
+        self.parallelsentences = deque()
+        self.attributes = None
+        self.sentence_attributes = None
+        self.text = None
+        self.src = []
+        self.tgt = []
+        self.ref = []
+
+    def create_parser(self):
+        parser = expat.ParserCreate()
+        parser.StartElementHandler = self.start_element
+        parser.EndElementHandler = self.end_element
+        if self.source:
+            #unbuffered, so that the byte index points at the beginning of each piece of text
+            parser.CharacterDataHandler = self.mark_text
+            parser.StartCdataSectionHandler = self.mark_text
+            parser.XmlDeclHandler = self.xml_declaration
+        else:
+            parser.buffer_text = True
+            parser.CharacterDataHandler = self.characters
+        self.parser = parser
+        return parser
+
+    def xml_declaration(self, version, encoding, standalone):
+        if encoding and encoding.lower().replace("-", "") != "utf8":
+            self.source.encoding = encoding
+
+    def mark_text(self, data = None):
+        if self.text is not None and self.text_start is None:
+            self.text_start = self.parser.CurrentByteIndex
+
+    def start_element(self, name, attributes):
+        if self.skipping:
+            return
+        if name == self.TAG["sent"]:
+            attributes = get_sentence_attributes(self.TAG, attributes)
+            if self.sentence_filter and not self.sentence_filter(attributes):
+                self.skipping = True
+                return
+            self.attributes = attributes
+            self.src = []
+            self.tgt = []
+            self.ref = []
+        elif name in self.sentence_tags and self.attributes is not None:
+            sentence_attributes = _unescape_attributes(attributes)
+            if name == self.TAG["tgt"] and self.target_filter and not self.target_filter(sentence_attributes):
+                return
+            self.sentence_attributes = sentence_attributes
+            self.text = []
+
+    def characters(self, data):
+        if self.text is not None:
+            self.text.append(data)
+
+    def end_element(self, name):
+        if self.skipping:
+            if name == self.TAG["sent"]:
+                self.skipping = False
+            return
+        if self.text is not None and name in self.sentence_tags:
+            if not self.source:
+                simplesentence = SimpleSentence(unescape(u"".join(self.text).strip()), self.sentence_attributes)
+            elif self.text_start is not None:
+                length = self.parser.CurrentByteIndex - self.text_start
+                simplesentence = LazySimpleSentence(self.source, self.text_start, length, self.sentence_attributes)
+                self.text_start = None
+            else:
+                simplesentence = SimpleSentence(u"", self.sentence_attributes)
+            if name == self.TAG["src"]:
+                self.src.append(simplesentence)
+            elif name == self.TAG["tgt"]:
+                self.tgt.append(simplesentence)
+            else:
+                self.ref.append(simplesentence)
+            self.text = None
+            self.sentence_attributes = None
+        elif name == self.TAG["sent"]:
+            self.parallelsentences.append(self.build_parallelsentence())
+            self.attributes = None
+
+    def build_parallelsentence(self):
+        if len(self.src) == 1:
+            src = self.src[0]
+        elif self.src:
+            src = self.src
+        else:
+            src = None
+
+        if self.ref:
+            ref = self.ref[0]
+        else:
+            ref = SimpleSentence()
+
+        return ParallelSentence(src, self.tgt, ref, self.attributes)
+
+
+def _unescape_attributes(attributes):
+    return dict([(key, unescape(value)) for key, value in attributes.iteritems()])
+
+
+def get_sentence_attributes(TAG, attributes):
+    """
+    @param attributes: the attributes of a judged sentence element, as given by expat
+    @type attributes: {str: str, ...}
+    @return: the attributes of the parallel sentence, as given by the readers
+    @rtype: {str: str, ...}
+    """
+    attributes = _unescape_attributes(attributes)
+    #TODO: fix this language by getting from other parts of the sentence
+    if not TAG["langsrc"] in attributes:
+        attributes[TAG["langsrc"]] = TAG["default_langsrc"]
+    if not TAG["langtgt"] in attributes:
+        attributes[TAG["langtgt"]] = TAG["default_langtgt"]
+    return attributes
@@ -0,0 +1,167 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+"""
+
+import json
+from sentence.dataset import DataSet
+from sentence.parallelsentence import ParallelSentence
+from sentence.sentence import SimpleSentence
+from io_utils.input.genericreader import GenericReader, get_filter
+from io_utils.dataformat.jsonlformat import JsonlFormat
+from io_utils.compression import open_input
+from io_utils.stream.pool import imap_ordered, batches
+
+#the number of lines parsed together by each worker process
+BATCH_LINES = 1000
+
+
+class JsonlReader(GenericReader):
+    """
+    Reads a JSON Lines file incrementally, providing one parallel sentence for every line.
+    The parallel sentences are the same as the ones that L{IterJcmlReader} would provide for
+    the same data. Files compressed with gzip, bz2 or xz are decompressed on the fly
+    """
+
+    def __init__(self, input_filename, load = True, dataformat = JsonlFormat, sentence_filter = None, target_filter = None, processes = 1):
+        """
+        @param input_filename: the name of the JSON Lines file
+        @type input_filename: string
+        @param load: kept for compatibility with the other readers. Nothing is loaded upon initialization
+        @type load: boolean
+        @param dataformat: the format class that defines the names of the fields
+        @type dataformat: L{GenericFormat}
+        @param sentence_filter: conditions on the attributes of the parallel sentences to be read, see L{AttributeFilter}
+        @type sentence_filter: {str: object, ...} or function
+        @param target_filter: conditions on the attributes of the target sentences to be kept
+        @type target_filter: {str: object, ...} or function
+        @param processes: the number of worker processes that parse the lines. The filters are
+        then applied after the parallel sentences have been built
+        @type processes: int
+        """
+        self.TAG = dataformat.TAG
+        self.input_filename = input_filename
+        self.loaded = load
+        self.sentence_filter = get_filter(sentence_filter)
+        self.target_filter = get_filter(target_filter)
+        self.processes = processes
+
+    def load(self):
+        pass
+
+    def unload(self):
+        pass
+
+    def get_dataset(self):
+        return DataSet(list(self.get_parallelsentences()))
+
+    def get_parallelsentences(self):
+        """
+        Iterate over the parallel sentences of the file, in the order of the lines
+        @return: an iterator over the parallel sentences
+        @rtype: iter(L{ParallelSentence})
+        """
+        inputfile = open_input(self.input_filename)
+        try:
+            if self.processes <= 1:
+                for line in _iter_lines(inputfile):
+                    parallelsentence = parse_parallelsentence(self.TAG, line, self.sentence_filter, self.target_filter)
+                    if parallelsentence:
+                        yield parallelsentence
+                return
+
+            tasks = ((self.TAG, batch) for batch in batches(_iter_lines(inputfile), BATCH_LINES))
+            for parallelsentences in imap_ordered(_parse_batch, tasks, self.processes, 2 * self.processes):
+                for parallelsentence in parallelsentences:
+                    parallelsentence = _filter_parallelsentence(parallelsentence, self.sentence_filter, self.target_filter)
+                    if parallelsentence:
+                        yield parallelsentence
+        finally:
+            inputfile.close()
+
+    def __iter__(self):
+        return self.get_parallelsentences()
+
+
+def _iter_lines(inputfile):
+    """
+    Iterate over the non-empty lines of a file-like object that may only provide read()
+    """
+    remainder = ""
+    while True:
+        data = inputfile.read(1 << 16)
+        if not data:
+            break
+        lines = (remainder + data).split("\n")
+        remainder = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield line
+    if remainder.strip():
+        yield remainder
+
+
+def _get_simplesentence(TAG, entry):
+    #the attributes have just been parsed, so they don't need to be copied
+    return SimpleSentence(entry.get(TAG["text"], u""), entry.get(TAG["attributes"], {}), copy_attributes=False)
+
+
+def parse_parallelsentence(TAG, line, sentence_filter = None, target_filter = None):
+    """
+    Build the parallel sentence out of one line of a JSON Lines file
+    @param line: the JSON object of the parallel sentence
+    @type line: str
+    @param sentence_filter: conditions on the attributes of the parallel sentence, see L{AttributeFilter}
+    @type sentence_filter: L{AttributeFilter}
+    @param target_filter: conditions on the attributes of the target sentences to be kept
+    @type target_filter: L{AttributeFilter}
+    @return: the parallel sentence, or None if it doesn't pass the filter
+    @rtype: L{ParallelSentence}
+    """
+    entry = json.loads(line)
+    attributes = entry.get(TAG["attributes"], {})
+    #same defaults as the XML readers
+    if not TAG["langsrc"] in attributes:
+        attributes[TAG["langsrc"]] = TAG["default_langsrc"]
+    if not TAG["langtgt"] in attributes:
+        attributes[TAG["langtgt"]] = TAG["default_langtgt"]
+    if sentence_filter and not sentence_filter(attributes):
+        return None
+
+    sources = [_get_simplesentence(TAG, src) for src in entry.get(TAG["src"], [])]
+    if len(sources) == 1:
+        src = sources[0]
+    elif sources:
+        src = sources
+    else:
+        src = None
+
+    targets = entry.get(TAG["tgt"], [])
+    if target_filter:
+        targets = [tgt for tgt in targets if target_filter(tgt.get(TAG["attributes"], {}))]
+    tgt = [_get_simplesentence(TAG, tgt) for tgt in targets]
+
+    references = entry.get(TAG["ref"])
+    if references:
+        ref = _get_simplesentence(TAG, references[0])
+    else:
+        ref = SimpleSentence()
+
+    return ParallelSentence(src, tgt, ref, attributes, copy_attributes=False)
+
+
+def _filter_parallelsentence(parallelsentence, sentence_filter, target_filter):
+    if sentence_filter and not sentence_filter(parallelsentence.get_attributes()):
+        return None
+    if target_filter:
+        parallelsentence.tgt = [tgt for tgt in parallelsentence.get_translations() if target_filter(tgt.get_attributes())]
+    return parallelsentence
+
+
+def _parse_batch(task):
+    TAG, lines = task
+    return [parse_parallelsentence(TAG, line) for line in lines]
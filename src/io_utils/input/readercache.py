@@ -0,0 +1,214 @@
+'''
+An in-process cache of the parallel sentences read from files, so that reading the same
+unchanged file again with the same options doesn't parse it again. The parallel sentences
+are kept pickled, so every caller gets its own copy and cannot alter the cached ones
+
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+'''
+
+import cPickle as pickle
+import gc
+import os
+import threading
+from collections import OrderedDict
+from sentence.dataset import DataSet
+from io_utils.input.genericreader import AttributeFilter
+
+#the default amount of memory occupied by the cached, pickled parallel sentences
+DEFAULT_MEMORY_LIMIT = 512 * 1024 * 1024
+
+
+def _get_options_key(value):
+    """
+    @return: a key that identifies the value of an option of a reader, or None if the value
+    cannot be compared by its content, e.g. because it contains functions
+    """
+    if value is None or isinstance(value, (basestring, int, long, float, bool)):
+        return value
+    if isinstance(value, AttributeFilter):
+        key = value.get_key()
+        return None if key is None else ("AttributeFilter", key)
+    if isinstance(value, dict):
+        items = [(name, _get_options_key(item)) for name, item in sorted(value.iteritems())]
+        if any([item is None and value[name] is not None for name, item in items]):
+            return None
+        return ("dict", tuple(items))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_get_options_key(item) for item in value]
+        if any([key is None and item is not None for key, item in zip(items, value)]):
+            return None
+        if isinstance(value, (set, frozenset)):
+            return ("set", frozenset(items))
+        return ("list", tuple(items))
+    #functions and other objects that are only compared by their identity
+    return None
+
+
+def _loads(data):
+    """
+    Unpickle the parallel sentences with the garbage collector paused, as it would otherwise
+    run repeatedly while the many new objects get created, without anything to collect
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return pickle.loads(data)
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class ReaderCache(object):
+    """
+    A least-recently-used cache of the parallel sentences of files. The entries are identified
+    by the absolute path, the modification time and the size of the file, the reader class and
+    the options of the reader, so that entries of files that have changed are never used
+    @ivar memory_limit: the maximum total size of the pickled parallel sentences, in bytes
+    @type memory_limit: int
+    @ivar hits: how many times the parallel sentences were found in the cache
+    @type hits: int
+    @ivar misses: how many times the file had to be read
+    @type misses: int
+    @ivar evictions: how many entries were removed in order to stay within the memory limit
+    @type evictions: int
+    """
+
+    def __init__(self, memory_limit = DEFAULT_MEMORY_LIMIT):
+        self.memory_limit = memory_limit
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_key(self, filename, reader_class, options):
+        """
+        @return: the key of the entry, or None if the options cannot be compared by their content,
+        in which case the file is read without the cache
+        """
+        options = _get_options_key(options)
+        if options is None:
+            return None
+        path = os.path.abspath(filename)
+        status = os.stat(path)
+        return (path, status.st_mtime, status.st_size, reader_class.__module__, reader_class.__name__, options)
+
+    def get_parallelsentences(self, filename, reader_class = None, **options):
+        """
+        Get the parallel sentences of a file, from the cache if possible
+        @param filename: the name of the file
+        @type filename: str
+        @param reader_class: the reader to be used, by default the one for the format of the file (see L{get_reader})
+        @type reader_class: class
+        @param options: the keyword arguments of the reader, e.g. the filters. Files read with 
+        filters that contain functions are not cached, as such filters cannot be told apart
+        @return: a new copy of the parallel sentences
+        @rtype: [L{ParallelSentence}, ...]
+        """
+        if reader_class is None:
+            from io_utils.convert import READERS, get_format
+            reader_class = READERS[get_format(filename)]
+        key = self._get_key(filename, reader_class, options)
+        if key is None:
+            with self._lock:
+                self.misses += 1
+            return list(reader_class(filename, **options).get_parallelsentences())
+
+        with self._lock:
+            data = self._entries.pop(key, None)
+            if data is not None:
+                #most recently used go to the end
+                self._entries[key] = data
+                self.hits += 1
+            else:
+                self.misses += 1
+        if data is not None:
+            return _loads(data)
+
+        parallelsentences = list(reader_class(filename, **options).get_parallelsentences())
+        data = pickle.dumps(parallelsentences, pickle.HIGHEST_PROTOCOL)
+        self._add(key, data)
+        return parallelsentences
+
+    def get_dataset(self, filename, reader_class = None, **options):
+        """
+        Get the contents of a file as a data set, from the cache if possible. See L{get_parallelsentences}
+        @return: a data set with a new copy of the parallel sentences
+        @rtype: L{DataSet}
+        """
+        return DataSet(self.get_parallelsentences(filename, reader_class, **options))
+
+    def _add(self, key, data):
+        if len(data) > self.memory_limit:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            #older versions of the same file won't be asked again
+            for stale_key in [cached_key for cached_key in self._entries if cached_key[0] == key[0] and cached_key[1:3] != key[1:3]]:
+                self.size -= len(self._entries.pop(stale_key))
+            while self._entries and self.size + len(data) > self.memory_limit:
+                stale_key, stale_data = self._entries.popitem(last=False)
+                self.size -= len(stale_data)
+                self.evictions += 1
+            self._entries[key] = data
+            self.size += len(data)
+
+    def invalidate(self, filename):
+        """
+        Remove all the entries of the given file
+        @type filename: str
+        """
+        path = os.path.abspath(filename)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == path]:
+                self.size -= len(self._entries.pop(key))
+
+    def clear(self):
+        """
+        Remove all entries and reset the statistics
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def get_statistics(self):
+        """
+        @return: the number of hits, misses and evictions, the number of entries, their size and the memory limit
+        @rtype: {str: int, ...}
+        """
+        with self._lock:
+            return {"hits": self.hits,
+                    "misses": self.misses,
+                    "evictions": self.evictions,
+                    "entries": len(self._entries),
+                    "size": self.size,
+                    "memory_limit": self.memory_limit}
+
+
+#the cache shared within the process
+_cache = ReaderCache()
+
+
+def get_cache():
+    """
+    @return: the reader cache shared within the process
+    @rtype: L{ReaderCache}
+    """
+    return _cache
+
+
+def read_dataset(filename, reader_class = None, **options):
+    """
+    Read a file into a data set, using the reader cache shared within the process.
+    See L{ReaderCache.get_parallelsentences}
+    @rtype: L{DataSet}
+    """
+    return _cache.get_dataset(filename, reader_class, **options)
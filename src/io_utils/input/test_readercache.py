@@ -0,0 +1,67 @@
+'''
+Tests of the reader cache, run from the source directory with python -m unittest io_utils.input.test_readercache
+
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+'''
+
+import os
+import tempfile
+import unittest
+from io_utils.input.genericreader import AttributeFilter
+from io_utils.input.jcmlreader import JcmlReader
+from io_utils.input.readercache import ReaderCache
+
+JCML = '''<?xml version="1.0" encoding="utf-8"?>
+<jcml>
+    <judgedsentence id="0" langsrc="de" langtgt="en">
+        <src>Quelle 0</src>
+        <tgt system="a" rank="1">translation 0</tgt>
+    </judgedsentence>
+    <judgedsentence id="1" langsrc="de" langtgt="en">
+        <src>Quelle 1</src>
+        <tgt system="a" rank="1">translation 1</tgt>
+    </judgedsentence>
+</jcml>
+'''
+
+
+class TestReaderCache(unittest.TestCase):
+
+    def setUp(self):
+        handle, self.filename = tempfile.mkstemp(suffix=".jcml")
+        os.write(handle, JCML)
+        os.close(handle)
+        self.cache = ReaderCache()
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def _get_ids(self, **options):
+        parallelsentences = self.cache.get_parallelsentences(self.filename, JcmlReader, **options)
+        return [parallelsentence.get_attribute("id") for parallelsentence in parallelsentences]
+
+    def test_different_filters(self):
+        for i in range(3):
+            self.assertEqual(self._get_ids(sentence_filter=AttributeFilter({"id": "0"})), ["0"])
+            self.assertEqual(self._get_ids(sentence_filter=AttributeFilter({"id": "1"})), ["1"])
+        self.assertEqual(self.cache.misses, 2)
+        self.assertEqual(self.cache.hits, 4)
+
+    def test_equal_filters(self):
+        self._get_ids(sentence_filter=AttributeFilter({"id": ["0", "1"]}))
+        self.assertEqual(self._get_ids(sentence_filter={"id": ("1", "0")}), ["0", "1"])
+        self.assertEqual(self._get_ids(sentence_filter=AttributeFilter({"id": set(["1", "0"])})), ["0", "1"])
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_function_filters(self):
+        for i in range(2):
+            self.assertEqual(self._get_ids(sentence_filter=lambda attributes: attributes["id"] == str(i)), [str(i)])
+            self.assertEqual(self._get_ids(sentence_filter=AttributeFilter({"id": lambda value: value == str(i)})), [str(i)])
+        self.assertEqual(self.cache.hits, 0)
+        self.assertEqual(self.cache.get_statistics()["entries"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,208 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+"""
+
+import re
+from itertools import groupby
+from sentence.dataset import DataSet
+from sentence.parallelsentence import ParallelSentence
+from sentence.sentence import SimpleSentence
+from io_utils.input.genericreader import GenericReader, get_filter
+from io_utils.input.jsonlreader import _iter_lines, _filter_parallelsentence
+from io_utils.dataformat.tsvformat import TsvFormat
+from io_utils.compression import open_input
+from io_utils.stream.pool import imap_ordered, batches
+
+#the number of parallel sentences parsed together by each worker process
+BATCH_SENTENCES = 1000
+
+_escaped_RE = re.compile(r"\\(.)")
+_unescaped_chars = {"t": u"\t", "n": u"\n", "r": u"\r", "\\": u"\\"}
+
+
+def unescape_value(value):
+    """
+    @return: the value of a cell, after resolving the backslash escapes
+    @rtype: unicode
+    """
+    if "\\" not in value:
+        return value
+    return _escaped_RE.sub(lambda match: _unescaped_chars.get(match.group(1), match.group(1)), value)
+
+
+class TsvLayout(object):
+    """
+    The positions of the columns of a TSV file, as given by its header
+    @ivar size: the number of columns
+    @type size: int
+    @ivar text: the position of the text column of each element
+    @type text: {str: int, ...}
+    @ivar attributes: the position and the attribute name of the attribute columns of each element
+    @type attributes: {str: [(int, str), ...], ...}
+    """
+
+    def __init__(self, TAG, header):
+        """
+        @param header: the names of the columns
+        @type header: [str, ...]
+        """
+        self.size = len(header)
+        self.text = {}
+        self.attributes = dict([(TAG[element], []) for element in ("sent", "src", "tgt", "ref")])
+        for position, column in enumerate(header):
+            element, separator, name = column.partition(TAG["separator"])
+            if not separator:
+                self.text[element] = position
+            elif element in self.attributes:
+                self.attributes[element].append((position, unescape_value(name)))
+            else:
+                raise ValueError("Unknown column in TSV header: {}".format(column))
+
+
+class TsvReader(GenericReader):
+    """
+    Reads a TSV file incrementally, providing one parallel sentence for every group of consecutive
+    lines with the same sentence column. The parallel sentences are the same as the ones that
+    L{IterJcmlReader} would provide for the same data. Files compressed with gzip, bz2 or xz are
+    decompressed on the fly
+    """
+
+    def __init__(self, input_filename, load = True, dataformat = TsvFormat, sentence_filter = None, target_filter = None, processes = 1):
+        """
+        @param input_filename: the name of the TSV file
+        @type input_filename: string
+        @param load: kept for compatibility with the other readers. Nothing is loaded upon initialization
+        @type load: boolean
+        @param dataformat: the format class that defines the names of the columns
+        @type dataformat: L{GenericFormat}
+        @param sentence_filter: conditions on the attributes of the parallel sentences to be read, see L{AttributeFilter}
+        @type sentence_filter: {str: object, ...} or function
+        @param target_filter: conditions on the attributes of the target sentences to be kept
+        @type target_filter: {str: object, ...} or function
+        @param processes: the number of worker processes that parse the lines. The filters are
+        then applied after the parallel sentences have been built
+        @type processes: int
+        """
+        self.TAG = dataformat.TAG
+        self.input_filename = input_filename
+        self.loaded = load
+        self.sentence_filter = get_filter(sentence_filter)
+        self.target_filter = get_filter(target_filter)
+        self.processes = processes
+
+    def load(self):
+        pass
+
+    def unload(self):
+        pass
+
+    def get_dataset(self):
+        return DataSet(list(self.get_parallelsentences()))
+
+    def get_parallelsentences(self):
+        """
+        Iterate over the parallel sentences of the file, in the order of the lines
+        @return: an iterator over the parallel sentences
+        @rtype: iter(L{ParallelSentence})
+        """
+        inputfile = open_input(self.input_filename)
+        try:
+            lines = _iter_lines(inputfile)
+            try:
+                header = lines.next().rstrip("\r").decode("utf-8").split("\t")
+            except StopIteration:
+                return
+            layout = TsvLayout(self.TAG, header)
+            groups = (list(rows) for key, rows in groupby(lines, _get_key))
+
+            if self.processes <= 1:
+                for rows in groups:
+                    parallelsentence = parse_parallelsentence(self.TAG, layout, rows, self.sentence_filter, self.target_filter)
+                    if parallelsentence:
+                        yield parallelsentence
+                return
+
+            tasks = ((self.TAG, layout, batch) for batch in batches(groups, BATCH_SENTENCES))
+            for parallelsentences in imap_ordered(_parse_batch, tasks, self.processes, 2 * self.processes):
+                for parallelsentence in parallelsentences:
+                    parallelsentence = _filter_parallelsentence(parallelsentence, self.sentence_filter, self.target_filter)
+                    if parallelsentence:
+                        yield parallelsentence
+        finally:
+            inputfile.close()
+
+    def __iter__(self):
+        return self.get_parallelsentences()
+
+
+def _get_key(line):
+    return line[:line.find("\t")]
+
+
+def _get_attributes(cells, columns, missing):
+    return dict([(name, unescape_value(cells[position])) for position, name in columns if cells[position] != missing])
+
+
+def _get_simplesentence(TAG, layout, cells, element):
+    """
+    @return: the simple sentence of the given element, or None if its text is missing
+    @rtype: L{SimpleSentence}
+    """
+    missing = TAG["missing"]
+    position = layout.text.get(element)
+    if position is None or cells[position] == missing:
+        return None
+    #the attributes have just been parsed, so they don't need to be copied
+    return SimpleSentence(unescape_value(cells[position]), _get_attributes(cells, layout.attributes[element], missing), copy_attributes=False)
+
+
+def parse_parallelsentence(TAG, layout, rows, sentence_filter = None, target_filter = None):
+    """
+    Build the parallel sentence out of its lines in a TSV file
+    @param layout: the columns of the file
+    @type layout: L{TsvLayout}
+    @param rows: the lines of the parallel sentence
+    @type rows: [str, ...]
+    @param sentence_filter: conditions on the attributes of the parallel sentence, see L{AttributeFilter}
+    @type sentence_filter: L{AttributeFilter}
+    @param target_filter: conditions on the attributes of the target sentences to be kept
+    @type target_filter: L{AttributeFilter}
+    @return: the parallel sentence, or None if it doesn't pass the filter
+    @rtype: L{ParallelSentence}
+    """
+    missing = TAG["missing"]
+    rows = [row.rstrip("\r").decode("utf-8").split("\t") for row in rows]
+    for cells in rows:
+        if len(cells) < layout.size:
+            #the columns that were added after the line had been written
+            cells.extend([missing] * (layout.size - len(cells)))
+    first = rows[0]
+
+    attributes = _get_attributes(first, layout.attributes[TAG["sent"]], missing)
+    #same defaults as the XML readers
+    if not TAG["langsrc"] in attributes:
+        attributes[TAG["langsrc"]] = TAG["default_langsrc"]
+    if not TAG["langtgt"] in attributes:
+        attributes[TAG["langtgt"]] = TAG["default_langtgt"]
+    if sentence_filter and not sentence_filter(attributes):
+        return None
+
+    src = _get_simplesentence(TAG, layout, first, TAG["src"])
+    tgt = []
+    for cells in rows:
+        simplesentence = _get_simplesentence(TAG, layout, cells, TAG["tgt"])
+        if simplesentence and (not target_filter or target_filter(simplesentence.get_attributes())):
+            tgt.append(simplesentence)
+    ref = _get_simplesentence(TAG, layout, first, TAG["ref"]) or SimpleSentence()
+
+    return ParallelSentence(src, tgt, ref, attributes, copy_attributes=False)
+
+
+def _parse_batch(task):
+    TAG, layout, groups = task
+    return [parse_parallelsentence(TAG, layout, rows) for rows in groups]
@@ -0,0 +1,94 @@
+'''
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+'''
+
+import json
+import shutil
+import tempfile
+from sentence.sentence import SimpleSentence
+from io_utils.dataformat.jsonlformat import JsonlFormat
+from io_utils.compression import open_output, get_compression
+
+#the size of the serialized data that gets collected before being written on the file
+WRITE_BUFFER_SIZE = 1 << 20
+
+
+def _get_attributes(attributes):
+    #as the XML writers, keep only string values
+    return dict([(name, value if isinstance(value, basestring) else unicode(value)) for name, value in attributes.iteritems()])
+
+
+def _get_entry(TAG, simplesentence):
+    return {TAG["text"]: simplesentence.get_string(), TAG["attributes"]: _get_attributes(simplesentence.get_attributes())}
+
+
+def serialize_parallelsentence(TAG, parallelsentence):
+    """
+    Serialize one parallel sentence as a line of JSON Lines
+    @return: the utf-8 encoded line, including the newline
+    @rtype: str
+    """
+    src = parallelsentence.get_source()
+    if isinstance(src, SimpleSentence):
+        sources = [_get_entry(TAG, src)]
+    elif isinstance(src, (list, tuple)):
+        sources = [_get_entry(TAG, simplesentence) for simplesentence in src]
+    else:
+        sources = []
+
+    ref = parallelsentence.get_reference()
+    if ref and ref.get_string() != "":
+        references = [_get_entry(TAG, ref)]
+    else:
+        references = []
+
+    entry = {TAG["attributes"]: _get_attributes(parallelsentence.get_attributes()),
+             TAG["src"]: sources,
+             TAG["tgt"]: [_get_entry(TAG, tgt) for tgt in parallelsentence.get_translations()],
+             TAG["ref"]: references}
+    #escaping non-ascii characters is done by the C encoder, so it is faster than writing them as they are
+    return json.dumps(entry, separators=(",", ":")) + "\n"
+
+
+class IncrementalJsonl(object):
+    """
+    Write parallel sentences incrementally on a JSON Lines file, one line each, without keeping
+    them in memory. Don't forget the close function. If the filename ends with .gz, .bz2 or .xz,
+    the file gets compressed accordingly
+    """
+    def __init__(self, filename, dataformat=JsonlFormat):
+        self.TAG = dataformat.TAG
+        self.filename = filename
+        tempfile_object = tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix='.jsonl', prefix='tmp_', dir='.')
+        self.tempfilename = tempfile_object.name
+        tempfile_object.close()
+        self.file = open_output(self.tempfilename, get_compression(filename))
+        #serialized parallel sentences waiting to be written
+        self.buffer = []
+        self.buffered_size = 0
+
+    def add_parallelsentence(self, parallelsentence):
+        data = serialize_parallelsentence(self.TAG, parallelsentence)
+        self.buffer.append(data)
+        self.buffered_size += len(data)
+        if self.buffered_size >= WRITE_BUFFER_SIZE:
+            self.flush()
+
+    def add_parallelsentences(self, parallelsentences):
+        for parallelsentence in parallelsentences:
+            self.add_parallelsentence(parallelsentence)
+
+    def flush(self):
+        """
+        Write the buffered parallel sentences on the file
+        """
+        self.file.write("".join(self.buffer))
+        self.buffer = []
+        self.buffered_size = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+        shutil.move(self.tempfilename, self.filename)
@@ -0,0 +1,137 @@
+'''
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+'''
+
+import os
+import shutil
+import tempfile
+from sentence.sentence import SimpleSentence
+from io_utils.dataformat.tsvformat import TsvFormat
+from io_utils.compression import open_output, get_compression
+
+#the size of the serialized data that gets collected before being written on the file
+WRITE_BUFFER_SIZE = 1 << 20
+
+_escaped_chars = [(u"\\", u"\\\\"), (u"\t", u"\\t"), (u"\n", u"\\n"), (u"\r", u"\\r")]
+
+
+def escape_value(value):
+    """
+    @return: the value, as it can be written in a cell
+    @rtype: unicode
+    """
+    if not isinstance(value, basestring):
+        value = unicode(value)
+    elif not isinstance(value, unicode):
+        value = unicode(value, "utf-8")
+    for char, escaped in _escaped_chars:
+        if char in value:
+            value = value.replace(char, escaped)
+    return value
+
+
+class IncrementalTsv(object):
+    """
+    Write parallel sentences incrementally on a TSV file, one line for each translation, without
+    keeping them in memory. Don't forget the close function. The columns are added as new attributes
+    appear, so that the header can only be written upon closing, when the lines get copied after it.
+    The lines written before a column was added are shorter, which the reader treats as missing values.
+    If the filename ends with .gz, .bz2 or .xz, the file gets compressed accordingly
+    """
+    def __init__(self, filename, dataformat=TsvFormat):
+        self.TAG = dataformat.TAG
+        self.filename = filename
+        tempfile_object = tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix='.tsv', prefix='tmp_', dir='.')
+        self.tempfilename = tempfile_object.name
+        #the lines without the header
+        self.file = tempfile_object
+        self.buffer = []
+        self.buffered_size = 0
+        self.count = 0
+        #the text columns come first, followed by the attribute columns in the order they appeared
+        self.columns = [self.TAG[element] for element in ("sent", "src", "tgt", "ref")]
+        self.text_positions = dict([(column, position) for position, column in enumerate(self.columns)])
+        self.column_positions = {}
+
+    def _get_position(self, element, name):
+        key = (element, name)
+        try:
+            return self.column_positions[key]
+        except KeyError:
+            position = len(self.columns)
+            self.columns.append(u"%s%s%s" % (element, self.TAG["separator"], escape_value(name)))
+            self.column_positions[key] = position
+            return position
+
+    def _set_attributes(self, cells, element, attributes):
+        for name in sorted(attributes):
+            position = self._get_position(element, name)
+            if position >= len(cells):
+                cells.extend([self.TAG["missing"]] * (position + 1 - len(cells)))
+            cells[position] = escape_value(attributes[name])
+
+    def _set_simplesentence(self, cells, element, simplesentence):
+        cells[self.text_positions[element]] = escape_value(simplesentence.get_string())
+        self._set_attributes(cells, element, simplesentence.get_attributes())
+
+    def add_parallelsentence(self, parallelsentence):
+        TAG = self.TAG
+        cells = [unicode(self.count)] + [TAG["missing"]] * 3
+        self._set_attributes(cells, TAG["sent"], parallelsentence.get_attributes())
+
+        src = parallelsentence.get_source()
+        if isinstance(src, (list, tuple)):
+            if len(src) > 1:
+                raise ValueError("TSV files can't have more than one source sentence. Consider JSON Lines")
+            src = src[0] if src else None
+        if isinstance(src, SimpleSentence):
+            self._set_simplesentence(cells, TAG["src"], src)
+
+        ref = parallelsentence.get_reference()
+        if ref and ref.get_string() != "":
+            self._set_simplesentence(cells, TAG["ref"], ref)
+
+        translations = parallelsentence.get_translations()
+        if not translations:
+            self._add_line(cells)
+        for tgt in translations:
+            tgt_cells = list(cells)
+            self._set_simplesentence(tgt_cells, TAG["tgt"], tgt)
+            self._add_line(tgt_cells)
+        self.count += 1
+
+    def add_parallelsentences(self, parallelsentences):
+        for parallelsentence in parallelsentences:
+            self.add_parallelsentence(parallelsentence)
+
+    def _add_line(self, cells):
+        data = (u"\t".join(cells) + u"\n").encode("utf-8")
+        self.buffer.append(data)
+        self.buffered_size += len(data)
+        if self.buffered_size >= WRITE_BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the buffered lines on the file
+        """
+        self.file.write("".join(self.buffer))
+        self.buffer = []
+        self.buffered_size = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+        tempfilename = "%s.tmp" % self.tempfilename
+        outputfile = open_output(tempfilename, get_compression(self.filename))
+        outputfile.write((u"\t".join(self.columns) + u"\n").encode("utf-8"))
+        linesfile = open(self.tempfilename, 'rb')
+        try:
+            shutil.copyfileobj(linesfile, outputfile, WRITE_BUFFER_SIZE)
+        finally:
+            linesfile.close()
+        outputfile.close()
+        os.remove(self.tempfilename)
+        shutil.move(tempfilename, self.filename)
@@ -10,11 +10,11 @@ import os
 import re
 import tempfile
 from random import shuffle
-from xml.sax.saxutils import XMLGenerator
-from xml.sax.xmlreader import AttributesImpl
+from xml.sax.saxutils import escape, quoteattr
 from io_utils.dataformat.jcmlformat import JcmlFormat
 from sentence.sentence import SimpleSentence
 from sentence.dataset import DataSet
+from io_utils.compression import open_output, get_compression
 
 
 #compile the much needed regular expression
@@ -33,72 +33,180 @@ def c(string):
 
 
 
+#the size of the serialized data that gets collected before being written on the file
+WRITE_BUFFER_SIZE = 1 << 20
+#the number of parallel sentences that get serialized before being written on the file
+WRITE_BUFFER_SENTENCES = 1000
+#the maximum number of attribute serializations to be cached
+ATTRIBUTE_CACHE_SIZE = 1 << 16
+
+#the serialization of the attributes with string values {(name, value): bytes}
+_attribute_cache = {}
+#the order in which the generator would write the attributes, per iteration order of the attribute names
+_attribute_order_cache = {}
+
+
+def _serialize_attribute(name, value):
+    """
+    @return: the attribute, as XMLGenerator would write it
+    @rtype: str
+    """
+    return (u' %s=%s' % (name, quoteattr(str(value)))).encode("utf-8", "xmlcharrefreplace")
+
+
+def _serialize_attributes(attributes):
+    """
+    Serialize the attributes of an element, in the same order and format as XMLGenerator.startElement
+    would do after converting all attribute values to string (as the writers used to do)
+    @rtype: str
+    """
+    names = tuple(attributes)
+    try:
+        ordered_names = _attribute_order_cache[names]
+    except KeyError:
+        #the order of a new dict built by inserting the attributes one by one
+        ordered_names = tuple(dict.fromkeys(names))
+        _attribute_order_cache[names] = ordered_names
+    
+    serialized = []
+    for name in ordered_names:
+        value = attributes[name]
+        if not isinstance(value, basestring):
+            #e.g. 1 and 1.0 would share the same key in the cache
+            serialized.append(_serialize_attribute(name, value))
+            continue
+        try:
+            serialized.append(_attribute_cache[(name, value)])
+        except KeyError:
+            serialized_attribute = _serialize_attribute(name, value)
+            if len(_attribute_cache) >= ATTRIBUTE_CACHE_SIZE:
+                _attribute_cache.clear()
+            _attribute_cache[(name, value)] = serialized_attribute
+            serialized.append(serialized_attribute)
+    return "".join(serialized)
+
+
+def _serialize_text(string):
+    """
+    @return: the text, as XMLGenerator.characters would write it after removing the illegal characters
+    @rtype: str
+    """
+    string = c(string)
+    if not isinstance(string, unicode):
+        string = unicode(string, "utf-8")
+    if "&" in string or "<" in string or ">" in string:
+        string = escape(string)
+    return string.encode("utf-8", "xmlcharrefreplace")
+
+
+def _serialize_simplesentence(output, tag, simplesentence):
+    output.append("\n\t\t<%s%s>%s</%s>" % (tag, _serialize_attributes(simplesentence.get_attributes()), 
+                                           _serialize_text(simplesentence.get_string()), tag))
+
+
+def _serialize_parallelsentence(output, TAG, parallelsentence, translations = None):
+    """
+    Serialize one parallel sentence as a judged sentence element
+    @param output: the list where the utf-8 encoded pieces of the element will be appended
+    @type output: [str, ...]
+    @param translations: the translations to be written, if not the ones of the parallel sentence
+    @type translations: [L{SimpleSentence}, ...]
+    """
+    output.append("\n\t<%s%s>" % (TAG["sent"], _serialize_attributes(parallelsentence.get_attributes())))
+    
+    src = parallelsentence.get_source()
+    if isinstance(src, SimpleSentence):
+        _serialize_simplesentence(output, TAG["src"], src)
+    elif isinstance(src, tuple):
+        for src in parallelsentence.get_source():
+            _serialize_simplesentence(output, TAG["src"], src)
+    
+    if translations is None:
+        translations = parallelsentence.get_translations()
+    for tgt in translations:
+        _serialize_simplesentence(output, TAG["tgt"], tgt)
+    
+    ref = parallelsentence.get_reference()
+    if ref and ref.get_string() != "":
+        _serialize_simplesentence(output, TAG["ref"], ref)
+    
+    output.append("\n\t</%s>" % TAG["sent"])
+
+
+def _get_header(TAG):
+    return '<?xml version="1.0" encoding="utf-8"?>\n<%s>' % TAG["doc"]
+
+
+def _get_footer(TAG):
+    return "\n</%s>\n" % TAG["doc"]
+
+
 class IncrementalJcml(object):
     """
     Write line by line incrementally on an XML file, without loading anything in the memory.
-    Don't forget the close function. Object sentences cannot be edited after written
+    Don't forget the close function. Object sentences cannot be edited after written.
+    If the filename ends with .gz, .bz2 or .xz, the file gets compressed accordingly
     """
     def __init__(self, filename, xmlformat=JcmlFormat):
         self.TAG = xmlformat.TAG
         self.filename = filename
-        self.file = tempfile.NamedTemporaryFile(mode='w',delete=False,suffix='.jcml', prefix='tmp_', dir='.') #"/tmp/%s.tmp" % os.path.basename(filename)
-        self.tempfilename = self.file.name
-#        self.file = open(self.tempfilename, 'w')
-        self.generator = XMLGenerator(self.file, "utf-8")
-        self.generator.startDocument()
-        self.generator.startElement(self.TAG["doc"], {})
+        tempfile_object = tempfile.NamedTemporaryFile(mode='wb',delete=False,suffix='.jcml', prefix='tmp_', dir='.') #"/tmp/%s.tmp" % os.path.basename(filename)
+        self.tempfilename = tempfile_object.name
+        tempfile_object.close()
+        self.file = open_output(self.tempfilename, get_compression(filename))
+        #serialized parallel sentences waiting to be written 
+        self.buffer = []
+        self.buffered_size = 0
+        self.file.write(_get_header(self.TAG))
         
     def add_parallelsentence(self, parallelsentence):
-        self.generator.characters("\n\t")
-        #convert all attribute values to string, otherwise it breaks
-        attributes = dict([(key,str(val)) for key,val in parallelsentence.get_attributes().iteritems()])
-        self.generator.startElement(self.TAG["sent"], attributes)
-        
-        src = parallelsentence.get_source()
-        
-        if isinstance(src, SimpleSentence):            
-                                
-            self.generator._write("\n\t\t")
-            src_attributes = dict([(key,str(val)) for key,val in src.get_attributes().iteritems()])
-            self.generator.startElement(self.TAG["src"], src_attributes)
-            self.generator.characters(c(src.get_string()))
-            self.generator.endElement(self.TAG["src"])
-        elif isinstance(src, tuple):
-            for src in parallelsentence.get_source():
-                self.generator._write("\n\t\t")
-                src_attributes = dict([(key,str(val)) for key,val in src.get_attributes().iteritems()])
-                self.generator.startElement(self.TAG["src"], src_attributes)
-                self.generator.characters(c(src.get_string()))
-                self.generator.endElement(self.TAG["src"])
-        
-        for tgt in parallelsentence.get_translations():
-            self.generator._write("\n\t\t")
-            tgt_attributes = dict([(key,str(val)) for key,val in tgt.get_attributes().iteritems()])
-            self.generator.startElement(self.TAG["tgt"], tgt_attributes)
-            self.generator.characters(c(tgt.get_string()))
-            self.generator.endElement(self.TAG["tgt"])
-        
-        
-        ref = parallelsentence.get_reference()
-        if ref and ref.get_string() != "":
-            self.generator._write("\n\t\t")
-            ref_attributes = dict([(key,str(val)) for key,val in ref.get_attributes().iteritems()])
-            self.generator.startElement(self.TAG["ref"], ref_attributes)
-            self.generator.characters(c(ref.get_string()))
-            self.generator.endElement(self.TAG["ref"])
-        
-        self.generator._write("\n\t")
-        self.generator.endElement(self.TAG["sent"])
-        
+        size = len(self.buffer)
+        _serialize_parallelsentence(self.buffer, self.TAG, parallelsentence)
+        self.buffered_size += sum([len(data) for data in self.buffer[size:]])
+        if self.buffered_size >= WRITE_BUFFER_SIZE:
+            self.flush()
+
+    def add_serialized(self, data):
+        """
+        Append parallel sentences that have already been serialized with 
+        L{serialize_parallelsentences}, e.g. by another process
+        @param data: the serialized parallel sentences
+        @type data: str
+        """
+        self.buffer.append(data)
+        self.buffered_size += len(data)
+        if self.buffered_size >= WRITE_BUFFER_SIZE:
+            self.flush()
+    
+    def flush(self):
+        """
+        Write the buffered parallel sentences on the file
+        """
+        self.file.write("".join(self.buffer))
+        self.buffer = []
+        self.buffered_size = 0
     
     def close(self):
-        self.generator.characters("\n")
-        self.generator.endElement(self.TAG["doc"])
-        self.generator.characters("\n")
-        self.generator.endDocument()
+        self.buffer.append(_get_footer(self.TAG))
+        self.flush()
         self.file.close()
         shutil.move(self.tempfilename, self.filename)
-        
+
+
+def serialize_parallelsentences(parallelsentences, xmlformat=JcmlFormat):
+    """
+    Serialize parallel sentences into the same XML fragment that L{IncrementalJcml} would
+    write for them, so that they can be prepared independently and appended later
+    @param parallelsentences: the parallel sentences to be serialized
+    @type parallelsentences: [L{ParallelSentence}, ...]
+    @return: the utf-8 encoded judged sentence elements
+    @rtype: str
+    """
+    output = []
+    for parallelsentence in parallelsentences:
+        _serialize_parallelsentence(output, xmlformat.TAG, parallelsentence)
+    return "".join(output)
+
 
 class Parallelsentence2Jcml(object):
     '''
@@ -125,72 +233,31 @@ class Parallelsentence2Jcml(object):
         
     def write_to_file(self, filename):
         '''
-        XML output is written to the desired file
+        XML output is written to the desired file, compressed if its name ends with .gz, .bz2 or .xz
         '''
         tempfilename = "%s.tmp" % filename 
-        f = open(tempfilename, 'w')
-        generator = XMLGenerator(f, "utf-8")
-        generator.startDocument()
-        generator.startElement(self.TAG["doc"], {})
-
+        f = open_output(tempfilename, get_compression(filename))
+        f.write(_get_header(self.TAG))
+        
+        output = []
+        buffered_sentences = 0
         for parallelsentence in self.parallelsentences:
-            generator.characters("\n\t")
-            attributes = dict([(k,str(v)) for k,v in parallelsentence.get_attributes().iteritems()])
-            generator.startElement(self.TAG["sent"], attributes)
-            
-            src = parallelsentence.get_source()
-            attributes = dict([(k,str(v)) for k,v in src.get_attributes().iteritems()])
-            
-            if isinstance(src, SimpleSentence):            
-                                    
-                generator._write("\n\t\t")
-                generator.startElement(self.TAG["src"], attributes)
-                generator.characters(c(src.get_string()))
-                generator.endElement(self.TAG["src"])
-            elif isinstance(src, tuple):
-                for src in parallelsentence.get_source():
-                    generator._write("\n\t\t")
-                    generator.startElement(self.TAG["src"], attributes)
-                    generator.characters(c(src.get_string()))
-                    generator.endElement(self.TAG["src"])
-            
             translations = parallelsentence.get_translations()
             
             if self.shuffle_translations:
                 shuffle(translations)
             
-
-            
             if self.sort_attribute:
                 translations = sorted(translations, key=lambda tgt: tgt.get_attribute(self.sort_attribute))
             
-            
-            for tgt in translations:
-                generator._write("\n\t\t")
-                attributes = dict([(k,str(v)) for k,v in tgt.get_attributes().iteritems()])
-                generator.startElement(self.TAG["tgt"], attributes)
-                generator.characters(c(tgt.get_string()))
-                generator.endElement(self.TAG["tgt"])
-            
-            
-            ref = parallelsentence.get_reference()
-            if ref and ref.get_string() != "":
-                generator._write("\n\t\t")
-                attributes = dict([(k,str(v)) for k,v in ref.get_attributes().iteritems()])
-                generator.startElement(self.TAG["ref"], attributes)
-                generator.characters(c(ref.get_string()))
-                generator.endElement(self.TAG["ref"])
-            
-            generator._write("\n\t")
-
-            
-            
-            generator.endElement(self.TAG["sent"])
-        generator.characters("\n")
-        generator.endElement(self.TAG["doc"])
-        generator.characters("\n")
-        generator.endDocument()
+            _serialize_parallelsentence(output, self.TAG, parallelsentence, translations)
+            buffered_sentences += 1
+            if buffered_sentences == WRITE_BUFFER_SENTENCES:
+                f.write("".join(output))
+                output = []
+                buffered_sentences = 0
+        
+        output.append(_get_footer(self.TAG))
+        f.write("".join(output))
         f.close()
         shutil.move(tempfilename, filename)
-            
-            
\ No newline at end of file
@@ -0,0 +1,197 @@
+'''
+Merging of JCML files that do not fit in memory. The parallel sentences are streamed
+from the files and the result is written incrementally, so that memory stays bounded
+
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+'''
+
+import cPickle as pickle
+import heapq
+import math
+import os
+import shutil
+import sys
+import tempfile
+from itertools import izip_longest
+from io_utils.input.iterjcmlreader import IterJcmlReader
+from io_utils.sax.saxps2jcml import IncrementalJcml
+
+#approximate amount of JCML of the incoming file that gets loaded in memory at a time
+DEFAULT_MEMORY_LIMIT = 256 * 1024 * 1024
+
+
+def _dump(obj, picklefile):
+    pickle.dump(obj, picklefile, pickle.HIGHEST_PROTOCOL)
+
+
+def _load_all(filename):
+    """
+    Iterate over all the objects that have been dumped one by one in the given file
+    """
+    picklefile = open(filename, 'rb')
+    try:
+        while True:
+            try:
+                yield pickle.load(picklefile)
+            except EOFError:
+                return
+    finally:
+        picklefile.close()
+
+
+def _get_key(parallelsentence, merging_attributes):
+    return tuple([parallelsentence.get_attribute(att) for att in merging_attributes])
+
+
+def _partition(filename, partition_filenames, merging_attributes, numbered):
+    """
+    Distribute the parallel sentences of a file to the partition files, based on the hash of their key.
+    If numbered, each parallel sentence is stored along with its position in the original file
+    """
+    partitions = len(partition_filenames)
+    partition_files = [open(partition_filename, 'wb') for partition_filename in partition_filenames]
+    try:
+        for i, parallelsentence in enumerate(IterJcmlReader(filename).get_parallelsentences()):
+            #same as DataSet.ensure_judgment_ids, so that the result matches the in-memory merge
+            if not parallelsentence.has_judgment_id():
+                parallelsentence.add_judgment_id(i + 1)
+            key = _get_key(parallelsentence, merging_attributes)
+            partition_file = partition_files[hash(key) % partitions]
+            if numbered:
+                _dump((i, parallelsentence), partition_file)
+            else:
+                _dump(parallelsentence, partition_file)
+    finally:
+        for partition_file in partition_files:
+            partition_file.close()
+
+
+def merge_jcml(filename, incoming_filename, output_filename, attribute_replacements = {}, merging_attributes = ["id"], merge_strict = False, **kwargs):
+    """
+    Out-of-core equivalent of L{DataSet.merge_dataset}. Both files are partitioned on temporary files
+    by the hash of the merging attributes, each partition is joined separately and the merged
+    parallel sentences are written in the order of the first file
+    @param filename: the JCML file whose parallel sentences will be augmented
+    @type filename: str
+    @param incoming_filename: the JCML file whose contents are to be merged in the first one
+    @type incoming_filename: str
+    @param output_filename: the JCML file where the merged parallel sentences will be written
+    @type output_filename: str
+    @param attribute_replacements: the attribute renamings that need to take place to the incoming attributes, before they are merged
+    @type attribute_replacements: {str: str, ...}
+    @param merging_attributes: the names of the attributes that signify that two parallelsentences are the same
+    @type merging_attributes: [str, ...]
+    @param merge_strict: drop the parallel sentences that could not be merged, instead of keeping them unchanged
+    @type merge_strict: boolean
+    @keyword partitions: the number of partitions. By default, as many as needed so that each partition of
+    the incoming file is about memory_limit bytes of JCML
+    @type partitions: int
+    @keyword memory_limit: the approximate size of each partition of the incoming file in bytes
+    @type memory_limit: int
+    @keyword tempdir: the directory where the temporary partitions will be created
+    @type tempdir: str
+    @keyword add_missing: passed to L{ParallelSentence.merge_parallelsentence}
+    @return: the number of parallel sentences written
+    @rtype: int
+    """
+    memory_limit = kwargs.pop("memory_limit", DEFAULT_MEMORY_LIMIT)
+    partitions = kwargs.pop("partitions", None)
+    tempdir = kwargs.pop("tempdir", None)
+    if not partitions:
+        partitions = max(1, int(math.ceil(1.0 * os.path.getsize(incoming_filename) / memory_limit)))
+
+    workdir = tempfile.mkdtemp(prefix='tmp_merge_', dir=tempdir)
+    try:
+        incoming_partitions = [os.path.join(workdir, "incoming.%d" % p) for p in range(partitions)]
+        existing_partitions = [os.path.join(workdir, "existing.%d" % p) for p in range(partitions)]
+        merged_partitions = [os.path.join(workdir, "merged.%d" % p) for p in range(partitions)]
+        _partition(incoming_filename, incoming_partitions, merging_attributes, False)
+        _partition(filename, existing_partitions, merging_attributes, True)
+
+        #join each partition separately, keeping only its incoming part in memory
+        for incoming_partition, existing_partition, merged_partition in zip(incoming_partitions, existing_partitions, merged_partitions):
+            incoming_parallelsentences_indexed = {}
+            for incoming_ps in _load_all(incoming_partition):
+                incoming_parallelsentences_indexed[_get_key(incoming_ps, merging_attributes)] = incoming_ps
+            os.remove(incoming_partition)
+
+            merged_file = open(merged_partition, 'wb')
+            for i, parallelsentence in _load_all(existing_partition):
+                key = _get_key(parallelsentence, merging_attributes)
+                try:
+                    incoming_ps = incoming_parallelsentences_indexed[key]
+                    parallelsentence.merge_parallelsentence(incoming_ps, attribute_replacements, **kwargs)
+                except:
+                    sys.stderr.write( "Didn't find key while merging sentence %s " % (key,) )
+                    if merge_strict:
+                        continue
+                _dump((i, parallelsentence), merged_file)
+            merged_file.close()
+            os.remove(existing_partition)
+            del incoming_parallelsentences_indexed
+
+        #restore the original order by merging the sorted partitions
+        writer = IncrementalJcml(output_filename)
+        count = 0
+        for i, parallelsentence in heapq.merge(*[_load_all(merged_partition) for merged_partition in merged_partitions]):
+            writer.add_parallelsentence(parallelsentence)
+            count += 1
+        writer.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return count
+
+
+def merge_jcml_symmetrical(filenames, output_filename, attribute_replacements = [], confirm_attribute = ""):
+    """
+    Merge several symmetrical JCML files (same size, same parallel sentences in the same order, but
+    possibly with different attributes) in one pass. The files are read in lockstep and the result is
+    the same as loading the first one and calling L{DataSet.merge_dataset_symmetrical} with each one 
+    of the others in turn, but only one parallel sentence per file is kept in memory
+    @param filenames: the JCML files to be merged. The rest are merged into the first one
+    @type filenames: [str, ...]
+    @param output_filename: the JCML file where the merged parallel sentences will be written
+    @type output_filename: str
+    @param attribute_replacements: one dict of attribute replacements for each one of the files that
+    get merged into the first one, or a single dict to be used for all of them
+    @type attribute_replacements: [{str: str, ...}, ...]
+    @param confirm_attribute: if given, the attribute whose values need to be the same in all files
+    @type confirm_attribute: str
+    @return: the number of parallel sentences written
+    @rtype: int
+    """
+    incoming_count = len(filenames) - 1
+    if isinstance(attribute_replacements, dict):
+        attribute_replacements = [attribute_replacements] * incoming_count
+    elif not attribute_replacements:
+        attribute_replacements = [{}] * incoming_count
+    if len(attribute_replacements) != incoming_count:
+        raise ValueError("Expected {} attribute replacements, but got {}".format(incoming_count, len(attribute_replacements)))
+
+    readers = [IterJcmlReader(filename).get_parallelsentences() for filename in filenames]
+    writer = IncrementalJcml(output_filename)
+    count = 0
+    try:
+        for parallelsentences in izip_longest(*readers):
+            if any([parallelsentence is None for parallelsentence in parallelsentences]):
+                raise IndexError("Error, datasets not symmetrical")
+            count += 1
+            #same as DataSet.ensure_judgment_ids, so that the result matches the in-memory merge
+            for parallelsentence in parallelsentences:
+                if not parallelsentence.has_judgment_id():
+                    parallelsentence.add_judgment_id(count)
+            
+            merged_ps = parallelsentences[0]
+            for incoming_ps, replacements in zip(parallelsentences[1:], attribute_replacements):
+                if confirm_attribute != "" and merged_ps.get_attribute(confirm_attribute) != incoming_ps.get_attribute(confirm_attribute):
+                    raise IndexError("Error, datasets not symmetrical, concerning the identifier attribute {}".format(confirm_attribute))
+                merged_ps.merge_parallelsentence(incoming_ps, replacements)
+            writer.add_parallelsentence(merged_ps)
+    except:
+        writer.file.close()
+        os.remove(writer.tempfilename)
+        raise
+    writer.close()
+    return count
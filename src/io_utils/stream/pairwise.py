@@ -0,0 +1,95 @@
+'''
+Generation of pairwise training data over entire corpora, reading, pairing and
+writing parallel sentences incrementally, so that memory stays bounded by the
+size of a batch and not by the size of the corpus
+
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+'''
+
+import json
+from io_utils.input.iterjcmlreader import IterJcmlReader
+from io_utils.sax.saxps2jcml import IncrementalJcml, serialize_parallelsentences
+from io_utils.stream.pool import imap_ordered
+
+
+def _pairwise_jcml(task):
+    parallelsentence, kwargs = task
+    return serialize_parallelsentences(parallelsentence.get_pairwise_view(**kwargs))
+
+
+def _pairwise_arrays(task):
+    parallelsentence, attribute_names, dtype, kwargs = task
+    features, labels = parallelsentence.get_pairwise_view(**kwargs).get_matrices(attribute_names, dtype)
+    return features.tostring(), labels.tostring(), len(labels)
+
+
+def write_pairwise_jcml(input_filename, output_filename, processes = 1, batch_size = 1000, **kwargs):
+    """
+    Stream the parallel sentences of a JCML file, expand each one of them into its pairwise
+    parallel sentences and write them incrementally on a new JCML file, in the original order
+    @param input_filename: the JCML file with the parallel sentences
+    @type input_filename: str
+    @param output_filename: the JCML file where the pairwise parallel sentences will be written
+    @type output_filename: str
+    @param processes: the number of worker processes that do the pairing and serialization
+    @type processes: int
+    @param batch_size: the number of parallel sentences dispatched to the workers at a time
+    @type batch_size: int
+    @param kwargs: passed to L{ParallelSentence.get_pairwise_parallelsentences}
+    @return: the number of parallel sentences that were processed
+    @rtype: int
+    """
+    reader = IterJcmlReader(input_filename)
+    writer = IncrementalJcml(output_filename)
+    tasks = ((parallelsentence, kwargs) for parallelsentence in reader.get_parallelsentences())
+    count = 0
+    for data in imap_ordered(_pairwise_jcml, tasks, processes, batch_size):
+        writer.add_serialized(data)
+        count += 1
+    writer.close()
+    return count
+
+
+def write_pairwise_arrays(input_filename, output_prefix, attribute_names, processes = 1, batch_size = 1000, dtype = "float32", **kwargs):
+    """
+    Stream the parallel sentences of a JCML file and write the features and the labels
+    of their pairs as flat binary arrays. The features are written in <prefix>.features
+    with one row of 2 * len(attribute_names) values per pair (see L{PairwiseView.get_matrices}),
+    the labels in <prefix>.labels as int8 and the dimensions in <prefix>.json.
+    They can be loaded with numpy.fromfile(filename, dtype).reshape(pairs, -1)
+    @param input_filename: the JCML file with the parallel sentences
+    @type input_filename: str
+    @param output_prefix: the prefix of the files to be written
+    @type output_prefix: str
+    @param attribute_names: the names of the translation attributes to be used as features
+    @type attribute_names: [str, ...]
+    @param dtype: the numpy type of the feature values
+    @type dtype: str
+    @param kwargs: passed to L{ParallelSentence.get_pairwise_view}
+    @return: the number of pairs that were written
+    @rtype: int
+    """
+    reader = IterJcmlReader(input_filename)
+    tasks = ((parallelsentence, attribute_names, dtype, kwargs) for parallelsentence in reader.get_parallelsentences())
+    pairs = 0
+    features_file = open("%s.features" % output_prefix, 'wb')
+    labels_file = open("%s.labels" % output_prefix, 'wb')
+    try:
+        for features, labels, count in imap_ordered(_pairwise_arrays, tasks, processes, batch_size):
+            features_file.write(features)
+            labels_file.write(labels)
+            pairs += count
+    finally:
+        features_file.close()
+        labels_file.close()
+
+    description = {"pairs": pairs,
+                   "columns": 2 * len(attribute_names),
+                   "attribute_names": attribute_names,
+                   "features_dtype": dtype,
+                   "labels_dtype": "int8"}
+    with open("%s.json" % output_prefix, 'w') as description_file:
+        json.dump(description, description_file, indent=1)
+    return pairs
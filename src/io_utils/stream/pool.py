@@ -0,0 +1,48 @@
+'''
+Helpers for processing long streams of tasks with a pool of worker processes,
+without having more than a couple of batches of them in memory
+
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+'''
+
+from itertools import islice, imap
+from multiprocessing import Pool
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def imap_ordered(function, tasks, processes, batch_size):
+    """
+    Apply the function on all tasks, using a pool of worker processes if requested.
+    The results are provided in the order of the tasks. At most two batches are
+    in flight at a time: the one being consumed and the one being processed
+    """
+    if processes <= 1:
+        for result in imap(function, tasks):
+            yield result
+        return
+
+    pool = Pool(processes)
+    chunksize = max(1, batch_size / (4 * processes))
+    try:
+        pending = []
+        for batch in batches(tasks, batch_size):
+            results = pool.imap(function, batch, chunksize)
+            for result in pending:
+                yield result
+            pending = results
+        for result in pending:
+            yield result
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
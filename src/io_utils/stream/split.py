@@ -0,0 +1,258 @@
+'''
+Splitting of JCML files in one streaming pass. Each judged sentence is routed to one of
+the output files, by default copying its XML as it is, without building any objects
+
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+'''
+
+import math
+import mmap
+import os
+import re
+import tempfile
+import zlib
+from xml.parsers import expat
+from io_utils.dataformat.jcmlformat import JcmlFormat
+from io_utils.input.genericreader import get_filter
+from io_utils.input.iterjcmlreader import IterJcmlReader, CHUNK_SIZE, get_sentence_attributes
+from io_utils.sax.saxps2jcml import IncrementalJcml, serialize_parallelsentences
+from io_utils.compression import open_input, is_compressed
+
+#the ways the judged sentences can be distributed to the parts
+CONTIGUOUS = "contiguous"
+ROUND_ROBIN = "round-robin"
+HASH = "hash"
+
+
+def count_parallelsentences(input_filename, xmlformat = JcmlFormat, sentence_filter = None):
+    """
+    Count the judged sentences of a JCML file, without building them
+    @param sentence_filter: conditions for the judged sentences to be counted, see L{AttributeFilter}
+    @type sentence_filter: {str: object, ...} or function
+    @rtype: int
+    """
+    TAG = xmlformat.TAG
+    sentence_filter = get_filter(sentence_filter)
+    count = [0]
+    def start_element(name, attributes):
+        if name == TAG["sent"]:
+            if not sentence_filter or sentence_filter(get_sentence_attributes(TAG, attributes)):
+                count[0] += 1
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = start_element
+    xmlfile = open_input(input_filename)
+    try:
+        while True:
+            data = xmlfile.read(CHUNK_SIZE)
+            parser.Parse(data, not data)
+            if not data:
+                break
+    finally:
+        xmlfile.close()
+    return count[0]
+
+
+def _is_utf8(input_filename):
+    xmlfile = open(input_filename, 'rb')
+    try:
+        declaration = re.match(r"<\?xml[^>]*encoding=[\"']([^\"']*)[\"']", xmlfile.read(1024))
+    finally:
+        xmlfile.close()
+    return not declaration or declaration.group(1).lower().replace("-", "") == "utf8"
+
+
+class _Router(object):
+    """
+    Decides the part where each judged sentence goes
+    """
+    def __init__(self, parts, mode, key_attributes, size = None):
+        if mode not in (CONTIGUOUS, ROUND_ROBIN, HASH):
+            raise ValueError("Unknown way of splitting: {}".format(mode))
+        self.parts = parts
+        self.mode = mode
+        self.key_attributes = key_attributes
+        if mode == CONTIGUOUS:
+            #as many per part as the old split_and_write, so the last parts may be left empty
+            self.step = max(1, int(math.ceil(1.00 * size / parts)))
+
+    def get_part(self, index, attributes):
+        """
+        @param index: the position of the judged sentence in the file
+        @type index: int
+        @param attributes: the attributes of the judged sentence
+        @type attributes: {str: str, ...}
+        @return: the index of the part
+        @rtype: int
+        """
+        if self.mode == CONTIGUOUS:
+            return index / self.step
+        elif self.mode == ROUND_ROBIN:
+            return index % self.parts
+        #a stable hash, so that the same key goes to the same part in every run and platform
+        key = u"\t".join([unicode(attributes.get(name, u"")) for name in self.key_attributes])
+        return (zlib.crc32(key.encode("utf-8")) & 0xffffffff) % self.parts
+
+
+def split_jcml(input_filename, output_filenames, mode = CONTIGUOUS, key_attributes = ["id"],
+               sentence_filter = None, transform = None, **kwargs):
+    """
+    Split a JCML file into several ones, reading it only once and keeping only one judged sentence
+    in memory at a time. Unless the parallel sentences need to be transformed, the XML of each
+    judged sentence is copied as it is, without being parsed into objects. In L{CONTIGUOUS} mode
+    the size of the parts depends on the number of judged sentences, so unless it is given, they 
+    are spooled in a temporary file and copied to the parts at the end
+    @param input_filename: the JCML file to be split
+    @type input_filename: str
+    @param output_filenames: the JCML files to be written, one for each part
+    @type output_filenames: [str, ...]
+    @param mode: how to distribute the judged sentences: L{CONTIGUOUS} for consecutive blocks of the
+    same size, L{ROUND_ROBIN} for one to each part in turn, or L{HASH} for the hash of their key attributes,
+    so that judged sentences with the same key end up in the same part
+    @type mode: str
+    @param key_attributes: the names of the attributes whose values define the part in L{HASH} mode
+    @type key_attributes: [str, ...]
+    @param sentence_filter: conditions for the judged sentences to be kept, see L{AttributeFilter}
+    @type sentence_filter: {str: object, ...} or function
+    @param transform: a function to be applied on every L{ParallelSentence} before it is written
+    @type transform: function
+    @keyword target_filter: conditions for the translations to be kept. Requires building the parallel sentences
+    @keyword xmlformat: the format class that defines the XML tags
+    @keyword size: the number of judged sentences that pass the filter, if known, so that L{CONTIGUOUS} mode
+    doesn't need to spool them
+    @type size: int
+    @return: the number of judged sentences written in each part
+    @rtype: [int, ...]
+    @raise ValueError: if there are more judged sentences than the given size
+    """
+    xmlformat = kwargs.get("xmlformat", JcmlFormat)
+    target_filter = kwargs.get("target_filter", None)
+    size = kwargs.get("size", None)
+    parts = len(output_filenames)
+    if mode == CONTIGUOUS and size is None:
+        return _split_spooled(_iter_serialized(input_filename, xmlformat, sentence_filter, target_filter, transform),
+                              output_filenames, xmlformat)
+    router = _Router(parts, mode, key_attributes, size)
+
+    if mode == CONTIGUOUS:
+        #don't create the files that would remain empty
+        output_filenames = output_filenames[:int(math.ceil(1.00 * size / router.step))]
+    writers = [IncrementalJcml(output_filename, xmlformat) for output_filename in output_filenames]
+    counts = [0] * len(writers)
+    for index, attributes, data in _iter_serialized(input_filename, xmlformat, sentence_filter, target_filter, transform):
+        part = router.get_part(index, attributes)
+        if part >= len(writers):
+            raise ValueError("More judged sentences than the given size {}".format(size))
+        writers[part].add_serialized(data)
+        counts[part] += 1
+
+    for writer in writers:
+        writer.close()
+    return counts
+
+
+def _split_spooled(serialized_parallelsentences, output_filenames, xmlformat):
+    """
+    Split the serialized judged sentences in contiguous parts, after spooling them in a temporary file
+    in order to count them
+    @return: the number of judged sentences written in each part
+    @rtype: [int, ...]
+    """
+    spool = tempfile.TemporaryFile()
+    try:
+        #where each judged sentence starts in the spool, and where the last one ends
+        offsets = [0]
+        for index, attributes, data in serialized_parallelsentences:
+            spool.write(data)
+            offsets.append(offsets[-1] + len(data))
+        size = len(offsets) - 1
+        router = _Router(len(output_filenames), CONTIGUOUS, None, size)
+
+        counts = []
+        spool.seek(0)
+        #don't create the files that would remain empty
+        for part, output_filename in enumerate(output_filenames[:int(math.ceil(1.00 * size / router.step))]):
+            first = part * router.step
+            last = min(size, first + router.step)
+            writer = IncrementalJcml(output_filename, xmlformat)
+            remaining = offsets[last] - offsets[first]
+            while remaining:
+                data = spool.read(min(remaining, CHUNK_SIZE))
+                writer.add_serialized(data)
+                remaining -= len(data)
+            writer.close()
+            counts.append(last - first)
+        return counts
+    finally:
+        spool.close()
+
+
+def _iter_serialized(input_filename, xmlformat, sentence_filter, target_filter, transform):
+    """
+    Iterate over the judged sentences of a JCML file, serialized as they will be written
+    @return: the position of each judged sentence that passes the filter, its attributes and its XML
+    @rtype: iter((int, {str: str, ...}, str))
+    """
+    #the copied XML needs to be in the encoding of the output files and compressed files can't be mapped
+    if transform or target_filter or is_compressed(input_filename) or not _is_utf8(input_filename):
+        reader = IterJcmlReader(input_filename, xmlformat=xmlformat,
+                                sentence_filter=sentence_filter, target_filter=target_filter)
+        for index, parallelsentence in enumerate(reader.get_parallelsentences()):
+            if transform:
+                parallelsentence = transform(parallelsentence)
+            yield index, parallelsentence.get_attributes(), serialize_parallelsentences([parallelsentence], xmlformat)
+    else:
+        for index, attributes, data in _iter_raw_parallelsentences(input_filename, xmlformat, get_filter(sentence_filter)):
+            yield index, attributes, "\n\t" + data
+
+
+def _iter_raw_parallelsentences(input_filename, xmlformat, sentence_filter = None):
+    """
+    Iterate over the judged sentences of a JCML file without building them
+    @return: the position of each judged sentence that passes the filter, its attributes and its XML
+    @rtype: iter((int, {str: str, ...}, str))
+    """
+    TAG = xmlformat.TAG
+    parser = expat.ParserCreate()
+    if not os.path.getsize(input_filename):
+        #an empty file can't be mapped, let the parser complain as the readers would
+        parser.Parse("", True)
+    xmlfile = open(input_filename, 'rb')
+    try:
+        mapped_file = mmap.mmap(xmlfile.fileno(), 0, access=mmap.ACCESS_READ)
+    finally:
+        xmlfile.close()
+
+    #the judged sentences that have been parsed during the last chunk
+    found = []
+    state = {"start": None, "attributes": None, "index": 0}
+
+    def start_element(name, attributes):
+        if name == TAG["sent"] and state["start"] is None:
+            state["start"] = parser.CurrentByteIndex
+            state["attributes"] = get_sentence_attributes(TAG, attributes)
+
+    def end_element(name):
+        if name == TAG["sent"] and state["start"] is not None:
+            end = mapped_file.find(">", parser.CurrentByteIndex) + 1
+            attributes = state["attributes"]
+            if not sentence_filter or sentence_filter(attributes):
+                found.append((state["index"], attributes, mapped_file[state["start"]:end]))
+                state["index"] += 1
+            state["start"] = None
+
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    try:
+        size = mapped_file.size()
+        for position in xrange(0, size, CHUNK_SIZE):
+            parser.Parse(mapped_file[position:position + CHUNK_SIZE], False)
+            for parallelsentence in found:
+                yield parallelsentence
+            del found[:]
+        parser.Parse("", True)
+        for parallelsentence in found:
+            yield parallelsentence
+    finally:
+        mapped_file.close()
@@ -0,0 +1,193 @@
+'''
+Profiling of the calls and the memory of an evaluation, with the reports keyed to the modules of
+the project, so that they can be attached to a ticket. The calls are profiled with cProfile. The
+memory is profiled with tracemalloc where it is available, and otherwise by counting the objects
+tracked by the garbage collector per type, along with the peak memory of the process
+
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+'''
+
+import cProfile
+import gc
+import os
+import pstats
+import sys
+from collections import defaultdict
+from profiling.stages import get_peak_memory
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+#the root of the source tree, for telling apart the modules of the project
+SOURCE_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#how many stack frames tracemalloc keeps for every allocation
+TRACEBACK_FRAMES = 10
+
+
+def get_module_name(filename):
+    """
+    @param filename: the file of a python module
+    @type filename: str
+    @return: the dotted name of the module if it belongs to the project, otherwise the name of the file,
+    and whether it belongs to the project
+    @rtype: (str, boolean)
+    """
+    path = os.path.abspath(filename)
+    if path.startswith(SOURCE_DIRECTORY + os.sep):
+        name = os.path.splitext(os.path.relpath(path, SOURCE_DIRECTORY))[0]
+        return name.replace(os.sep, "."), True
+    return os.path.basename(filename), False
+
+
+def _get_function_label(function):
+    filename, lineno, function_name = function
+    if filename == "~":
+        #built-in functions
+        return function_name
+    module_name, own = get_module_name(filename)
+    return "{}:{}({})".format(module_name, lineno, function_name)
+
+
+class CallProfiler(object):
+    """
+    Profiles the given calls with cProfile, accumulating the statistics of all of them
+    """
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def run(self, function, *args, **kwargs):
+        """
+        Call the given function while profiling
+        @return: the result of the function
+        """
+        return self.profile.runcall(function, *args, **kwargs)
+
+    def write_stats(self, filename):
+        """
+        Write the statistics in the pstats format, to be read e.g. with pstats or snakeviz
+        @type filename: str
+        """
+        self.profile.dump_stats(filename)
+
+    def get_hottest(self, limit = 10, own = False):
+        """
+        @param limit: the number of functions
+        @type limit: int
+        @param own: only include the functions of the project
+        @type own: boolean
+        @return: the functions that took most time by themselves, excluding the functions they called,
+        with the number of calls, their own time and their cumulative time
+        @rtype: [(str, int, float, float), ...]
+        """
+        stats = pstats.Stats(self.profile).stats
+        hottest = []
+        for function, (primitive_calls, calls, own_time, cumulative_time, callers) in stats.iteritems():
+            #built-in functions have no file
+            if own and (function[0] == "~" or not get_module_name(function[0])[1]):
+                continue
+            hottest.append((_get_function_label(function), calls, own_time, cumulative_time))
+        hottest.sort(key=lambda entry: entry[2], reverse=True)
+        return hottest[:limit]
+
+    def write_summary(self, outputfile, limit = 10):
+        """
+        Write the hottest functions, both overall and of the project
+        @type outputfile: file
+        """
+        for title, own in [("Hottest functions", False), ("Hottest functions of the project", True)]:
+            outputfile.write("{} (calls, own seconds, cumulative seconds):\n".format(title))
+            for label, calls, own_time, cumulative_time in self.get_hottest(limit, own):
+                outputfile.write("{:>10}{:>10.3f}{:>10.3f}  {}\n".format(calls, own_time, cumulative_time, label))
+
+
+class MemoryProfiler(object):
+    """
+    Takes snapshots of the memory at the given stages of the evaluation, each one listing what
+    occupies most of the memory at that point
+    @ivar snapshots: the name of the stage, the peak memory of the process in kilobytes and the top
+    entries of each snapshot. Each entry has a label, a count and a size in bytes
+    @type snapshots: [(str, int, [(str, int, int), ...]), ...]
+    """
+
+    def __init__(self, limit = 20):
+        """
+        @param limit: the number of entries kept per snapshot
+        @type limit: int
+        """
+        self.limit = limit
+        self.snapshots = []
+        self.method = "tracemalloc" if tracemalloc is not None else "garbage collector"
+
+    def start(self):
+        if tracemalloc is not None:
+            tracemalloc.start(TRACEBACK_FRAMES)
+
+    def stop(self):
+        if tracemalloc is not None:
+            tracemalloc.stop()
+
+    def snapshot(self, stage):
+        """
+        Record what occupies the memory at this point
+        @param stage: the name of the current stage
+        @type stage: str
+        """
+        if tracemalloc is not None:
+            entries = self._get_allocations()
+        else:
+            entries = self._get_objects()
+        self.snapshots.append((stage, get_peak_memory(), entries[:self.limit]))
+
+    def _get_allocations(self):
+        #the allocations grouped by the innermost line of the project in their traceback
+        sizes = defaultdict(int)
+        counts = defaultdict(int)
+        for statistic in tracemalloc.take_snapshot().statistics("traceback"):
+            label = "other"
+            for frame in statistic.traceback:
+                module_name, own = get_module_name(frame.filename)
+                if own:
+                    label = "{}:{}".format(module_name, frame.lineno)
+                    break
+            sizes[label] += statistic.size
+            counts[label] += statistic.count
+        return sorted([(label, counts[label], size) for label, size in sizes.items()], key=lambda entry: entry[2], reverse=True)
+
+    def _get_objects(self):
+        #the objects grouped by their type. Only containers are tracked, e.g. not the floats or the strings they contain
+        gc.collect()
+        sizes = defaultdict(int)
+        counts = defaultdict(int)
+        for obj in gc.get_objects():
+            object_type = type(obj)
+            label = "{}.{}".format(object_type.__module__, object_type.__name__)
+            sizes[label] += sys.getsizeof(obj, 0)
+            counts[label] += 1
+        return sorted([(label, counts[label], size) for label, size in sizes.iteritems()], key=lambda entry: entry[2], reverse=True)
+
+    def write_report(self, outputfile):
+        """
+        Write all snapshots
+        @type outputfile: file
+        """
+        outputfile.write("Memory profiled with the {}\n".format(self.method))
+        for stage, peak_memory, entries in self.snapshots:
+            outputfile.write("\nAfter {}: peak memory of the process {} KB\n".format(stage, peak_memory))
+            outputfile.write("{:>12}{:>12}  {}\n".format("count", "KB", "allocated at" if tracemalloc is not None else "type"))
+            for label, count, size in entries:
+                outputfile.write("{:>12}{:>12.1f}  {}\n".format(count, size / 1024.0, label))
+
+    def write_summary(self, outputfile, limit = 5):
+        """
+        Write the peak memory and the top entries of every snapshot
+        @type outputfile: file
+        """
+        for stage, peak_memory, entries in self.snapshots:
+            outputfile.write("Memory after {}: peak {} KB, most by {}\n".format(stage, peak_memory,
+                             ", ".join(["{} ({:.0f} KB)".format(label, size / 1024.0) for label, count, size in entries[:limit]])))
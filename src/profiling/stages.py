@@ -0,0 +1,257 @@
+'''
+Timing of the stages of an evaluation: parsing the input, building and normalizing the rankings
+and calculating each metric. The functions of each stage get wrapped only while the instrumentation
+is enabled, so that it costs nothing otherwise. Nested stages are subtracted from the self time of
+the enclosing ones, e.g. the rankings built while normalizing
+
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+'''
+
+import json
+import resource
+import threading
+import time
+from functools import wraps
+from inspect import isgenerator
+
+#the stages that the readers count as parsing, per module and class name
+READER_METHODS = [("io_utils.input.genericxmlreader", "GenericXmlReader", "load"),
+                  ("io_utils.input.genericxmlreader", "GenericXmlReader", "get_parallelsentences"),
+                  ("io_utils.input.iterjcmlreader", "IterJcmlReader", "get_parallelsentences"),
+                  ("io_utils.input.jsonlreader", "JsonlReader", "get_parallelsentences"),
+                  ("io_utils.input.tsvreader", "TsvReader", "get_parallelsentences")]
+
+
+def get_peak_memory():
+    """
+    @return: the peak memory of the process so far, in kilobytes on linux
+    @rtype: int
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class Stage(object):
+    """
+    The measurements of one stage
+    @ivar calls: how many times the functions of the stage were called
+    @type calls: int
+    @ivar items: how many items (e.g. segments or parallel sentences) were processed
+    @type items: int
+    @ivar seconds: the wall time spent in the stage, including the nested stages
+    @type seconds: float
+    @ivar self_seconds: the wall time spent in the stage, excluding the nested stages
+    @type self_seconds: float
+    @ivar peak_memory: the highest peak memory of the process at the end of a call, in kilobytes
+    @type peak_memory: int
+    @ivar memory_growth: by how much the peak memory of the process rose during the calls, in kilobytes
+    @type memory_growth: int
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.items = 0
+        self.seconds = 0.0
+        self.self_seconds = 0.0
+        self.peak_memory = 0
+        self.memory_growth = 0
+
+    def get_report(self):
+        return {"calls": self.calls,
+                "items": self.items,
+                "seconds": self.seconds,
+                "self_seconds": self.self_seconds,
+                "items_per_second": self.items / self.seconds if self.seconds else None,
+                "peak_memory_kb": self.peak_memory,
+                "memory_growth_kb": self.memory_growth}
+
+
+class StageProfiler(object):
+    """
+    Wraps the functions of the stages in order to measure them, and restores them when disabled
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.enabled = False
+        self.started = None
+        self._patches = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _enter(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        #the time spent in nested stages
+        stack.append(0.0)
+        return time.time(), get_peak_memory()
+
+    def _exit(self, name, start, items):
+        start_time, start_memory = start
+        elapsed = time.time() - start_time
+        stack = self._local.stack
+        nested = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        peak_memory = get_peak_memory()
+        with self._lock:
+            #looked up by name, as the stages may have been reset in the meantime
+            try:
+                stage = self.stages[name]
+            except KeyError:
+                stage = self.stages[name] = Stage(name)
+            stage.calls += 1
+            stage.items += items
+            stage.seconds += elapsed
+            stage.self_seconds += elapsed - nested
+            stage.peak_memory = max(stage.peak_memory, peak_memory)
+            stage.memory_growth += peak_memory - start_memory
+
+    def _measure_generator(self, name, generator):
+        #only the time spent producing the items counts, not the time the consumer spends on them
+        while True:
+            start = self._enter()
+            try:
+                item = generator.next()
+            except StopIteration:
+                self._exit(name, start, 0)
+                return
+            except:
+                self._exit(name, start, 0)
+                raise
+            self._exit(name, start, 1)
+            yield item
+
+    def wrap(self, name, function, count = None):
+        """
+        @param name: the name of the stage
+        @type name: str
+        @param function: the function to be measured. If it returns a generator, the time spent
+        producing each item is measured, and each item is counted. If it returns a list, its items are counted
+        @type function: function
+        @param count: a function that gets the arguments of the call and returns the number of items processed,
+        instead of counting one item per call
+        @type count: function
+        @return: the measured function
+        @rtype: function
+        """
+        profiler = self
+
+        @wraps(function)
+        def measured(*args, **kwargs):
+            start = profiler._enter()
+            try:
+                result = function(*args, **kwargs)
+            except:
+                profiler._exit(name, start, 0)
+                raise
+            if isgenerator(result):
+                #the items get counted as they are produced
+                profiler._exit(name, start, 0)
+                return profiler._measure_generator(name, result)
+            if count:
+                items = count(*args, **kwargs)
+            elif isinstance(result, list):
+                items = len(result)
+            else:
+                items = 1
+            profiler._exit(name, start, items)
+            return result
+        return measured
+
+    def patch(self, owner, attribute, name, count = None):
+        """
+        Replace a function of a class, module or dictionary with its measured version, until disabled
+        @param owner: the object that holds the function
+        @param attribute: the name of the function in the owner, or its key if the owner is a dictionary
+        @type attribute: str
+        @param name: the name of the stage
+        @type name: str
+        @param count: a function that gets the arguments of the call and returns the number of items processed
+        @type count: function
+        """
+        if isinstance(owner, dict):
+            original = owner[attribute]
+            owner[attribute] = self.wrap(name, original, count)
+        else:
+            #the function as defined in the class, not as inherited
+            original = owner.__dict__[attribute]
+            setattr(owner, attribute, self.wrap(name, original, count))
+        self._patches.append((owner, attribute, original))
+
+    def enable(self, metrics = None):
+        """
+        Start measuring the stages
+        @param metrics: the metric functions by name to be measured, as in L{ranking.set.METRICS}.
+        It is given by the caller, as the module may be imported under different names
+        @type metrics: {str: function, ...}
+        """
+        if self.enabled:
+            return
+        import importlib
+        from sentence.ranking import Ranking
+        for module_name, class_name, method_name in READER_METHODS:
+            owner = getattr(importlib.import_module(module_name), class_name)
+            #the parallel sentences get counted when they are retrieved, not when the file is loaded
+            self.patch(owner, method_name, "parse", (lambda *args, **kwargs: 0) if method_name == "load" else None)
+        self.patch(Ranking, "__init__", "ranking")
+        self.patch(Ranking, "normalize", "normalize", lambda *args, **kwargs: 1)
+        for metric_name in (metrics or {}).keys():
+            #the number of segments is the length of the first argument, the predicted rankings
+            self.patch(metrics, metric_name, "metric:{}".format(metric_name), lambda *args, **kwargs: len(args[0]))
+        self.enabled = True
+        self.started = time.time()
+
+    def disable(self):
+        """
+        Stop measuring and restore the original functions
+        """
+        for owner, attribute, original in reversed(self._patches):
+            if isinstance(owner, dict):
+                owner[attribute] = original
+            else:
+                setattr(owner, attribute, original)
+        self._patches = []
+        self.enabled = False
+
+    def reset(self):
+        """
+        Discard the measurements so far. The functions remain measured if enabled
+        """
+        with self._lock:
+            self.stages = {}
+        self.started = time.time()
+
+    def get_report(self):
+        """
+        @return: the measurements of each stage, the total wall time since enabled and the peak memory of the process
+        @rtype: dict
+        """
+        with self._lock:
+            stages = dict([(name, stage.get_report()) for name, stage in self.stages.iteritems() if stage.calls])
+        return {"stages": stages,
+                "seconds": time.time() - self.started if self.started else None,
+                "peak_memory_kb": get_peak_memory()}
+
+    def write_report(self, outputfile):
+        """
+        Write the report as JSON
+        @type outputfile: file
+        """
+        json.dump(self.get_report(), outputfile, indent=2, sort_keys=True)
+        outputfile.write("\n")
+
+
+#the profiler shared within the process
+_profiler = StageProfiler()
+
+
+def get_profiler():
+    """
+    @return: the stage profiler shared within the process
+    @rtype: L{StageProfiler}
+    """
+    return _profiler
@@ -9,6 +9,28 @@
 import sys
 import re
 from compiler.ast import Raise
+from encoding import EncodedAttributes
+from sentence import SentenceList, View
+
+
+def _sentence_id_keys(parallelsentence):
+    return [parallelsentence.get_compact_id()]
+
+def _system_keys(parallelsentence):
+    return parallelsentence.get_systems()
+
+def _testset_keys(parallelsentence):
+    try:
+        return [parallelsentence.get_attribute("testset")]
+    except KeyError:
+        return []
+
+#functions that provide the keys under which a parallel sentence is found in each index
+INDEX_KEYS = {"sentence_id": _sentence_id_keys,
+              "system": _system_keys,
+              "testset": _testset_keys,
+              }
+
 
 class DataSet(object):
     """
@@ -20,6 +42,12 @@ class DataSet(object):
     @type attribute_names: [str, ...]
     @ivar attribute_names_found: remembers if the attribute names have been set
     @type attribute_names_found: boolean
+    @ivar _indexes: the indexes that have been built so far, by name. They are built upon first use,
+    updated when parallel sentences are appended and dropped when the parallel sentences get modified
+    @type _indexes: {str: dict, ...}
+    @ivar _index_view: the validity of the indexes, registered with the list of parallel sentences
+    and with everything in the parallel sentences that the indexes depend on
+    @type _index_view: L{View}
     """
 
     def __init__(self, content = [], attributes_list = [], annotations = []):
@@ -50,6 +78,18 @@ class DataSet(object):
                 self.attribute_names_found = False
                 self.attribute_names = []
             self.ensure_judgment_ids()
+    
+    def _get_parallelsentences(self):
+        return self._parallelsentences
+    
+    def _set_parallelsentences(self, parallelsentences):
+        if type(parallelsentences) is not SentenceList:
+            parallelsentences = SentenceList(parallelsentences)
+        self._parallelsentences = parallelsentences
+        self._indexes = {}
+        self._index_view = None
+    
+    parallelsentences = property(_get_parallelsentences, _set_parallelsentences)
                 
     def ensure_judgment_ids(self):
         """
@@ -76,15 +116,7 @@ class DataSet(object):
         @return: a dictionary with lists of parallel sentences for each sentence id
         @rtype: dict(String, list(sentence.parallelsentence.ParallelSentence))
         """
-        ps_sid = {}
-        for parallelsentence in self.parallelsentences:
-            #get the id of the particular multiple ranking (judgment) or create a new one
-            sentence_id = parallelsentence.get_compact_id()
-            if not ps_sid.has_key(sentence_id):
-                ps_sid[sentence_id] = [parallelsentence]
-            else:
-                ps_sid[sentence_id].append(parallelsentence)
-        return ps_sid        
+        return dict([(sentence_id, list(parallelsentences)) for sentence_id, parallelsentences in self._get_index("sentence_id").iteritems()])
                 
     
     def get_parallelsentences_with_judgment_ids(self):
@@ -92,22 +124,127 @@ class DataSet(object):
         Parallel sentences often come with multiple occurences, where a judgment id is unique.
         This functions returns a dictionary of all the parallel sentences mapped to their respective judgment id.
         If a judment id is missing, it gets assigned the incremental value showing the order of the entry in the set.
-        @return: A dictionary of all the parallel sentences mapped to their respective judgment id.
+        @return: A dictionary of all the parallel sentences mapped to their respective judgment id
         @rtype: dict
         """
-        ps_jid = {}
-        j = 0
-        for parallelsentence in self.parallelsentences:
-            #get the id of the particular multiple ranking (judgment) or create a new one
-            try:
-                judgement_id = parallelsentence.get_attribute("judgment_id")
-            except AttributeError:
-                judgement_id = str(j)
-            j += 1
-            
-            #add the pair into the dictionary
-            ps_jid[judgement_id] = parallelsentence
-        return ps_jid
+        return dict(self._get_index("judgment_id"))
+    
+    def get_parallelsentences_by_sentence_id(self, sentence_id):
+        """
+        @param sentence_id: the compact sentence id, as given by L{ParallelSentence.get_compact_id}
+        @type sentence_id: str
+        @return: the parallel sentences with the given sentence id
+        @rtype: [L{ParallelSentence}, ...]
+        """
+        return list(self._get_index("sentence_id").get(sentence_id, []))
+    
+    def get_parallelsentence_by_judgment_id(self, judgment_id):
+        """
+        @param judgment_id: the judgment id of the parallel sentence
+        @type judgment_id: str
+        @return: the parallel sentence with the given judgment id
+        @rtype: L{ParallelSentence}
+        @raise KeyError: if no parallel sentence has this judgment id
+        """
+        return self._get_index("judgment_id")[judgment_id]
+    
+    def get_parallelsentences_by_system(self, system):
+        """
+        @param system: the name of a system
+        @type system: str
+        @return: the parallel sentences that contain a translation of the given system
+        @rtype: [L{ParallelSentence}, ...]
+        """
+        return list(self._get_index("system").get(system, []))
+    
+    def get_parallelsentences_by_testset(self, testset):
+        """
+        @param testset: the name of a test set
+        @type testset: str
+        @return: the parallel sentences that belong to the given test set
+        @rtype: [L{ParallelSentence}, ...]
+        """
+        return list(self._get_index("testset").get(testset, []))
+    
+    def get_parallelsentences_by_attributes(self, attribute_names, values):
+        """
+        @param attribute_names: the names of the parallel sentence attributes to look up
+        @type attribute_names: [str, ...]
+        @param values: the respective values of the attributes
+        @type values: [str, ...]
+        @return: the parallel sentences that have exactly these attribute values
+        @rtype: [L{ParallelSentence}, ...]
+        @raise KeyError: if any of the parallel sentences lacks one of the attributes
+        """
+        return list(self._get_index(tuple(attribute_names)).get(tuple(values), []))
+    
+    def _get_index(self, name):
+        """
+        Provide the index with the given name, building it if needed. Names that are tuples 
+        refer to indexes on the values of the respective parallel sentence attributes
+        """
+        view = self._get_index_view()
+        try:
+            return self._indexes[name]
+        except KeyError:
+            index = {}
+            self._add_to_index(name, index, self.parallelsentences, 0, view)
+            self._indexes[name] = index
+            return index
+    
+    def _get_index_view(self):
+        """
+        Provide the validity of the indexes, after dropping the existing indexes if parallel sentences 
+        have been added, removed or replaced, or if the attributes of any of them have been modified
+        since they were built
+        @rtype: L{View}
+        """
+        view = self._index_view
+        if view is None or not view.valid:
+            self._indexes = {}
+            view = self._index_view = View()
+            self.parallelsentences.add_observer(view)
+            self._observe(self.parallelsentences, view)
+        return view
+    
+    def _observe(self, parallelsentences, view):
+        for parallelsentence in parallelsentences:
+            if parallelsentence is not None:
+                parallelsentence.attributes.add_observer(view)
+    
+    def _add_to_index(self, name, index, parallelsentences, offset, view):
+        if name == "judgment_id":
+            for position, parallelsentence in enumerate(parallelsentences, offset):
+                if parallelsentence is None:
+                    continue
+                if parallelsentence.has_judgment_id():
+                    judgement_id = parallelsentence.get_judgment_id()
+                else:
+                    judgement_id = str(position)
+                index[judgement_id] = parallelsentence
+        elif isinstance(name, tuple):
+            for parallelsentence in parallelsentences:
+                if parallelsentence is None:
+                    continue
+                key = tuple([parallelsentence.get_attribute(att) for att in name])
+                index.setdefault(key, []).append(parallelsentence)
+        else:
+            get_keys = INDEX_KEYS[name]
+            for parallelsentence in parallelsentences:
+                if parallelsentence is None:
+                    continue
+                for key in get_keys(parallelsentence):
+                    index.setdefault(key, []).append(parallelsentence)
+                if name == "system":
+                    #the systems also depend on the translations
+                    parallelsentence.add_systems_observer(view)
+    
+    def __getstate__(self):
+        #the copies have nothing built on them yet
+        state = dict(self.__dict__)
+        state["_indexes"] = {}
+        state["_index_view"] = None
+        return state
     
     
     def get_annotations(self):
@@ -120,14 +257,15 @@ class DataSet(object):
         return self.attribute_names
     
     def get_all_attribute_names(self):
-        all_attribute_names =  self.get_attribute_names()
-        all_attribute_names.extend( self.get_nested_attribute_names() )
-        return list(set(all_attribute_names))
+        #don't extend the cached list of attribute names
+        all_attribute_names = set(self.get_attribute_names())
+        all_attribute_names.update( self.get_nested_attribute_names() )
+        return list(all_attribute_names)
     
     def get_nested_attribute_names(self):
         nested_attribute_names = set()
         for parallelsentence in self.parallelsentences:
-            nested_attribute_names.update ( parallelsentence.get_nested_attributes().keys() )
+            nested_attribute_names.update ( parallelsentence._get_nested_attributes().iterkeys() )
         return list(nested_attribute_names)
     
     def _retrieve_attribute_names(self):
@@ -137,19 +275,36 @@ class DataSet(object):
         return list(attribute_names)
 
     def get_discrete_attribute_values(self, discrete_attribute_names):
-        attvalues = {}
-        for parallelsentence in self.parallelsentences:
-            allattributes = {}
-            allattributes.update(parallelsentence.get_nested_attributes())
-            allattributes.update(parallelsentence.attributes)
-            for attname in discrete_attribute_names:
-                if attname in allattributes:
-                    attvalue = allattributes[attname]
-                    try:
-                        attvalues[attname].add(attvalue)
-                    except:
-                        attvalues[attname] = set([attvalue])
-        return attvalues
+        return self.encode_attributes(discrete_attribute_names).get_values()
+    
+    def encode_attributes(self, attribute_names, rows="parallelsentence"):
+        """
+        Dictionary-encode the values of discrete attributes in one pass over the parallel sentences,
+        so that their value sets, counts and groupings can be computed as array operations
+        @param attribute_names: the names of the attributes, as found in L{ParallelSentence.get_nested_attributes}
+        @type attribute_names: [str, ...]
+        @param rows: "parallelsentence" for one row per parallel sentence, or "translation" for one row per
+        translation, where the plain names of the translation attributes (e.g. "system") are also available
+        and prevail over the rest
+        @type rows: str
+        @return: the encoded attributes
+        @rtype: L{EncodedAttributes}
+        """
+        if rows not in ("parallelsentence", "translation"):
+            raise ValueError("Unknown kind of rows: {}".format(rows))
+        encoded_attributes = EncodedAttributes(attribute_names)
+        for parallelsentence in self:
+            #the attributes of the parallel sentence prevail over the nested ones with the same prefixed name
+            attributes = parallelsentence.get_attributes()
+            nested_attributes = parallelsentence._get_nested_attributes()
+            if rows == "parallelsentence":
+                encoded_attributes.append(attributes, nested_attributes)
+            else:
+                nested_attributes = dict(nested_attributes)
+                nested_attributes.update(attributes)
+                for translation in parallelsentence.get_translations():
+                    encoded_attributes.append(translation.get_attributes(), nested_attributes)
+        return encoded_attributes
 
     def confirm_attributes(self, desired_attributes=[], meta_attributes=[]):
         """
@@ -174,7 +329,16 @@ class DataSet(object):
         @param add_dataset: dataset to be appended
         @rtype add_dataset: L{DataSet}
         """
+        offset = len(self.parallelsentences)
+        view = self._get_index_view()
+        #the indexes are updated instead of getting dropped
+        self.parallelsentences.remove_observer(view)
         self.parallelsentences.extend(add_dataset.get_parallelsentences())
+        self.parallelsentences.add_observer(view)
+        added_parallelsentences = self.parallelsentences[offset:]
+        self._observe(added_parallelsentences, view)
+        for name, index in self._indexes.iteritems():
+            self._add_to_index(name, index, added_parallelsentences, offset, view)
         existing_attribute_names = set(self.get_attribute_names())
         new_attribute_names = set(add_dataset.get_attribute_names())
         merged_attribute_names = existing_attribute_names.union(new_attribute_names)
@@ -193,21 +357,17 @@ class DataSet(object):
         @param merging_attributes: the names of the attributes that signify that two parallelsentences are the same, though with possibly different attributes
         @type merging_attributes: list of strings  
         """
-        incoming_parallelsentences_indexed = {}        
-        incoming_parallelsentences = dataset_for_merging_with.get_parallelsentences()
-        for incoming_ps in incoming_parallelsentences:
-            key = tuple([incoming_ps.get_attribute(att) for att in merging_attributes]) #hopefully this runs always in the same order
-            incoming_parallelsentences_indexed[key] = incoming_ps
-            
+        incoming_parallelsentences_indexed = dataset_for_merging_with._get_index(tuple(merging_attributes))
         
         for i in range(len(self.parallelsentences)):
             if self.parallelsentences[i]:
                 key = tuple([self.parallelsentences[i].get_attribute(att) for att in merging_attributes]) #hopefully this runs always in the same order
             try:
-                incoming_ps = incoming_parallelsentences_indexed[key]
+                #if the key appears more than once, the last incoming parallel sentence is used
+                incoming_ps = incoming_parallelsentences_indexed[key][-1]
                 self.parallelsentences[i].merge_parallelsentence(incoming_ps, attribute_replacements, **kwargs)
             except:
-                sys.stderr.write( "Didn't find key while merging sentence %s " % key )
+                sys.stderr.write( "Didn't find key while merging sentence %s " % (key,) )
                 if merge_strict:
                     self.parallelsentences[i] = None
                 pass
@@ -313,27 +473,130 @@ class DataSet(object):
         att_vector.reverse()
         
         for ps in self.parallelsentences:
-            atts = att_vector.pop()
-            atts = dict([(k, str(v)) for k,v in atts.iteritems()])
-            if target == "ps":
-                ps.add_attributes(atts)
-            elif target == "tgt":
-                ps.tgt[item].add_attributes(atts)
-            elif target == "src":
-                ps.src.add_attributes(atts)
+            self._add_attribute_vector_item(ps, att_vector.pop(), target, item)
     
+    def _add_attribute_vector_item(self, ps, atts, target, item):
+        atts = dict([(k, str(v)) for k,v in atts.iteritems()])
+        if target == "ps":
+            ps.add_attributes(atts)
+        elif target == "tgt":
+            ps.tgt[item].add_attributes(atts)
+        elif target == "src":
+            ps.src.add_attributes(atts)
     
-    def select_attribute_names(self, expressions=[]):
+    
+    def select_attribute_names(self, expressions=[], all_attribute_names=None):
+        """
+        Get the names of the attributes that match any of the given regular expressions
+        @param expressions: the regular expressions to be matched at the beginning of the attribute names
+        @type expressions: [str, ...]
+        @param all_attribute_names: the attribute names to select from. By default, the names of
+        all the attributes of the parallel sentences, including the nested ones
+        @type all_attribute_names: [str, ...]
+        @return: the matching attribute names, sorted
+        @rtype: [str, ...]
+        """
         attribute_names = set()
         #compile the list of expressions first, so that there is minimal overhead
         compiled_expressions = [re.compile(expression) for expression in expressions]
+        if all_attribute_names is None:
+            all_attribute_names = self.get_all_attribute_names()
         for expression in compiled_expressions:
-            for attribute_name in self.get_all_attribute_names(): 
-                if re.match(expression, attribute_name):
+            for attribute_name in all_attribute_names: 
+                if expression.match(attribute_name):
                     attribute_names.add(attribute_name)
-                else:
-                    print "tzifos"
-        return list(attribute_names)
+        return sorted(attribute_names)
+    
+    def _get_translation_count(self):
+        return sum([len(parallelsentence.get_translations()) for parallelsentence in self.parallelsentences])
+    
+    def _get_translation_attribute_names(self):
+        attribute_names = set()
+        for parallelsentence in self:
+            for translation in parallelsentence.get_translations():
+                attribute_names.update(translation.get_attributes().iterkeys())
+        return attribute_names
+    
+    def get_column_names(self, attribute_names=[], expressions=[], rows="parallelsentence"):
+        """
+        Get the columns of the matrix that L{to_matrix} would produce: first the given attribute names,
+        in the given order, and then the sorted names of the rest of the attributes that match the expressions
+        @param attribute_names: the names of the attributes to be included
+        @type attribute_names: [str, ...]
+        @param expressions: regular expressions for selecting more attribute names (see L{select_attribute_names})
+        @type expressions: [str, ...]
+        @param rows: "parallelsentence" or "translation", as in L{to_matrix}
+        @type rows: str
+        @rtype: [str, ...]
+        """
+        column_names = list(attribute_names)
+        if expressions:
+            all_attribute_names = set(self.get_all_attribute_names())
+            if rows == "translation":
+                all_attribute_names.update(self._get_translation_attribute_names())
+            given_names = set(column_names)
+            column_names.extend([name for name in self.select_attribute_names(expressions, all_attribute_names) if name not in given_names])
+        return column_names
+    
+    def to_matrix(self, attribute_names=[], expressions=[], rows="parallelsentence", dtype=float, missing=float("nan"), structured=False):
+        """
+        Export the values of the given attributes as a dense numeric matrix, filled in a single pass over
+        the parallel sentences. The attributes are found as in L{ParallelSentence.get_nested_attributes}
+        (e.g. "src_length", "tgt-1_rank"). If there is a row per translation, the attributes of the
+        translation itself are also available with their plain names (e.g. "rank") and override the rest
+        @param attribute_names: the names of the attributes to be exported, as the first columns
+        @type attribute_names: [str, ...]
+        @param expressions: regular expressions for selecting the rest of the columns, see L{get_column_names}
+        @type expressions: [str, ...]
+        @param rows: "parallelsentence" for one row per parallel sentence, or "translation" for one row per translation
+        @type rows: str
+        @param dtype: the numpy type of the values, e.g. float32 or float64
+        @param missing: the value to fill in when an attribute is missing. If None, a missing attribute raises a KeyError
+        @type missing: float
+        @param structured: return a structured array with one field per column, sharing the memory with the matrix,
+        instead of the matrix itself
+        @type structured: boolean
+        @return: the matrix of shape (rows, columns) or the structured array of shape (rows,), and the column names
+        @rtype: (numpy.ndarray, [str, ...])
+        @raise ValueError: if an attribute value is not numeric
+        """
+        import numpy as np
+        if rows not in ("parallelsentence", "translation"):
+            raise ValueError("Unknown kind of rows: {}".format(rows))
+        per_translation = (rows == "translation")
+        column_names = self.get_column_names(attribute_names, expressions, rows)
+        
+        if per_translation:
+            size = self._get_translation_count()
+        else:
+            size = self.get_size()
+        matrix = np.empty((size, len(column_names)), dtype=dtype)
+        
+        def get_value(attributes, name):
+            try:
+                return attributes[name]
+            except KeyError:
+                if missing is None:
+                    raise
+                return missing
+        
+        i = 0
+        for parallelsentence in self:
+            nested_attributes = parallelsentence._get_nested_attributes()
+            if not per_translation:
+                matrix[i] = [float(get_value(nested_attributes, name)) for name in column_names]
+                i += 1
+                continue
+            for translation in parallelsentence.get_translations():
+                translation_attributes = translation.get_attributes()
+                matrix[i] = [float(translation_attributes[name]) if name in translation_attributes 
+                             else float(get_value(nested_attributes, name)) for name in column_names]
+                i += 1
+        
+        if structured:
+            fields = [(name.encode("utf-8") if isinstance(name, unicode) else name, matrix.dtype) for name in column_names]
+            return matrix.view(fields).reshape(size), column_names
+        return matrix, column_names
             
     
     def clone(self):
@@ -371,15 +634,16 @@ class DataSet(object):
         """
         if not to:
             to = len(self.parallelsentences)-1
+        comparison_attributes = ("id", "testset", "langsrc")
         for ps1 in self.parallelsentences[start:to]:
-            for ps2 in other_dataset.get_parallelsentences():
-                if ps2.get_attributes()["id"] == ps1.get_attributes()["id"] and ps2.get_attributes()["testset"] == ps1.get_attributes()["testset"] and ps2.get_attributes()["langsrc"] == ps1.get_attributes()["langsrc"]:
-                    print ps1.get_source().get_string() , "\n",  ps2.get_source().get_string()
-                    print ps1.get_attributes() , "\n", ps2.get_attributes()
-                    print ps1.get_translations()[0].get_string() , "\n",  ps2.get_translations()[0].get_string()
-                    print ps1.get_translations()[0].get_attributes() , "\n",  ps2.get_translations()[0].get_attributes()
-                    print ps1.get_translations()[1].get_string() , "\n",  ps2.get_translations()[1].get_string()
-                    print ps1.get_translations()[1].get_attributes() , "\n",  ps2.get_translations()[1].get_attributes()
+            key = tuple([ps1.get_attribute(att) for att in comparison_attributes])
+            for ps2 in other_dataset.get_parallelsentences_by_attributes(comparison_attributes, key):
+                print ps1.get_source().get_string() , "\n",  ps2.get_source().get_string()
+                print ps1.get_attributes() , "\n", ps2.get_attributes()
+                print ps1.get_translations()[0].get_string() , "\n",  ps2.get_translations()[0].get_string()
+                print ps1.get_translations()[0].get_attributes() , "\n",  ps2.get_translations()[0].get_attributes()
+                print ps1.get_translations()[1].get_string() , "\n",  ps2.get_translations()[1].get_string()
+                print ps1.get_translations()[1].get_attributes() , "\n",  ps2.get_translations()[1].get_attributes()
             
 
 
@@ -0,0 +1,232 @@
+'''
+Dictionary encoding of discrete attributes. Each distinct value of an attribute gets an integer code
+and the values of the rows (parallel sentences or translations) are stored as arrays of codes, so that
+value sets, counts, groupings and filters can be computed as integer array operations
+
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+'''
+
+from array import array
+
+#the code of the rows where the attribute is missing
+MISSING = -1
+
+
+class EncodedColumn(object):
+    """
+    The dictionary-encoded values of one attribute
+    @ivar name: the name of the attribute
+    @type name: str
+    @ivar values: the distinct values of the attribute, in the order they were first encoded. The code of each value is its position
+    @type values: [str, ...]
+    @ivar codes: the code of the value of each row, or L{MISSING}
+    @type codes: array('i')
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.values = []
+        self.codes = array('i')
+        self._value_codes = {}
+
+    def append(self, value):
+        """
+        Add a row with the given value, or a missing value if it is None
+        """
+        code = self._value_codes.get(value)
+        if code is not None:
+            self.codes.append(code)
+        elif value is None:
+            self.codes.append(MISSING)
+        else:
+            code = len(self.values)
+            self._value_codes[value] = code
+            self.values.append(value)
+            self.codes.append(code)
+
+    def extend(self, values):
+        """
+        Add a row for each one of the given values, as in L{append}. The values
+        that appear for the first time get their codes in sorted order
+        @type values: [str, ...]
+        """
+        value_codes = self._value_codes
+        new_values = set(values)
+        new_values.discard(None)
+        new_values.difference_update(value_codes)
+        for value in sorted(new_values):
+            value_codes[value] = len(self.values)
+            self.values.append(value)
+        lookup = dict(value_codes)
+        lookup[None] = MISSING
+        self.codes.extend(array('i', map(lookup.__getitem__, values)))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def get_code(self, value):
+        """
+        @return: the code of the given value, or L{MISSING} if the value never appears
+        @rtype: int
+        """
+        return self._value_codes.get(value, MISSING)
+
+    def get_value(self, row):
+        """
+        @return: the value of the attribute in the given row, or None if it is missing
+        """
+        code = self.codes[row]
+        if code == MISSING:
+            return None
+        return self.values[code]
+
+    def get_values(self):
+        """
+        @return: the distinct values of the attribute
+        @rtype: set([str, ...])
+        """
+        return set(self.values)
+
+    def get_codes(self):
+        """
+        @return: a copy of the codes of the rows as a numpy array
+        @rtype: numpy.ndarray
+        """
+        import numpy as np
+        #not sharing the buffer, as the array may be reallocated when rows are appended.
+        #The items of array("i") are C ints, whatever their size on the platform
+        return np.frombuffer(self.codes, dtype=np.intc).copy()
+
+    def get_counts(self):
+        """
+        @return: how many rows have each one of the values
+        @rtype: {str: int, ...}
+        """
+        import numpy as np
+        codes = self.get_codes()
+        counts = np.bincount(codes[codes != MISSING], minlength=len(self.values))
+        return dict(zip(self.values, counts.tolist()))
+
+    def get_mask(self, values):
+        """
+        @param values: the accepted values
+        @type values: [str, ...]
+        @return: a boolean mask of the rows that have any of the given values
+        @rtype: numpy.ndarray
+        """
+        import numpy as np
+        accepted_codes = [self.get_code(value) for value in values]
+        accepted_codes = np.array([code for code in accepted_codes if code != MISSING], dtype=np.intc)
+        return np.in1d(self.get_codes(), accepted_codes)
+
+    def group_by(self):
+        """
+        @return: the positions of the rows that have each one of the values
+        @rtype: {str: numpy.ndarray, ...}
+        """
+        import numpy as np
+        codes = self.get_codes()
+        order = np.argsort(codes, kind="mergesort")
+        boundaries = np.searchsorted(codes[order], np.arange(len(self.values) + 1))
+        return dict([(value, order[boundaries[code]:boundaries[code + 1]]) for code, value in enumerate(self.values)])
+
+
+class EncodedAttributes(object):
+    """
+    The dictionary-encoded values of several attributes, over the same rows. The rows that get
+    appended are buffered and encoded in bulk when the columns are needed
+    @ivar size: the number of rows
+    @type size: int
+    """
+
+    def __init__(self, attribute_names):
+        self._columns = dict([(name, EncodedColumn(name)) for name in attribute_names])
+        self._pending = dict([(name, []) for name in attribute_names])
+        self._appenders = [(name, pending.append) for name, pending in self._pending.iteritems()]
+        self.size = 0
+        self._pending_rows = 0
+
+    def append(self, attributes, fallback_attributes = {}):
+        """
+        Add a row with the values of the given attributes
+        @param attributes: the attribute values of the row
+        @type attributes: {str: str, ...}
+        @param fallback_attributes: where to look for the values that are missing from the first dict
+        @type fallback_attributes: {str: str, ...}
+        """
+        if fallback_attributes:
+            for name, append in self._appenders:
+                value = attributes.get(name)
+                if value is None:
+                    value = fallback_attributes.get(name)
+                append(value)
+        else:
+            for name, append in self._appenders:
+                append(attributes.get(name))
+        self.size += 1
+        self._pending_rows += 1
+
+    @property
+    def columns(self):
+        """
+        The encoded values of each attribute
+        @rtype: {str: L{EncodedColumn}, ...}
+        """
+        if self._pending_rows:
+            for name, pending in self._pending.iteritems():
+                self._columns[name].extend(pending)
+                del pending[:]
+            self._pending_rows = 0
+        return self._columns
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __len__(self):
+        return self.size
+
+    def get_values(self):
+        """
+        @return: the distinct values of each attribute that appears in any of the rows
+        @rtype: {str: set([str, ...]), ...}
+        """
+        return dict([(name, column.get_values()) for name, column in self.columns.iteritems() if column.values])
+
+    def get_mask(self, **conditions):
+        """
+        @param conditions: the accepted value or values for each attribute name
+        @return: a boolean mask of the rows that fulfill all conditions
+        @rtype: numpy.ndarray
+        """
+        import numpy as np
+        mask = np.ones(self.size, dtype=bool)
+        for name, values in conditions.iteritems():
+            if isinstance(values, basestring):
+                values = [values]
+            mask &= self.columns[name].get_mask(values)
+        return mask
+
+    def filter(self, **conditions):
+        """
+        @param conditions: the accepted value or values for each attribute name
+        @return: the positions of the rows that fulfill all conditions
+        @rtype: numpy.ndarray
+        """
+        return self.get_mask(**conditions).nonzero()[0]
+
+    def group_by(self, name, **conditions):
+        """
+        @param name: the name of the attribute whose values define the groups
+        @type name: str
+        @param conditions: the accepted value or values for other attributes, so that only some rows are grouped
+        @return: the positions of the rows that have each one of the values of the attribute
+        @rtype: {str: numpy.ndarray, ...}
+        """
+        groups = self.columns[name].group_by()
+        if not conditions:
+            return groups
+        mask = self.get_mask(**conditions)
+        groups = [(value, rows[mask[rows]]) for value, rows in groups.iteritems()]
+        return dict([(value, rows) for value, rows in groups if len(rows)])
@@ -0,0 +1,129 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Simple sentences whose text stays in the file they were read from, until it is needed.
+
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+"""
+
+import mmap
+from xml.parsers import expat
+from xml.sax.saxutils import unescape
+from sentence import SimpleSentence, deepcopy_attributes
+
+
+class MappedFile(object):
+    """
+    A read-only memory map of a file, shared by all the lazy sentences that were read from it.
+    The file is mapped upon the first access, so that the object can be pickled and sent to
+    other processes, as long as the file remains in place
+    """
+
+    def __init__(self, filename, encoding = None):
+        """
+        @param filename: the name of the file
+        @type filename: str
+        @param encoding: the encoding of the XML file, if not utf-8
+        @type encoding: str
+        """
+        self.filename = filename
+        self.encoding = encoding
+        self._map = None
+
+    def read(self, offset, length):
+        """
+        @return: the given range of bytes of the file
+        @rtype: str
+        """
+        if self._map is None:
+            mapped_file = open(self.filename, 'rb')
+            try:
+                self._map = mmap.mmap(mapped_file.fileno(), 0, access=mmap.ACCESS_READ)
+            finally:
+                mapped_file.close()
+        return self._map[offset:offset + length]
+
+    def get_text(self, offset, length):
+        """
+        Parse the given range of the XML file as the content of an element
+        @return: the text contained in the range, with the character references and the CDATA sections resolved
+        @rtype: unicode
+        """
+        text = []
+        parser = expat.ParserCreate(self.encoding)
+        parser.buffer_text = True
+        parser.CharacterDataHandler = text.append
+        parser.Parse("<text>", False)
+        parser.Parse(self.read(offset, length), False)
+        parser.Parse("</text>", True)
+        return u"".join(text)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __getstate__(self):
+        return {"filename": self.filename, "encoding": self.encoding}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._map = None
+
+
+class LazySimpleSentence(SimpleSentence):
+    """
+    A simple sentence that only keeps the position of its text in the XML file. The text is decoded
+    and unescaped upon the first access, the same way L{IterJcmlReader} would do when reading it,
+    so that workflows that only need the attributes don't keep all the strings in memory
+    """
+
+    def __init__(self, source, offset, length, attributes = {}, copy_attributes = True):
+        """
+        @param source: the file the sentence was read from
+        @type source: L{MappedFile}
+        @param offset: the position of the content of the XML element in the file, in bytes
+        @type offset: int
+        @param length: the length of the content of the XML element, in bytes
+        @type length: int
+        @param attributes: a dictionary of arguments that describe properties of the simple sentence
+        @type attributes: {String key, String value}
+        @param copy_attributes: whether the attributes should be deep-copied, as in L{SimpleSentence}
+        @type copy_attributes: boolean
+        """
+        self.source = source
+        self.offset = offset
+        self.length = length
+        self._string = None
+        if copy_attributes:
+            #avoid getting a shallow reference to the attributes in the dict
+            attributes = deepcopy_attributes(attributes)
+        self.attributes = attributes
+
+    def _get_string(self):
+        if self._string is None:
+            #same as the readers: unescape once more and avoid tabs
+            text = self.source.get_text(self.offset, self.length)
+            self._string = unescape(text.strip()).replace("\t", "  ")
+        return self._string
+
+    def _set_string(self, string):
+        self._string = string
+
+    string = property(_get_string, _set_string)
+
+    def is_loaded(self):
+        """
+        @return: whether the text of the sentence has already been read from the file
+        @rtype: boolean
+        """
+        return self._string is not None
+
+    def __deepcopy__(self, memo):
+        #the memory map is shared, not copied
+        copied = LazySimpleSentence(self.source, self.offset, self.length, self.attributes)
+        copied._string = self._string
+        return copied
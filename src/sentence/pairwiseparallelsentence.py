@@ -0,0 +1,66 @@
+"""
+@author: Eleftherios Avramidis
+"""
+
+from parallelsentence import ParallelSentence
+
+class PairwiseParallelSentence(ParallelSentence):
+    """
+    A parallel sentence that contains the output of exactly two systems,
+    along with a pairwise rank that compares them
+    @ivar systems: the names of the two systems, in the order of the translations
+    @type systems: (str, str)
+    """
+
+    def __init__(self, source, translations, systems, reference = None, attributes = {}, rank_name = "rank", **kwargs):
+        """
+        Constructor
+        @type source SimpleSentence
+        @param source The source text of the parallel sentence
+        @type translations tuple ( SimpleSentence, SimpleSentence )
+        @param translations The pair of translations to be compared
+        @type systems tuple ( str, str )
+        @param systems The names of the systems that produced the two translations
+        @type reference SimpleSentence
+        @param reference The desired translation provided by the system
+        @type attributes dict { String name , String value }
+        @param the attributes that describe the parallel sentence
+        @keyword invert_ranks: Whether the pairwise rank should be inverted
+        @type invert_ranks: boolean
+        """
+        invert_ranks = kwargs.pop("invert_ranks", False)
+        super(PairwiseParallelSentence, self).__init__(source, list(translations), reference, attributes, rank_name, **kwargs)
+        self.systems = tuple(systems)
+        self.attributes["system1"], self.attributes["system2"] = self.systems
+        rank = pairwise_rank(translations[0], translations[1], rank_name, invert_ranks)
+        if rank is not None:
+            self.attributes[rank_name] = str(rank)
+
+    def get_systems(self):
+        return self.systems
+
+
+def pairwise_rank(translation1, translation2, rank_name = "rank", invert_ranks = False):
+    """
+    Compare the ranks of two translations
+    @param translation1: the first translation of the pair
+    @type translation1: L{SimpleSentence}
+    @param translation2: the second translation of the pair
+    @type translation2: L{SimpleSentence}
+    @param rank_name: the name of the rank attribute of the translations
+    @type rank_name: str
+    @param invert_ranks: whether the result should be inverted
+    @type invert_ranks: boolean
+    @return: -1 if the first translation is ranked better (lower), 1 if the second one is
+    ranked better, 0 for ties and None if any of the two has no rank
+    @rtype: int
+    """
+    try:
+        rank1 = float(translation1.get_attribute(rank_name))
+        rank2 = float(translation2.get_attribute(rank_name))
+    except KeyError:
+        return None
+    rank = cmp(rank1, rank2)
+    if invert_ranks:
+        rank = -rank
+    return rank
@@ -0,0 +1,166 @@
+"""
+Lazy view over the pairwise combinations of the translations of a parallel sentence
+
+@author: Eleftherios Avramidis
+"""
+
+from array import array
+from pairwiseparallelsentence import PairwiseParallelSentence
+
+class PairwiseView(object):
+    """
+    A lazy sequence of the pairs of translations contained in one parallel sentence.
+    Only the indexes of the paired translations are stored; the pairwise parallel sentences
+    are only built when accessed.
+    @ivar parallelsentence: the parallel sentence whose translations are paired
+    @type parallelsentence: L{ParallelSentence}
+    @ivar translations: the translations that participate in the pairs, after filtering
+    @type translations: [L{SimpleSentence}, ...]
+    @ivar first: the indexes (in translations) of the first item of each pair
+    @type first: array
+    @ivar second: the indexes (in translations) of the second item of each pair
+    @type second: array
+    """
+
+    def __init__(self, parallelsentence, replacement = True, **kwargs):
+        """
+        @param parallelsentence: the parallel sentence whose translations are to be paired
+        @type parallelsentence: L{ParallelSentence}
+        @param replacement: If enabled, creates pairs with all possible combinations with replacement
+        @type replacement: boolean
+        @keyword include_references: Include references as system translations from system "_ref" and lowest rank
+        @type include_references: boolean
+        @keyword filter_unassigned: If enabled, it filters out pairs with rank = "-1", which means no value was assigned
+        @type filter_unassigned: boolean
+        @keyword restrict_ranks: Keep only the pairs that include at least one of the given ranks. Don't filter if list empty
+        @type restrict_ranks: [int, ...]
+        @keyword invert_ranks: Invert the pairwise rank of the materialized pairs
+        @type invert_ranks: boolean
+        @keyword rank_name: the name of the rank attribute
+        @type rank_name: str
+        """
+        self.parallelsentence = parallelsentence
+        self.replacement = kwargs.setdefault("replacement", replacement)
+        self.invert_ranks = kwargs.setdefault("invert_ranks", [])
+        self.rank_name = kwargs.setdefault("rank_name", parallelsentence.rank_name)
+        include_references = kwargs.setdefault("include_references", False)
+        restrict_ranks = set([float(rank) for rank in kwargs.setdefault("restrict_ranks", [])])
+        own_rank_name = parallelsentence.rank_name
+
+        translations = list(parallelsentence.get_translations())
+        if kwargs.setdefault("filter_unassigned", False):
+            translations = [t for t in translations if t.get_attribute(own_rank_name) != "-1"]
+
+        #references are added as translations by system named _ref
+        #only single references supported at the moment
+        if include_references:
+            if "_ref" not in parallelsentence.get_target_attribute_values("system"):
+                reference = parallelsentence.get_reference()
+                reference.add_attribute("system", "_ref")
+                #get a rank value lower than all the existing ones and assign it to references
+                min_rank = min([float(t.get_attribute(own_rank_name)) for t in translations]) - 1
+                reference.add_attribute(own_rank_name, str(int(min_rank)))
+                translations.append(reference)
+        self.translations = translations
+
+        if restrict_ranks:
+            ranks = [float(t.get_attribute(self.rank_name)) for t in translations]
+            allowed = lambda a, b: ranks[a] in restrict_ranks or ranks[b] in restrict_ranks
+        else:
+            allowed = lambda a, b: True
+
+        #every translation is paired with the ones preceding it
+        first = array('i')
+        second = array('i')
+        for a in xrange(len(translations)):
+            for b in xrange(a):
+                if not allowed(a, b):
+                    continue
+                first.append(a)
+                second.append(b)
+                if self.replacement:
+                    first.append(b)
+                    second.append(a)
+        self.first = first
+        self.second = second
+
+    def __len__(self):
+        return len(self.first)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in xrange(*index.indices(len(self)))]
+        return self._materialize(self.first[index], self.second[index])
+
+    def __iter__(self):
+        for a, b in self.get_index_pairs():
+            yield self._materialize(a, b)
+
+    def get_index_pairs(self):
+        """
+        @return: the indexes of the paired translations, in the order of the pairs
+        @rtype: [(int, int), ...]
+        """
+        return zip(self.first, self.second)
+
+    def get_system_pairs(self):
+        """
+        @return: the system names of the paired translations, in the order of the pairs
+        @rtype: [(str, str), ...]
+        """
+        systems = [t.get_attribute("system") for t in self.translations]
+        return [(systems[a], systems[b]) for a, b in self.get_index_pairs()]
+
+    def _materialize(self, a, b):
+        ps = self.parallelsentence
+        targets = (self.translations[a], self.translations[b])
+        systems = (targets[0].get_attribute("system"), targets[1].get_attribute("system"))
+        return PairwiseParallelSentence(ps.get_source(),
+                                        targets,
+                                        systems,
+                                        ps.get_reference(),
+                                        ps.get_attributes(),
+                                        self.rank_name,
+                                        invert_ranks = self.invert_ranks)
+
+    def get_labels(self):
+        """
+        Compute the pairwise rank of every pair without building the pairs.
+        @return: -1 where the first translation is better, 1 where the second one is better, 0 for ties
+        @rtype: array
+        @raise KeyError: if a translation has no rank
+        """
+        ranks = [float(t.get_attribute(self.rank_name)) for t in self.translations]
+        sign = -1 if self.invert_ranks else 1
+        labels = array('i')
+        for a, b in self.get_index_pairs():
+            labels.append(sign * cmp(ranks[a], ranks[b]))
+        return labels
+
+    def get_matrices(self, attribute_names, dtype = float, missing = float("nan")):
+        """
+        Export the pairs as a feature matrix and a label vector for training.
+        Each row contains the values of the given attributes of the first translation,
+        followed by the values of the same attributes of the second translation
+        @param attribute_names: the names of the translation attributes to be used as features
+        @type attribute_names: [str, ...]
+        @param dtype: the type of the values of the feature matrix
+        @param missing: the value to be used where an attribute is missing from a translation
+        @type missing: float
+        @return: the feature matrix of shape (pairs, 2 * attributes) and the label vector
+        @rtype: (numpy.ndarray, numpy.ndarray)
+        """
+        import numpy as np
+        width = len(attribute_names)
+        values = np.empty((len(self.translations), width), dtype=dtype)
+        for i, translation in enumerate(self.translations):
+            attributes = translation.get_attributes()
+            values[i] = [float(attributes.get(name, missing)) for name in attribute_names]
+
+        first = np.array(self.first, dtype=np.intp)
+        second = np.array(self.second, dtype=np.intp)
+        features = np.empty((len(self), 2 * width), dtype=dtype)
+        features[:, :width] = values[first]
+        features[:, width:] = values[second]
+        labels = np.array(self.get_labels(), dtype=np.int8)
+        return features, labels
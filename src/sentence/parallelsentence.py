@@ -2,22 +2,67 @@
 @author: Eleftherios Avramidis
 """
 
-from copy import deepcopy
 import re
 import sys
 from ranking import Ranking
+from sentence import AttributeHolder, SentenceList, View, deepcopy_attributes, replace_attribute_names
 
-class ParallelSentence(object):
+#the prefixed names of the nested attributes, shared by all parallel sentences {(prefix, name): prefixed_name}
+_PREFIXED_NAMES = {}
+#where each prefixed name came from {prefixed_name: (prefix, target_index, name)}, or None if not prefixed
+_NESTED_NAMES = {}
+_TARGET_PREFIX = re.compile("tgt-([0-9]+)_(.*)$")
+
+
+def _get_prefixed_name(prefix, name):
+    """
+    @return: the name of the nested attribute, as it appears among the attributes of the parallel sentence
+    @rtype: str
+    """
+    key = (prefix, name)
+    try:
+        return _PREFIXED_NAMES[key]
+    except KeyError:
+        prefixed_name = "_".join(key)
+        _PREFIXED_NAMES[key] = prefixed_name
+        return prefixed_name
+
+
+def _get_nested_name(attribute_name):
+    """
+    @return: the prefix, the index of the target sentence (if any) and the original name
+    of a prefixed attribute name, or None if the attribute does not belong to a nested sentence
+    @rtype: (str, int, str)
+    """
+    try:
+        return _NESTED_NAMES[attribute_name]
+    except KeyError:
+        nested_name = None
+        if attribute_name.startswith("src_"):
+            nested_name = ("src", None, attribute_name[4:])
+        elif attribute_name.startswith("ref_"):
+            nested_name = ("ref", None, attribute_name[4:])
+        else:
+            target_attribute = _TARGET_PREFIX.match(attribute_name)
+            if target_attribute:
+                nested_name = ("tgt", int(target_attribute.group(1)) - 1, target_attribute.group(2))
+        _NESTED_NAMES[attribute_name] = nested_name
+        return nested_name
+
+
+class ParallelSentence(AttributeHolder):
     """
     A parallel sentence, that contains a source sentence, 
     a number of target sentences, a reference and some attributes
     @ivar src: the source sentence
     @type src: SimpleSentence
     @ivar tgt: a list of target sentences / translations
-    @type tgt: [SimpleSentence, ...]
+    @type tgt: L{SentenceList}
     @ivar ref: a reference translation
     @type ref: SimpleSentence
     """
+    _nested_cache = None
+    _system_index = None
     
 
     def __init__(self, source, translations, reference = None, attributes = {}, rank_name = "rank", **kwargs):
@@ -33,11 +78,16 @@ class ParallelSentence(object):
         @param the attributes that describe the parallel sentence
         @keyword sort_translations: Whether translations should be sorted based on the system name
         @type sort_translations: boolean 
+        @keyword copy_attributes: Whether the attributes should be deep-copied (default). Readers that 
+        have just parsed the attributes may skip the copy, as nothing else refers to them
+        @type copy_attributes: boolean
         """
         self.src = source 
         self.tgt = translations
         self.ref = reference
-        self.attributes = deepcopy (attributes)
+        if kwargs.setdefault("copy_attributes", True):
+            attributes = deepcopy_attributes(attributes)
+        self.attributes = attributes
         self.rank_name = rank_name
         if kwargs.setdefault("sort_translations", False):
             self.tgt = sorted(translations, key=lambda t: t.get_attribute("system"))
@@ -49,6 +99,26 @@ class ParallelSentence(object):
         except KeyError:
             sys.exit('Source or target language not specified in parallelsentence: [{}]'.format(self.__str__()))
     
+    def _get_tgt(self):
+        return self._tgt
+    
+    def _set_tgt(self, translations):
+        previous = self.__dict__.get("_tgt")
+        if type(translations) is not SentenceList:
+            translations = SentenceList(translations)
+        self._tgt = translations
+        if previous is not None and previous is not translations:
+            previous._notify()
+    
+    tgt = property(_get_tgt, _set_tgt)
+    
+    def __getstate__(self):
+        #the copies have nothing built on them yet
+        state = dict(self.__dict__)
+        state.pop("_nested_cache", None)
+        state.pop("_system_index", None)
+        return state
+    
     def __str__(self):
         return [s.__str__() for s in self.serialize()]
         
@@ -177,6 +247,66 @@ class ParallelSentence(object):
     def set_translations(self, tgt):
         self.tgt = tgt
     
+    def _get_system_index(self):
+        """
+        Provide the index of the translations per system. The index is cached and only rebuilt
+        after the translations have been replaced, added or removed, or their attributes have been modified
+        @return: the translations produced by each system
+        @rtype: {str: [SimpleSentence, ...], ...}
+        """
+        cache = self._system_index
+        if cache is not None and cache[0].valid:
+            return cache[1]
+        
+        view = View()
+        self.tgt.add_observer(view)
+        index = {}
+        for translation in self.tgt:
+            translation.attributes.add_observer(view)
+            try:
+                index.setdefault(translation.get_attribute("system"), []).append(translation)
+            except KeyError:
+                pass
+        self._system_index = (view, index)
+        return index
+    
+    def add_systems_observer(self, view):
+        """
+        @param view: a view built on the systems of the translations, to be invalidated 
+        when the translations or their attributes get modified
+        @type view: L{View}
+        """
+        self._get_system_index()
+        self._system_index[0].add_observer(view)
+    
+    def get_translations_by_system(self, system):
+        """
+        Provide the translations produced by a particular system
+        @param system: the name of the system
+        @type system: str
+        @return: the translations of the system, in the order they appear
+        @rtype: [SimpleSentence, ...]
+        """
+        return list(self._get_system_index().get(system, []))
+    
+    def get_translation_by_system(self, system):
+        """
+        Provide the translation produced by a particular system
+        @param system: the name of the system
+        @type system: str
+        @return: the first translation of the system
+        @rtype: SimpleSentence
+        @raise KeyError: if there is no translation from this system
+        """
+        return self._get_system_index()[system][0]
+    
+    def get_systems(self):
+        """
+        @return: the names of the systems that produced the contained translations
+        @rtype: set([str, ...])
+        """
+        return set(self._get_system_index().keys())
+    
     def get_reference(self):
         return self.ref
     
@@ -201,23 +331,46 @@ class ParallelSentence(object):
         """
         function that gathers all the features of the nested sentences 
         to the parallel sentence object, by prefixing their names accordingly
+        @return: a copy of the attributes of the parallel sentence, along with the prefixed attributes
+        of the source (src_), the target (tgt-1_, tgt-2_ etc.) and the reference (ref_) sentences
+        @rtype: {str: str, ...}
+        """
+        return dict(self._get_nested_attributes())
+    
+    def _get_nested_attributes(self):
+        """
+        Provide the flattened attributes, as built by L{get_nested_attributes}. They are cached and 
+        only rebuilt after the attributes of the parallel sentence or of its nested sentences have
+        been modified, or after the nested sentences have been replaced. Not to be modified
+        @rtype: {str: str, ...}
         """
+        cache = self._nested_cache
+        if cache is not None:
+            view, src, ref, nested_attributes = cache
+            if view.valid and src is self.src and ref is self.ref:
+                return nested_attributes
         
-        new_attributes = deepcopy (self.attributes)
-        new_attributes.update( self._prefix(self.src.get_attributes(), "src") )
+        view = View()
+        self.attributes.add_observer(view)
+        self.tgt.add_observer(view)
+        nested_attributes = dict(self.attributes)
+        self.src.attributes.add_observer(view)
+        nested_attributes.update( self._prefix(self.src.get_attributes(), "src") )
         i=0
         for tgtitem in self.tgt:
             i += 1
-            prefixeditems = self._prefix( tgtitem.get_attributes(), "tgt-%d" % i )
-            #prefixeditems = self._prefix( tgtitem.get_attributes(), tgtitem.get_attributes()["system"] )
-            new_attributes.update( prefixeditems )
-
-        try:
-            new_attributes.update( self._prefix( self.ref.get_attributes(), "ref" ) )
-        except:
-            pass
-        return new_attributes
-
+            tgtitem.attributes.add_observer(view)
+            nested_attributes.update( self._prefix( tgtitem.get_attributes(), "tgt-%d" % i ) )
+        
+        if self.ref is not None:
+            try:
+                nested_attributes.update( self._prefix( self.ref.get_attributes(), "ref" ) )
+                self.ref.attributes.add_observer(view)
+            except AttributeError:
+                pass
+        
+        self._nested_cache = (view, self.src, self.ref, nested_attributes)
+        return nested_attributes
 
     def recover_attributes(self):
         """
@@ -226,25 +379,17 @@ class ParallelSentence(object):
         """
         
         for attribute_name in self.attributes.keys():
-            attribute_value =  self.attributes[attribute_name] 
-            if (attribute_name.find('_') > 0) :
-
-                src_attribute = re.match("src_(.*)", attribute_name)
-                if src_attribute:
-                    self.src.add_attribute(src_attribute.group(1), attribute_value)
-                    del self.attributes[attribute_name]
-                
-                ref_attribute = re.match("ref_(.*)", attribute_name)
-                if ref_attribute:
-                    self.src.add_attribute(ref_attribute.group(1), attribute_value)
-                    del self.attributes[attribute_name]
-                
-                tgt_attribute = re.match("tgt-([0-9]*)_(.*)", attribute_name)
-                if tgt_attribute:
-                    index = int(tgt_attribute.group(1)) - 1
-                    new_attribute_name = tgt_attribute.group(2)
-                    self.tgt[index].add_attribute(new_attribute_name, attribute_value)
-                    del self.attributes[attribute_name]
+            nested_name = _get_nested_name(attribute_name)
+            if not nested_name:
+                continue
+            prefix, index, new_attribute_name = nested_name
+            attribute_value = self.attributes.pop(attribute_name)
+            if prefix == "src":
+                self.src.add_attribute(new_attribute_name, attribute_value)
+            elif prefix == "ref":
+                self.ref.add_attribute(new_attribute_name, attribute_value)
+            else:
+                self.tgt[index].add_attribute(new_attribute_name, attribute_value)
 
     
     def serialize(self):
@@ -255,11 +400,7 @@ class ParallelSentence(object):
         
         
     def _prefix(self, listitems, prefix):
-        newlistitems = {}
-        for item_key in listitems.keys():
-            new_item_key = "_".join([prefix, item_key]) 
-            newlistitems[new_item_key] = listitems[item_key]
-        return newlistitems
+        return dict([(_get_prefixed_name(prefix, item_key), value) for item_key, value in listitems.iteritems()])
     
 
     def merge_parallelsentence(self, ps, attribute_replacements = {}, **kwargs):
@@ -276,15 +417,7 @@ class ParallelSentence(object):
         add_missing = kwargs.setdefault("add_missing", True)
         
         #merge attributes on the ParallelSentence level and do the replacements
-        incoming_attributes = ps.get_attributes()
-        for incoming_attribute in incoming_attributes:
-            if incoming_attribute in attribute_replacements:
-                new_key = attribute_replacements[incoming_attribute]
-                new_value = incoming_attributes[incoming_attribute]
-                incoming_attributes[new_key] = new_value
-                del(incoming_attributes[incoming_attribute])            
-        
-        self.attributes.update(incoming_attributes)
+        self.attributes.update(replace_attribute_names(ps.get_attributes(), attribute_replacements))
         
         #merge source sentence
         self.src.merge_simplesentence(ps.get_source(), attribute_replacements)
@@ -296,18 +429,18 @@ class ParallelSentence(object):
             pass
         
         #loop over the contained target sentences. Merge those with same system attribute and append those missing
-
+        system_index = self._get_system_index()
         for tgtPS in ps.get_translations():
             system = tgtPS.get_attribute("system")
-            merged = False
-            for i in range(len(self.tgt)):
-                if self.tgt[i].attributes["system"] == system:
-                    self.tgt[i].merge_simplesentence(tgtPS, attribute_replacements)
-                    merged = True
-            if not merged and add_missing:
+            translations = system_index.get(system)
+            if translations:
+                for translation in translations:
+                    translation.merge_simplesentence(tgtPS, attribute_replacements)
+            elif add_missing:
                 #print tgtPS.get_attributes(), "not merged - unknown system!"
                 print "Target sentence was missing. Adding..."
                 self.tgt.append(tgtPS)
+                system_index[system] = [tgtPS]
 
 
     def get_pairwise_parallelsentences(self, replacement = True, **kwargs):
@@ -332,60 +465,19 @@ class ParallelSentence(object):
         @type p: a list of PairwiseParallelSentence() objects
         
         """
-        from pairwiseparallelsentence import PairwiseParallelSentence
-        
-        replacement = kwargs.setdefault("replacement", replacement)
-        include_references = kwargs.setdefault("include_references", False)
-        restrict_ranks = kwargs.setdefault("restrict_ranks", [])
-        invert_ranks = kwargs.setdefault("invert_ranks", [])
-        rank_name = kwargs.setdefault("rank_name", self.rank_name)
-        
-        systems = []
-        targets = []
-        systems_list = []
-        targets_list = []
-        
-        translations = self.get_translations()
-        if kwargs.setdefault('filter_unassigned', False):
-            translations = [t for t in self.get_translations() if t.get_attribute(self.rank_name) != "-1"]    
+        return list(self.get_pairwise_view(replacement, **kwargs))
 
-        #this is used in case we want to include references in the pairwising
-        #references are added as translations by system named _ref
-        #only single references supported at the moment
-        if include_references:
-            if "_ref" not in self.get_target_attribute_values("system"):    
-                reference = self.get_reference()
-                reference.add_attribute("system", "_ref")   
-                #get a rank value lower than all the existing ones and assign it to references
-                min_rank = min([float(t.get_attribute(self.rank_name)) for t in translations]) - 1 
-                reference.add_attribute(self.rank_name, str(int(min_rank)))
-                translations.append(reference)
-                    
-        #@todo: rewrite this function in more efficient way
-        for targetA in translations:
-            system_nameA = targetA.get_attribute('system')
-            for system_nameB in systems_list:
-                systems.append((system_nameA, system_nameB))
-                if replacement:
-                    systems.append((system_nameB, system_nameA))
-            for targetB in targets_list:
-                targets.append((targetA, targetB))
-                if replacement:
-                    targets.append((targetB, targetA))
-            systems_list.append(system_nameA)
-            targets_list.append(targetA)
-
-        pps_list = [PairwiseParallelSentence(self.get_source(), 
-                                             targets[i], 
-                                             systems[i], 
-                                             self.ref, 
-                                             self.attributes, 
-                                             rank_name, 
-                                             invert_ranks = invert_ranks
-                                             ) \
-                        for i in range(len(systems))
-                    ]
-        return pps_list
+    def get_pairwise_view(self, replacement = True, **kwargs):
+        """
+        Provide the pairs of the contained translations lazily, without building a 
+        pairwise parallel sentence for each one of them. The pairs are only materialized 
+        when accessed. Accepts the same arguments as L{get_pairwise_parallelsentences}
+        @return: a sequence of the pairwise parallel sentences, in the same order as 
+        L{get_pairwise_parallelsentences} would produce them
+        @rtype: L{PairwiseView}
+        """
+        from pairwiseview import PairwiseView
+        return PairwiseView(self, replacement, **kwargs)
 
     def remove_ties(self):
         """
@@ -400,7 +492,7 @@ class ParallelSentence(object):
             if prev_rank != rank:
                 remaining_translations.append(translation)
                 prev_rank = rank    
-        self.tgt = remaining_translations
+        self.set_translations(remaining_translations)
             
             
 
@@ -7,26 +7,232 @@
 
 from copy import deepcopy
 
-class SimpleSentence(object):
+
+#the types of attribute values that are immutable, so that a deep copy can share them
+_IMMUTABLE_TYPES = frozenset([str, unicode, int, long, float, bool, type(None)])
+
+
+def _add_observer(observers, view):
+    #the views that have been invalidated in the meantime are dropped, as they won't be used again
+    if observers is None:
+        return [view]
+    observers = [observer for observer in observers if observer.valid and observer is not view]
+    observers.append(view)
+    return observers
+
+
+class View(object):
+    """
+    The validity of something built on the attributes of sentences, e.g. the flattened attributes
+    of a parallel sentence or the indexes of a data set. The view gets registered with everything
+    it depends on, which invalidate it when they get modified, so that checking whether it is still
+    valid costs nothing. Views may in turn be observed by other views, which get invalidated along
+    @ivar valid: whether nothing the view depends on has been modified since it was built
+    @type valid: boolean
+    """
+    __slots__ = ("valid", "_observers")
+
+    def __init__(self):
+        self.valid = True
+        self._observers = None
+
+    def add_observer(self, view):
+        """
+        @param view: a view to be invalidated along with this one
+        @type view: L{View}
+        """
+        if not self.valid:
+            view.invalidate()
+        else:
+            self._observers = _add_observer(self._observers, view)
+
+    def invalidate(self):
+        if self.valid:
+            self.valid = False
+            observers = self._observers
+            self._observers = None
+            if observers:
+                for observer in observers:
+                    observer.invalidate()
+
+
+class AttributeDict(dict):
+    """
+    The attributes of a sentence, as a dictionary that invalidates the views built on it when it
+    gets modified, also when it is modified directly. A dictionary that nothing has been built on
+    costs as much as a plain one, except for its modifications, which are rare
+    """
+    __slots__ = ("_observers",)
+
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+        self._observers = None
+
+    def add_observer(self, view):
+        """
+        @param view: a view built on these attributes, to be invalidated when they get modified
+        @type view: L{View}
+        """
+        self._observers = _add_observer(self._observers, view)
+
+    def _notify(self):
+        observers = self._observers
+        if observers:
+            self._observers = None
+            for observer in observers:
+                observer.invalidate()
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self._notify()
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._notify()
+
+    def update(self, *args, **kwargs):
+        dict.update(self, *args, **kwargs)
+        self._notify()
+
+    def setdefault(self, key, default = None):
+        if key not in self:
+            dict.__setitem__(self, key, default)
+            self._notify()
+        return dict.__getitem__(self, key)
+
+    def pop(self, *args):
+        value = dict.pop(self, *args)
+        self._notify()
+        return value
+
+    def popitem(self):
+        item = dict.popitem(self)
+        self._notify()
+        return item
+
+    def clear(self):
+        dict.clear(self)
+        self._notify()
+
+    def __reduce__(self):
+        #the copies have nothing built on them yet
+        return (AttributeDict, (dict(self),))
+
+    def __deepcopy__(self, memo):
+        return AttributeDict(deepcopy(dict(self), memo))
+
+
+class SentenceList(list):
+    """
+    A list of sentences, e.g. the translations of a parallel sentence or the parallel sentences of a
+    data set, which invalidates the views built on it when sentences get added, removed or replaced
+    """
+    __slots__ = ("_observers",)
+
+    def __init__(self, *args):
+        list.__init__(self, *args)
+        self._observers = None
+
+    def add_observer(self, view):
+        """
+        @param view: a view built on the sentences of the list, to be invalidated when the list gets modified
+        @type view: L{View}
+        """
+        self._observers = _add_observer(self._observers, view)
+
+    def remove_observer(self, view):
+        if self._observers:
+            self._observers = [observer for observer in self._observers if observer is not view]
+
+    def _notify(self):
+        observers = self._observers
+        if observers:
+            self._observers = None
+            for observer in observers:
+                observer.invalidate()
+
+    def __reduce__(self):
+        return (SentenceList, (list(self),))
+
+    def __deepcopy__(self, memo):
+        return SentenceList(deepcopy(list(self), memo))
+
+
+def _notifying(name):
+    method = getattr(list, name)
+    def notifying(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self._notify()
+        return result
+    notifying.__name__ = name
+    return notifying
+
+for _name in ["__setitem__", "__delitem__", "__setslice__", "__delslice__", "__iadd__", "__imul__",
+              "append", "extend", "insert", "pop", "remove", "reverse", "sort"]:
+    setattr(SentenceList, _name, _notifying(_name))
+
+
+def deepcopy_attributes(attributes):
+    """
+    @param attributes: the attributes of a sentence
+    @type attributes: dict
+    @return: a deep copy of the attributes. Their values are usually strings, which are immutable
+    and therefore shared instead of going through deepcopy
+    @rtype: L{AttributeDict}
+    """
+    for value in attributes.itervalues():
+        if type(value) not in _IMMUTABLE_TYPES:
+            return AttributeDict(deepcopy(dict(attributes)))
+    return AttributeDict(attributes)
+
+
+class AttributeHolder(object):
+    """
+    Base of the sentences, which keeps their attributes in an L{AttributeDict}, also when they get
+    replaced by assigning a plain dictionary. A replacement invalidates the views built on the
+    previous attributes
+    @ivar attributes: the attributes of the sentence
+    @type attributes: L{AttributeDict}
+    """
+
+    def _get_attributes(self):
+        return self._attributes
+
+    def _set_attributes(self, attributes):
+        previous = self.__dict__.get("_attributes")
+        if type(attributes) is not AttributeDict:
+            attributes = AttributeDict(attributes)
+        self._attributes = attributes
+        if previous is not None and previous is not attributes:
+            previous._notify()
+
+    attributes = property(_get_attributes, _set_attributes)
+
+
+class SimpleSentence(AttributeHolder):
     """
     A simple (shallow) sentence object, which wraps both a sentence and its attributes
     """
 
 
-    def __init__(self, string="", attributes={}):
+    def __init__(self, string="", attributes={}, copy_attributes=True):
         """
         Initializes a simple (shallow) sentence object, which wraps both a sentence and its attributes
         @param string: the string that the simple sentence will consist of
         @type string: string
         @param attributes: a dictionary of arguments that describe properties of the simple sentence
         @type attributes: {String key, String value}
-        
+        @param copy_attributes: whether the attributes should be deep-copied. Readers that have
+        just parsed the attributes may skip the copy, as nothing else refers to them
+        @type copy_attributes: boolean
         """
         
         #avoid tabs
         self.string = string.replace("\t", "  ")
-        #avoid getting a shallow reference to the attributes in the dict
-        self.attributes = deepcopy (attributes) 
+        if copy_attributes:
+            #avoid getting a shallow reference to the attributes in the dict
+            attributes = deepcopy_attributes(attributes)
+        self.attributes = attributes
     
     
 #    def __gt__(self, other):
@@ -83,13 +289,20 @@ class SimpleSentence(object):
         @type attr: dict 
         """
         
-        incoming_attributes = ss.get_attributes()
-        for incoming_attribute in incoming_attributes:
-            if incoming_attribute in attribute_replacements:
-                new_key = attribute_replacements[incoming_attribute]
-                new_value = incoming_attributes[incoming_attribute]
-                incoming_attributes[new_key] = new_value
-                del(incoming_attributes[incoming_attribute])     
-        
-        self.attributes.update(incoming_attributes)
-        self.string = ss.string
\ No newline at end of file
+        self.attributes.update(replace_attribute_names(ss.get_attributes(), attribute_replacements))
+        self.string = ss.string
+
+
+def replace_attribute_names(attributes, attribute_replacements):
+    """
+    Rename the attributes as specified, without modifying the given dictionary
+    @param attributes: the attributes to be renamed
+    @type attributes: dict
+    @param attribute_replacements: the new name for each one of the attribute names that need to be replaced
+    @type attribute_replacements: {str: str, ...}
+    @return: the attributes with the new names 
+    @rtype: dict
+    """
+    if not attribute_replacements:
+        return attributes
+    return dict([(attribute_replacements.get(key, key), value) for key, value in attributes.iteritems()])
@@ -0,0 +1,454 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+"""
+
+import re
+import sqlite3
+import sys
+from itertools import islice
+from dataset import DataSet
+from parallelsentence import ParallelSentence
+from sentence import SimpleSentence
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS parallelsentence (
+    ps INTEGER PRIMARY KEY,
+    id TEXT,
+    testset TEXT,
+    judgement_id TEXT
+);
+CREATE TABLE IF NOT EXISTS ps_attribute (
+    ps INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    value,
+    PRIMARY KEY (ps, name)
+);
+CREATE TABLE IF NOT EXISTS sentence (
+    sentence INTEGER PRIMARY KEY,
+    ps INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    string TEXT,
+    system TEXT
+);
+CREATE TABLE IF NOT EXISTS sentence_attribute (
+    sentence INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    value,
+    PRIMARY KEY (sentence, name)
+);
+CREATE INDEX IF NOT EXISTS parallelsentence_id ON parallelsentence (id);
+CREATE INDEX IF NOT EXISTS parallelsentence_testset ON parallelsentence (testset);
+CREATE INDEX IF NOT EXISTS parallelsentence_judgement_id ON parallelsentence (judgement_id);
+CREATE INDEX IF NOT EXISTS ps_attribute_value ON ps_attribute (name, value);
+CREATE INDEX IF NOT EXISTS sentence_ps ON sentence (ps, kind, position);
+CREATE INDEX IF NOT EXISTS sentence_system ON sentence (system);
+"""
+
+#the kinds of sentences contained in a parallel sentence, in the order they are stored
+SOURCE = "src"
+TARGET = "tgt"
+REFERENCE = "ref"
+
+#maximum number of variables in one SQLite statement
+MAX_VARIABLES = 900
+
+_nested_name_RE = re.compile("^(?:(src|ref)|tgt-([0-9]+))_(.*)$")
+
+
+def _chunks(items, size):
+    for start in xrange(0, len(items), size):
+        yield items[start:start + size]
+
+
+class SqliteDataSet(DataSet):
+    """
+    A data set whose parallel sentences are stored in a local SQLite file instead of memory.
+    Parallel sentences are built only when they are requested and iteration goes through
+    the file in batches, so that data sets larger than memory can be handled.
+    Modifications on the parallel sentences provided are not stored back in the file,
+    apart from the ones done through the methods of the data set, e.g. L{merge_dataset} or L{remove_ties}
+    @ivar connection: the connection to the SQLite database
+    @type connection: sqlite3.Connection
+    @ivar batch_size: the number of parallel sentences retrieved or stored at a time
+    @type batch_size: int
+    """
+
+    def __init__(self, filename, content = [], batch_size = 1000):
+        """
+        @param filename: the SQLite file. It will be created if it doesn't exist
+        @type filename: str
+        @param content: parallel sentences to be added to the data set
+        @type content: [L{ParallelSentence}, ...] or L{DataSet}
+        @param batch_size: the number of parallel sentences retrieved or stored at a time
+        @type batch_size: int
+        """
+        self.filename = filename
+        self.connection = sqlite3.connect(filename)
+        self.connection.executescript(SCHEMA)
+        self.batch_size = batch_size
+        self.annotations = []
+        self.attribute_names = []
+        self.attribute_names_found = False
+        self._indexes = {}
+        self._index_view = None
+        if content:
+            self.add_parallelsentences(content)
+
+    def close(self):
+        self.connection.close()
+
+    @property
+    def parallelsentences(self):
+        """
+        All the parallel sentences loaded in memory. Only for compatibility with the functions
+        of L{DataSet} that are not provided by the database, as it defeats its purpose
+        """
+        return self.get_parallelsentences()
+
+    def get_parallelsentences(self):
+        """
+        Load all the parallel sentences into memory. Consider iterating over the data set instead
+        @rtype: [L{ParallelSentence}, ...]
+        """
+        return list(self)
+
+    def __iter__(self):
+        """
+        Iterate over the parallel sentences, retrieving them from the database in batches
+        """
+        for ps_id, parallelsentence in self._iter_with_ids():
+            yield parallelsentence
+
+    def get_size(self):
+        return self.connection.execute("SELECT COUNT(*) FROM parallelsentence").fetchone()[0]
+
+    def _get_translation_count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM sentence WHERE kind = ?", (TARGET,)).fetchone()[0]
+
+    def get_head_sentences(self, n):
+        return list(islice(self, n))
+
+    def add_parallelsentences(self, parallelsentences):
+        """
+        Append parallel sentences to the database, in batches. As in L{DataSet}, parallel sentences
+        without judgment id get their position in the data set as one
+        @param parallelsentences: the parallel sentences to be added
+        @type parallelsentences: iter(L{ParallelSentence}) or L{DataSet}
+        """
+        cursor = self.connection.cursor()
+        ps_id = cursor.execute("SELECT COALESCE(MAX(ps), -1) + 1 FROM parallelsentence").fetchone()[0]
+        sentence_id = cursor.execute("SELECT COALESCE(MAX(sentence), -1) + 1 FROM sentence").fetchone()[0]
+        parallelsentences = iter(parallelsentences)
+        while True:
+            batch = list(islice(parallelsentences, self.batch_size))
+            if not batch:
+                break
+            rows = ([], [], [], [])
+            for parallelsentence in batch:
+                if not parallelsentence.has_judgment_id():
+                    parallelsentence.add_judgment_id(ps_id + 1)
+                sentence_id = self._add_rows(rows, ps_id, sentence_id, parallelsentence)
+                ps_id += 1
+            self._insert_rows(cursor, rows)
+        self.connection.commit()
+        self.attribute_names_found = False
+
+    def import_jcml(self, filename):
+        """
+        Bulk import of all the parallel sentences of a JCML file, without loading it in memory
+        @param filename: the JCML file
+        @type filename: str
+        """
+        from io_utils.input.iterjcmlreader import IterJcmlReader
+        self.add_parallelsentences(IterJcmlReader(filename).get_parallelsentences())
+
+    def _add_rows(self, rows, ps_id, sentence_id, parallelsentence):
+        """
+        Convert a parallel sentence to rows for the respective tables
+        @return: the next available sentence id
+        """
+        ps_rows, ps_attribute_rows, sentence_rows, sentence_attribute_rows = rows
+        attributes = parallelsentence.get_attributes()
+        ps_rows.append((ps_id, attributes.get("id"), attributes.get("testset"), attributes.get("judgement_id")))
+        ps_attribute_rows.extend([(ps_id, name, value) for name, value in attributes.iteritems()])
+
+        sources = parallelsentence.get_source()
+        if sources is None:
+            sources = []
+        elif not isinstance(sources, (list, tuple)):
+            sources = [sources]
+        reference = parallelsentence.get_reference()
+        references = [reference] if reference is not None else []
+
+        for kind, simplesentences in [(SOURCE, sources), (TARGET, parallelsentence.get_translations()), (REFERENCE, references)]:
+            for position, simplesentence in enumerate(simplesentences):
+                sentence_attributes = simplesentence.get_attributes()
+                sentence_rows.append((sentence_id, ps_id, kind, position, simplesentence.get_string(), sentence_attributes.get("system")))
+                sentence_attribute_rows.extend([(sentence_id, name, value) for name, value in sentence_attributes.iteritems()])
+                sentence_id += 1
+        return sentence_id
+
+    def _insert_rows(self, cursor, rows):
+        ps_rows, ps_attribute_rows, sentence_rows, sentence_attribute_rows = rows
+        cursor.executemany("INSERT INTO parallelsentence VALUES (?, ?, ?, ?)", ps_rows)
+        cursor.executemany("INSERT INTO ps_attribute VALUES (?, ?, ?)", ps_attribute_rows)
+        cursor.executemany("INSERT INTO sentence VALUES (?, ?, ?, ?, ?, ?)", sentence_rows)
+        cursor.executemany("INSERT INTO sentence_attribute VALUES (?, ?, ?)", sentence_attribute_rows)
+
+    def _delete(self, cursor, ps_ids):
+        for chunk in _chunks(ps_ids, MAX_VARIABLES):
+            marks = ",".join("?" * len(chunk))
+            cursor.execute("DELETE FROM sentence_attribute WHERE sentence IN (SELECT sentence FROM sentence WHERE ps IN (%s))" % marks, chunk)
+            cursor.execute("DELETE FROM sentence WHERE ps IN (%s)" % marks, chunk)
+            cursor.execute("DELETE FROM ps_attribute WHERE ps IN (%s)" % marks, chunk)
+            cursor.execute("DELETE FROM parallelsentence WHERE ps IN (%s)" % marks, chunk)
+
+    def _iter_with_ids(self, condition = "1", parameters = ()):
+        """
+        Iterate over the parallel sentences that fulfill an SQL condition on the parallelsentence table,
+        along with their ids in the database
+        """
+        last_id = -1
+        while True:
+            ps_ids = [row[0] for row in self.connection.execute(
+                "SELECT ps FROM parallelsentence WHERE ps > ? AND (%s) ORDER BY ps LIMIT ?" % condition,
+                (last_id,) + tuple(parameters) + (self.batch_size,))]
+            if not ps_ids:
+                return
+            for item in self._load(ps_ids):
+                yield item
+            last_id = ps_ids[-1]
+
+    def _select(self, condition, parameters = ()):
+        return [parallelsentence for ps_id, parallelsentence in self._iter_with_ids(condition, parameters)]
+
+    def _load(self, ps_ids):
+        """
+        Build the parallel sentences with the given ids
+        @return: the ids and the parallel sentences, in the given order
+        @rtype: [(int, L{ParallelSentence}), ...]
+        """
+        ps_attributes = dict([(ps_id, {}) for ps_id in ps_ids])
+        sentences = dict([(ps_id, {SOURCE: [], TARGET: [], REFERENCE: []}) for ps_id in ps_ids])
+        for chunk in _chunks(ps_ids, MAX_VARIABLES):
+            marks = ",".join("?" * len(chunk))
+            for ps_id, name, value in self.connection.execute(
+                    "SELECT ps, name, value FROM ps_attribute WHERE ps IN (%s)" % marks, chunk):
+                ps_attributes[ps_id][name] = value
+
+            sentence_attributes = {}
+            for sentence_id, name, value in self.connection.execute(
+                    "SELECT a.sentence, a.name, a.value FROM sentence_attribute a JOIN sentence s ON s.sentence = a.sentence WHERE s.ps IN (%s)" % marks, chunk):
+                sentence_attributes.setdefault(sentence_id, {})[name] = value
+
+            for sentence_id, ps_id, kind, string in self.connection.execute(
+                    "SELECT sentence, ps, kind, string FROM sentence WHERE ps IN (%s) ORDER BY ps, kind, position" % marks, chunk):
+                simplesentence = SimpleSentence(string or "", sentence_attributes.get(sentence_id, {}))
+                sentences[ps_id][kind].append(simplesentence)
+
+        loaded = []
+        for ps_id in ps_ids:
+            sources = sentences[ps_id][SOURCE]
+            if len(sources) == 1:
+                src = sources[0]
+            elif sources:
+                src = sources
+            else:
+                src = None
+            references = sentences[ps_id][REFERENCE]
+            ref = references[0] if references else SimpleSentence()
+            loaded.append((ps_id, ParallelSentence(src, sentences[ps_id][TARGET], ref, ps_attributes[ps_id])))
+        return loaded
+
+    def get_attribute_names(self):
+        return [row[0] for row in self.connection.execute("SELECT DISTINCT name FROM ps_attribute")]
+
+    def get_nested_attribute_names(self):
+        query = """SELECT DISTINCT CASE s.kind WHEN 'tgt' THEN 'tgt-' || (s.position + 1) || '_' || a.name
+                                              ELSE s.kind || '_' || a.name END
+                   FROM sentence_attribute a JOIN sentence s ON s.sentence = a.sentence
+                   WHERE s.kind != 'src' OR s.position = 0"""
+        nested_attribute_names = set([row[0] for row in self.connection.execute(query)])
+        nested_attribute_names.update(self.get_attribute_names())
+        return list(nested_attribute_names)
+
+    def get_discrete_attribute_values(self, discrete_attribute_names):
+        """
+        Provide all the values of the given attributes. Names of attributes of the nested sentences
+        are given as in L{ParallelSentence.get_nested_attributes}, whose values are overriden by
+        the parallel sentence attributes with the same name
+        """
+        attvalues = {}
+        for attname in discrete_attribute_names:
+            values = set([row[0] for row in self.connection.execute(
+                "SELECT DISTINCT value FROM ps_attribute WHERE name = ?", (attname,))])
+
+            nested_name = _nested_name_RE.match(attname)
+            if nested_name:
+                kind, tgt_index, name = nested_name.groups()
+                if kind is None:
+                    kind, position = TARGET, int(tgt_index) - 1
+                else:
+                    position = 0
+                query = """SELECT DISTINCT a.value FROM sentence_attribute a JOIN sentence s ON s.sentence = a.sentence
+                           WHERE s.kind = ? AND s.position = ? AND a.name = ?
+                           AND NOT EXISTS (SELECT 1 FROM ps_attribute p WHERE p.ps = s.ps AND p.name = ?)"""
+                values.update([row[0] for row in self.connection.execute(query, (kind, position, name, attname))])
+            if values:
+                attvalues[attname] = values
+        return attvalues
+
+    def get_parallelsentences_by_sentence_id(self, sentence_id):
+        #the compact id is the test set and the id joined with a colon, or only the id
+        conditions = ["(testset IS NULL AND id = ?)"]
+        parameters = [sentence_id]
+        parts = sentence_id.split(":")
+        for i in range(1, len(parts)):
+            conditions.append("(testset = ? AND id = ?)")
+            parameters.extend([":".join(parts[:i]), ":".join(parts[i:])])
+        return self._select(" OR ".join(conditions), parameters)
+
+    def get_parallelsentence_by_judgment_id(self, judgment_id):
+        row = self.connection.execute("SELECT MAX(ps) FROM parallelsentence WHERE judgement_id = ?", (judgment_id,)).fetchone()
+        if row[0] is None:
+            raise KeyError(judgment_id)
+        return self._load([row[0]])[0][1]
+
+    def get_parallelsentences_by_system(self, system):
+        return self._select("ps IN (SELECT ps FROM sentence WHERE kind = 'tgt' AND system = ?)", (system,))
+
+    def get_parallelsentences_by_testset(self, testset):
+        return self._select("testset = ?", (testset,))
+
+    def get_parallelsentences_by_attributes(self, attribute_names, values):
+        conditions = ["ps IN (SELECT ps FROM ps_attribute WHERE name = ? AND value = ?)"] * len(attribute_names)
+        parameters = []
+        for name, value in zip(attribute_names, values):
+            parameters.extend([name, value])
+        return self._select(" AND ".join(conditions) or "1", parameters)
+
+    def get_parallelsentences_per_sentence_id(self):
+        ps_sid = {}
+        for parallelsentence in self:
+            ps_sid.setdefault(parallelsentence.get_compact_id(), []).append(parallelsentence)
+        return ps_sid
+
+    def get_parallelsentences_with_judgment_ids(self):
+        return dict([(parallelsentence.get_judgment_id(), parallelsentence) for parallelsentence in self])
+
+    def append_dataset(self, add_dataset):
+        self.add_parallelsentences(add_dataset)
+
+    def _update(self, update):
+        """
+        Modify the stored parallel sentences in place, batch by batch, writing them back to the database
+        @param update: a function that modifies the given parallel sentence. If it returns False, 
+        the parallel sentence is deleted instead
+        @type update: function
+        """
+        cursor = self.connection.cursor()
+        last_id = -1
+        while True:
+            loaded = list(islice(self._iter_with_ids("ps > ?", (last_id,)), self.batch_size))
+            if not loaded:
+                break
+            last_id = loaded[-1][0]
+            updated = [(ps_id, parallelsentence) for ps_id, parallelsentence in loaded if update(parallelsentence) is not False]
+
+            sentence_id = cursor.execute("SELECT COALESCE(MAX(sentence), -1) + 1 FROM sentence").fetchone()[0]
+            self._delete(cursor, [ps_id for ps_id, parallelsentence in loaded])
+            rows = ([], [], [], [])
+            for ps_id, parallelsentence in updated:
+                sentence_id = self._add_rows(rows, ps_id, sentence_id, parallelsentence)
+            self._insert_rows(cursor, rows)
+        self.connection.commit()
+        self.attribute_names_found = False
+
+    def ensure_judgment_ids(self):
+        """
+        Nothing to do, as the parallel sentences got their judgment ids when they were added
+        """
+        pass
+
+    def _iter_symmetrical(self, dataset):
+        """
+        @return: the parallel sentences of a data set of the same size, in the order of the stored ones
+        @rtype: iter(L{ParallelSentence})
+        @raise IndexError: if the data sets are not of the same size
+        """
+        if self.get_size() != dataset.get_size():
+            raise IndexError("Error, datasets not symmetrical")
+        return iter(dataset)
+
+    def merge_dataset(self, dataset_for_merging_with, attribute_replacements = {}, merging_attributes = ["id"], merge_strict = False, **kwargs):
+        """
+        Merge the parallel sentences of another data set into the ones stored in the database, as
+        in L{DataSet.merge_dataset}. The merged parallel sentences are written back to the database
+        batch by batch. If merge_strict is set, the parallel sentences that could not be merged are deleted
+        """
+        def merge(parallelsentence):
+            key = tuple([parallelsentence.get_attribute(att) for att in merging_attributes])
+            try:
+                incoming_ps = dataset_for_merging_with.get_parallelsentences_by_attributes(merging_attributes, key)[-1]
+                parallelsentence.merge_parallelsentence(incoming_ps, attribute_replacements, **kwargs)
+            except:
+                sys.stderr.write( "Didn't find key while merging sentence %s " % (key,) )
+                if merge_strict:
+                    return False
+        self._update(merge)
+
+    def merge_dataset_symmetrical(self, dataset_for_merging_with, attribute_replacements = {}, confirm_attribute = ""):
+        """
+        Merge the parallel sentences of a symmetrical data set into the ones stored in the database, as
+        in L{DataSet.merge_dataset_symmetrical}. The merged parallel sentences are written back to the database
+        """
+        incoming_parallelsentences = self._iter_symmetrical(dataset_for_merging_with)
+        if confirm_attribute != "":
+            vector1 = [ps.get_attribute(confirm_attribute) for ps in self]
+            vector2 = [ps.get_attribute(confirm_attribute) for ps in dataset_for_merging_with]
+            if vector1 != vector2:
+                raise IndexError("Error, datasets not symmetrical, concerning the identifier attribute {}".format(confirm_attribute))
+        def merge(parallelsentence):
+            parallelsentence.merge_parallelsentence(next(incoming_parallelsentences), attribute_replacements)
+        self._update(merge)
+
+    def merge_references_symmetrical(self, dataset_for_merging_with):
+        incoming_parallelsentences = self._iter_symmetrical(dataset_for_merging_with)
+        def merge(parallelsentence):
+            parallelsentence.ref = next(incoming_parallelsentences).ref
+        self._update(merge)
+
+    def modify_singlesource_strings(self, strings = []):
+        strings = iter(strings)
+        def modify(parallelsentence):
+            string = next(strings, None)
+            if string is not None:
+                parallelsentence.src.string = string
+        self._update(modify)
+
+    def modify_target_strings(self, strings = []):
+        strings = iter(strings)
+        def modify(parallelsentence):
+            for string, tgt in zip(next(strings, []), parallelsentence.tgt):
+                tgt.string = string
+        self._update(modify)
+
+    def remove_ties(self):
+        """
+        Modify the stored parallel sentences by removing ranking ties, as in L{DataSet.remove_ties}
+        """
+        def modify(parallelsentence):
+            parallelsentence.remove_ties()
+        self._update(modify)
+
+    def add_attribute_vector(self, att_vector, target="tgt", item=0):
+        att_vector.reverse()
+        def modify(parallelsentence):
+            self._add_attribute_vector_item(parallelsentence, att_vector.pop(), target, item)
+        self._update(modify)
@@ -0,0 +1,72 @@
+'''
+Tests of the data set, run from the source directory with python -m unittest sentence.test_dataset
+
+Created on 18 Oct 2026
+
+@author: Eleftherios Avramidis
+'''
+
+import unittest
+from dataset import DataSet
+from parallelsentence import ParallelSentence
+from sentence import SimpleSentence
+
+
+def _get_parallelsentence(attributes, source_attributes, systems = ("a", "b")):
+    attributes = dict(attributes, langsrc="de", langtgt="en")
+    translations = [SimpleSentence("translation", {"system": system}) for system in systems]
+    return ParallelSentence(SimpleSentence("source", source_attributes), translations, SimpleSentence("reference"), attributes)
+
+
+class TestDiscreteAttributeValues(unittest.TestCase):
+
+    def test_parallelsentence_attribute_prevails(self):
+        #the nested attribute x of the source gets the same prefixed name
+        dataset = DataSet([_get_parallelsentence({"src_x": "top"}, {"x": "nested"})])
+        self.assertEqual(dataset.get_discrete_attribute_values(["src_x"]), {"src_x": set(["top"])})
+
+    def test_parallelsentence_attribute_prevails_per_translation(self):
+        dataset = DataSet([_get_parallelsentence({"src_x": "top"}, {"x": "nested"})])
+        encoded_attributes = dataset.encode_attributes(["src_x", "system"], rows="translation")
+        self.assertEqual(encoded_attributes.get_values(), {"src_x": set(["top"]), "system": set(["a", "b"])})
+
+    def test_nested_attribute(self):
+        dataset = DataSet([_get_parallelsentence({}, {"x": "nested"}), _get_parallelsentence({}, {"x": "other"})])
+        self.assertEqual(dataset.get_discrete_attribute_values(["src_x"]), {"src_x": set(["nested", "other"])})
+
+
+class TestIndexes(unittest.TestCase):
+
+    def setUp(self):
+        self.dataset = DataSet([_get_parallelsentence({"testset": "t1", "id": str(i)}, {}) for i in range(3)])
+        self.index = self.dataset._get_index("testset")
+
+    def test_unrelated_modification_keeps_indexes(self):
+        parallelsentence = _get_parallelsentence({"testset": "t1"}, {})
+        parallelsentence.add_attributes({"testset": "t2"})
+        parallelsentence.get_translations()[0].add_attribute("system", "c")
+        self.assertTrue(self.dataset._get_index("testset") is self.index)
+
+    def test_modified_attributes(self):
+        self.dataset.get_parallelsentences()[0].add_attributes({"testset": "t2"})
+        self.assertEqual(len(self.dataset.get_parallelsentences_by_testset("t1")), 2)
+        self.assertEqual(len(self.dataset.get_parallelsentences_by_testset("t2")), 1)
+
+    def test_modified_translations(self):
+        self.assertEqual(self.dataset.get_parallelsentences_by_system("c"), [])
+        self.dataset.get_parallelsentences()[1].get_translations()[0].add_attribute("system", "c")
+        self.assertEqual(len(self.dataset.get_parallelsentences_by_system("c")), 1)
+
+    def test_replaced_parallelsentence(self):
+        self.dataset.get_parallelsentences()[2] = _get_parallelsentence({"testset": "t3"}, {})
+        self.assertEqual(len(self.dataset.get_parallelsentences_by_testset("t3")), 1)
+        self.assertEqual(len(self.dataset.get_parallelsentences_by_testset("t1")), 2)
+
+    def test_appended_dataset(self):
+        self.dataset.append_dataset(DataSet([_get_parallelsentence({"testset": "t1", "id": "3"}, {})]))
+        self.assertTrue(self.dataset._get_index("testset") is self.index)
+        self.assertEqual(len(self.dataset.get_parallelsentences_by_testset("t1")), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()